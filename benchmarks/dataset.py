@@ -0,0 +1,104 @@
+"""Synthetic todo databases for the benchmarks.
+
+The data is deterministic for a given count and seed, so runs on different
+commits measure the same work. Texts are a few words drawn from a small
+vocabulary (with the odd non-ASCII one), about a third of the todos are
+done, and timestamps spread over the year before a fixed instant:
+
+    python benchmarks/dataset.py 100000 /tmp/todo.json            # pretty JSON
+    python benchmarks/dataset.py 100000 /tmp/todo.db --format binary
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from flywheel.storage import TodoStorage  # noqa: E402
+from flywheel.todo import Todo  # noqa: E402
+
+# 2026-01-01T00:00:00Z; the newest timestamp any generated todo carries
+_EPOCH_END_US = 1_767_225_600_000_000
+_YEAR_US = 365 * 86_400 * 1_000_000
+
+_WORDS = (
+    "buy",
+    "milk",
+    "eggs",
+    "bread",
+    "call",
+    "email",
+    "review",
+    "fix",
+    "bug",
+    "deploy",
+    "write",
+    "docs",
+    "plan",
+    "meeting",
+    "report",
+    "invoice",
+    "refactor",
+    "test",
+    "release",
+    "backup",
+    "clean",
+    "garage",
+    "water",
+    "plants",
+    "book",
+    "flight",
+    "renew",
+    "passport",
+    "update",
+    "résumé",
+    "prepare",
+    "talk",
+    "café",
+    "会议",
+)
+
+
+def iter_todos(count: int, seed: int = 0) -> Iterator[Todo]:
+    """Yield ``count`` synthetic todos with ids 1..count."""
+    rng = random.Random(seed)
+    for todo_id in range(1, count + 1):
+        created = _EPOCH_END_US - rng.randrange(_YEAR_US)
+        done = rng.random() < 0.3
+        updated = created + rng.randrange(86_400_000_000) if done else created
+        text = " ".join(rng.choices(_WORDS, k=rng.randint(2, 8)))
+        yield Todo(id=todo_id, text=text, done=done, created_at=created, updated_at=updated)
+
+
+def records(count: int, seed: int = 0) -> list[dict]:
+    """Return ``count`` synthetic todos as ``to_dict()`` shaped dicts."""
+    return [todo.to_dict() for todo in iter_todos(count, seed)]
+
+
+def write_database(path: str | Path, count: int, format: str = "pretty", seed: int = 0) -> Path:
+    """Write a database of ``count`` synthetic todos to ``path``."""
+    storage = TodoStorage(str(path), format=format, durability="fast")
+    storage.save(list(iter_todos(count, seed)))
+    return storage.path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int, help="Number of todos")
+    parser.add_argument("path", help="Database file to write")
+    parser.add_argument("--format", default="pretty", help="Storage format")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_database(args.path, args.count, args.format, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
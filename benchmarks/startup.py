@@ -0,0 +1,117 @@
+"""Startup budget for the todo CLI, measured with ``python -X importtime``.
+
+Shell prompt integrations run ``todo list --pending`` on every prompt, so its
+import cost is user-visible latency. This runs that command (and a few
+others) in fresh interpreters, sums the import time spent after interpreter
+startup and fails when the median exceeds the budget:
+
+    python benchmarks/startup.py              # check against the budget
+    python benchmarks/startup.py --top 15     # also show the heaviest imports
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Median import time (ms) allowed per command. Generous enough for noisy CI
+# machines (the lazy-import rework took these from ~170ms to ~100ms on a slow
+# one), tight enough to catch the server or dataclasses coming back.
+BUDGET_MS = {
+    "list --pending": 130.0,
+    "list": 130.0,
+    "add": 130.0,
+}
+
+# Modules read-only commands must never import, whatever the timing noise
+READ_ONLY_FORBIDDEN = frozenset(
+    {
+        "concurrent.futures",
+        "csv",
+        "dataclasses",
+        "datetime",
+        "inspect",
+        "mmap",
+        "random",
+        "socket",
+        "socketserver",
+        "sqlite3",
+        "tempfile",
+        "threading",
+    }
+)
+
+_RUNNER = "import sys; from flywheel.cli import main; raise SystemExit(main(sys.argv[1:]))"
+
+
+def measure(command: str, db: Path, nested: bool = False) -> dict[str, int]:
+    """Run ``todo <command>`` once; returns top-level import -> cumulative us.
+
+    With ``nested=True`` every imported module is listed, not just top-level ones.
+    """
+    argv = ["--db", str(db), *command.split()]
+    if command == "add":
+        argv.append("benchmark")
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RUNNER, *argv],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    imports: dict[str, int] = {}
+    after_site = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header row
+        if name.startswith("  ") and not nested:
+            continue  # nested imports are included in their parent
+        name = name.strip()
+        if name == "site":
+            after_site = True
+            continue
+        if after_site:
+            imports[name] = imports.get(name, 0) + int(cumulative)
+    return imports
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="Interpreters per command")
+    parser.add_argument("--top", type=int, default=0, help="Show the N heaviest imports")
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "todo.json"
+        for command, budget in BUDGET_MS.items():
+            samples = [measure(command, db) for _ in range(args.runs)]
+            median = statistics.median(sum(sample.values()) for sample in samples) / 1000
+            verdict = "ok" if median <= budget else "OVER BUDGET"
+            failed |= median > budget
+            print(f"todo {command:<16} {median:7.1f} ms  (budget {budget:.0f} ms)  {verdict}")
+            if command.startswith("list"):
+                loaded = READ_ONLY_FORBIDDEN & set(measure(command, db, nested=True))
+                if loaded:
+                    failed = True
+                    print(f"    imports {', '.join(sorted(loaded))}, which it must not")
+            if args.top:
+                heaviest = sorted(samples[-1].items(), key=lambda item: -item[1])[: args.top]
+                for name, us in heaviest:
+                    print(f"    {us / 1000:7.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
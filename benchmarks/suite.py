@@ -0,0 +1,312 @@
+"""Storage and app benchmarks at several database sizes, checked against a baseline.
+
+Each case runs in a fresh interpreter against a synthetic database (see
+``dataset.py``) and reports its throughput, p50/p99 latency per operation
+and the peak RSS of that interpreter. Results are compared with
+``baseline.json``; the run fails when a case got slower, or grew, by more
+than the threshold:
+
+    python benchmarks/suite.py                          # 1k and 100k todos
+    python benchmarks/suite.py --scales 1k,100k,1m      # also a million
+    python benchmarks/suite.py --cases storage.load,app.add
+    python benchmarks/suite.py --update-baseline        # record this machine
+
+Baselines only mean something on the machine that recorded them: update it
+there before comparing a change, and never compare across machines.
+
+Saves use the ``fast`` durability mode by default, so the numbers measure our
+code rather than the disk's fsync latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import dataset
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+DEFAULT_SCALES = "1k,100k"
+
+# Allowed slowdown (or growth in peak RSS) against the baseline, in percent.
+# Wide enough for run-to-run noise on a quiet machine.
+DEFAULT_THRESHOLD = 25.0
+
+# Todo.from_dict/to_dict calls are timed in chunks of this many; a single
+# call is too short for the clock
+_CHUNK = 1000
+
+# case name -> (function, throughput unit); a function times its operation
+# against the database at ``path`` holding ``scale`` todos and returns the
+# nanoseconds each operation took and how many todos one operation handles
+CASES: dict[str, tuple[Callable[[int, Path, str], tuple[list[float], int]], str]] = {}
+
+
+def _case(name: str, unit: str):
+    def register(function):
+        CASES[name] = (function, unit)
+        return function
+
+    return register
+
+
+def _repeats(scale: int) -> int:
+    """Timed operations per case: many on small databases, a few on huge ones."""
+    return max(5, min(50, 1_000_000 // scale))
+
+
+def _time_each(operation: Callable[[int], object], repeats: int) -> list[float]:
+    """Time ``operation(i)`` for each i; the first (warm-up) call is not counted."""
+    samples = []
+    for i in range(repeats + 1):
+        start = time.perf_counter_ns()
+        operation(i)
+        samples.append(time.perf_counter_ns() - start)
+    return samples[1:]
+
+
+def _time_chunks(operation: Callable, items: list) -> list[float]:
+    """Time ``operation`` over ``items`` in chunks; returns ns per item of each chunk."""
+    samples = []
+    for offset in range(0, len(items), _CHUNK):
+        chunk = items[offset : offset + _CHUNK]
+        start = time.perf_counter_ns()
+        for item in chunk:
+            operation(item)
+        samples.append((time.perf_counter_ns() - start) / len(chunk))
+    return samples
+
+
+@_case("todo.from_dict", "todos/s")
+def _from_dict(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.todo import Todo
+
+    return _time_chunks(Todo.from_dict, dataset.records(scale)), 1
+
+
+@_case("todo.to_dict", "todos/s")
+def _to_dict(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.todo import Todo
+
+    return _time_chunks(Todo.to_dict, list(dataset.iter_todos(scale))), 1
+
+
+@_case("storage.load", "todos/s")
+def _storage_load(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.storage import TodoStorage
+
+    storage = TodoStorage(str(path), durability=durability)
+    return _time_each(lambda _: storage.load(), _repeats(scale)), scale
+
+
+@_case("storage.save", "todos/s")
+def _storage_save(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.storage import TodoStorage
+
+    storage = TodoStorage(str(path), durability=durability)
+    todos = storage.load()
+    return _time_each(lambda _: storage.save(todos), _repeats(scale)), scale
+
+
+@_case("app.add", "ops/s")
+def _app_add(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.cli import TodoApp
+
+    app = TodoApp(str(path), durability=durability)
+    return _time_each(lambda i: app.add(f"benchmark todo {i}"), _repeats(scale)), 1
+
+
+@_case("app.mark_done", "ops/s")
+def _app_mark_done(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.cli import TodoApp
+
+    app = TodoApp(str(path), durability=durability)
+    ids = random.Random(scale).sample(range(1, scale + 1), _repeats(scale) + 1)
+    return _time_each(lambda i: app.mark_done(ids[i]), _repeats(scale)), 1
+
+
+@_case("app.remove", "ops/s")
+def _app_remove(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.cli import TodoApp
+
+    app = TodoApp(str(path), durability=durability)
+    ids = random.Random(scale).sample(range(1, scale + 1), _repeats(scale) + 1)
+    return _time_each(lambda i: app.remove(ids[i]), _repeats(scale)), 1
+
+
+@_case("app.list", "todos/s")
+def _app_list(scale: int, path: Path, durability: str) -> tuple[list[float], int]:
+    from flywheel.cli import TodoApp
+
+    app = TodoApp(str(path), durability=durability)
+    return _time_each(lambda _: app.list(), _repeats(scale)), scale
+
+
+def _peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def run_case(name: str, scale: int, path: Path, durability: str) -> dict:
+    """Run one case in this process and summarize it."""
+    function, unit = CASES[name]
+    samples, items = function(scale, path, durability)
+    mean = sum(samples) / len(samples)
+    rss = _peak_rss()
+    return {
+        "throughput": round(items * 1e9 / mean, 1),
+        "unit": unit,
+        "p50_us": round(_percentile(samples, 50) / 1000, 2),
+        "p99_us": round(_percentile(samples, 99) / 1000, 2),
+        "peak_rss_mb": None if rss is None else round(rss / 2**20, 1),
+    }
+
+
+def _run_isolated(name: str, scale: int, path: Path, durability: str) -> dict:
+    """Run one case in a fresh interpreter, so its peak RSS is its own."""
+    result = subprocess.run(
+        [sys.executable, __file__, "--run-case", name, "--scale", str(scale), "--db", str(path)]
+        + ["--durability", durability],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def compare(result: dict, baseline: dict | None, threshold: float) -> list[str]:
+    """Return how ``result`` regressed against ``baseline`` by more than ``threshold`` %."""
+    if baseline is None:
+        return []
+    limit = 1 + threshold / 100
+    regressions = []
+    if result["throughput"] * limit < baseline["throughput"]:
+        before, after = baseline["throughput"], result["throughput"]
+        regressions.append(f"throughput {before:,.1f} -> {after:,.1f}")
+    for metric in ("p50_us", "peak_rss_mb"):
+        before, after = baseline.get(metric), result.get(metric)
+        if before is not None and after is not None and after > before * limit:
+            regressions.append(f"{metric} {before:,.1f} -> {after:,.1f}")
+    return regressions
+
+
+def parse_scales(value: str) -> list[int]:
+    """Parse ``"1k,100k,1m"`` into todo counts."""
+    multipliers = {"k": 1000, "m": 1_000_000}
+    scales = []
+    for part in value.lower().split(","):
+        part = part.strip()
+        multiplier = multipliers.get(part[-1:], 1)
+        try:
+            scale = int(part[:-1] if multiplier != 1 else part) * multiplier
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid scale: {part!r}") from None
+        if scale < 1:
+            raise argparse.ArgumentTypeError(f"invalid scale: {part!r}")
+        scales.append(scale)
+    return scales
+
+
+def _parse_cases(value: str) -> list[str]:
+    names = [name.strip() for name in value.split(",")]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown case {unknown[0]!r}; choose from {', '.join(CASES)}"
+        )
+    return names
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=parse_scales, default=parse_scales(DEFAULT_SCALES))
+    parser.add_argument("--cases", type=_parse_cases, default=list(CASES))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed regression, percent"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results")
+    parser.add_argument("--durability", default="fast", help="Durability mode of saves")
+    # Internal: run a single case and print its result as JSON
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--db", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.scale, args.db, args.durability)))
+        return 0
+
+    try:
+        stored = json.loads(args.baseline.read_text())
+    except FileNotFoundError:
+        stored = {"results": {}}
+    baseline: dict[str, dict] = stored["results"]
+
+    results: dict[str, dict] = {}
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            source = dataset.write_database(Path(tmp) / f"source-{scale}.json", scale)
+            for name in args.cases:
+                # Every case gets a pristine copy: several of them write
+                path = Path(tmp) / f"todo-{scale}.json"
+                shutil.copyfile(source, path)
+                result = _run_isolated(name, scale, path, args.durability)
+                key = f"{name}@{scale}"
+                results[key] = result
+                regressions = (
+                    []
+                    if args.update_baseline
+                    else compare(result, baseline.get(key), args.threshold)
+                )
+                failed |= bool(regressions)
+                verdict = "REGRESSED" if regressions else ("new" if key not in baseline else "ok")
+                rss = result["peak_rss_mb"]
+                print(
+                    f"{name:<15} {scale:>9,} {result['throughput']:>13,.1f} {result['unit']:<8}"
+                    f" p50 {result['p50_us']:>11,.1f} us  p99 {result['p99_us']:>11,.1f} us"
+                    f"  rss {'-' if rss is None else f'{rss:,.1f}':>7} MB  {verdict}"
+                )
+                for regression in regressions:
+                    print(f"    {regression}")
+                path.unlink()
+                for sidecar in Path(tmp).glob(f"todo-{scale}.json.*"):
+                    sidecar.unlink()
+
+    if args.update_baseline:
+        stored = {
+            "machine": f"{platform.system()} {platform.machine()}, "
+            f"{os.cpu_count()} CPUs, Python {platform.python_version()}",
+            "results": {**baseline, **results},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
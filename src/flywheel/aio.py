@@ -0,0 +1,169 @@
+"""Asyncio front for TodoApp.
+
+``AsyncTodoApp`` runs all storage work (file I/O, JSON encoding and
+decoding, SQLite calls) in worker threads, so awaiting it never blocks the
+event loop:
+
+    async with AsyncTodoApp("todo.json") as app:
+        todo = await app.add("buy milk")
+        await app.mark_done(todo.id)
+
+Mutations are serialized through an ``asyncio.Lock``. Those that arrive
+while a save is in flight queue up and are then applied together in one
+``TodoApp.transaction()``: one load and one save for the whole batch
+rather than a read-parse-rewrite cycle each. Every operation still gets
+its own result or exception; one that fails (say, an unknown id) does not
+stop the others in its batch from being saved.
+
+Writes and reads each have their own TodoApp on their own single worker
+thread, so reads never wait for a batch to be saved and SQLite connections
+stay on the thread that opened them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import builtins
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
+
+from .backends import is_record_store
+from .cli import TodoApp
+from .storage import DEFAULT_DURABILITY
+from .todo import Todo
+
+# (TodoApp / TodoTransaction method name, arguments, caller's future)
+type _Operation = tuple[str, tuple[Any, ...], asyncio.Future[Any]]
+type _Outcome = tuple[bool, Any]
+
+
+def _outcome(method: Callable[..., Any], args: tuple[Any, ...]) -> _Outcome:
+    """Call ``method``; returns (True, result) or (False, the exception raised)."""
+    try:
+        return True, method(*args)
+    except Exception as exc:
+        return False, exc
+
+
+class AsyncTodoApp:
+    """Asyncio counterpart of TodoApp (see the module docstring).
+
+    ``app`` is the TodoApp that makes the writes. Call ``aclose()`` (or use
+    ``async with``) when done, to stop the worker threads.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        backend: str | None = None,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        self.app = TodoApp(db_path, backend, durability=durability)
+        self._reader = TodoApp(db_path, backend, durability=durability)
+        self._write_thread = ThreadPoolExecutor(1, thread_name_prefix="flywheel-write")
+        self._read_thread = ThreadPoolExecutor(1, thread_name_prefix="flywheel-read")
+        self._lock = asyncio.Lock()
+        self._pending: builtins.list[_Operation] = []
+        self._flusher: asyncio.Task[None] | None = None
+        self._closed = False
+
+    async def __aenter__(self) -> AsyncTodoApp:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def add(self, text: str) -> Todo:
+        return cast(Todo, await self._mutate("add", text))
+
+    async def list(self, show_all: bool = True) -> builtins.list[Todo]:
+        return await self._read(self._reader.list, show_all)
+
+    async def get(self, todo_id: int) -> Todo:
+        return await self._read(self._reader.get, todo_id)
+
+    async def mark_done(self, todo_id: int) -> Todo:
+        return cast(Todo, await self._mutate("mark_done", todo_id))
+
+    async def mark_undone(self, todo_id: int) -> Todo:
+        return cast(Todo, await self._mutate("mark_undone", todo_id))
+
+    async def remove(self, todo_id: int) -> None:
+        await self._mutate("remove", todo_id)
+
+    async def rename(self, todo_id: int, text: str) -> Todo:
+        return cast(Todo, await self._mutate("rename", todo_id, text))
+
+    async def _read[T](self, function: Callable[..., T], *args: Any) -> T:
+        self._check_open()
+        return await asyncio.get_running_loop().run_in_executor(self._read_thread, function, *args)
+
+    async def _mutate(self, name: str, *args: Any) -> Any:
+        """Queue one operation for the next batch and wait for its outcome."""
+        self._check_open()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((name, args, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        # Cancelling the caller cancels ``future``; the batch then skips it,
+        # unless it is already being saved
+        return await future
+
+    async def _flush(self) -> None:
+        """Save queued operations in batches until none are left."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while self._pending:
+                batch = [op for op in self._pending if not op[2].cancelled()]
+                self._pending = []
+                if not batch:
+                    continue
+                calls = [(name, args) for name, args, _ in batch]
+                outcomes: builtins.list[_Outcome]
+                try:
+                    outcomes = await loop.run_in_executor(self._write_thread, self._apply, calls)
+                except Exception as exc:
+                    # The save itself failed: nothing in the batch was stored
+                    outcomes = [(False, exc)] * len(batch)
+                for (_, _, future), (ok, value) in zip(batch, outcomes, strict=True):
+                    if future.done():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+
+    def _apply(self, calls: builtins.list[tuple[str, tuple[Any, ...]]]) -> builtins.list[_Outcome]:
+        """Run one batch on the write thread; returns an outcome per call."""
+        app = self.app
+        if is_record_store(app.storage):
+            # These update single records in place; a batch gains nothing
+            # from a transaction that would load them all
+            return [_outcome(getattr(app, name), args) for name, args in calls]
+        outcomes = []
+        with app.transaction() as tx:
+            for name, args in calls:
+                ok, value = _outcome(getattr(tx, name), args)
+                # TodoApp.remove returns None; the transaction returns the todo
+                outcomes.append((ok, None if ok and name == "remove" else value))
+        return outcomes
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("AsyncTodoApp is closed")
+
+    async def aclose(self) -> None:
+        """Wait for queued mutations to be saved, then stop the worker threads."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flusher is not None:
+            await self._flusher
+        loop = asyncio.get_running_loop()
+        for thread, app in ((self._write_thread, self.app), (self._read_thread, self._reader)):
+            close = getattr(app.storage, "close", None)
+            if close is not None:
+                # SQLite connections must be closed on the thread that made them
+                await loop.run_in_executor(thread, close)
+            thread.shutdown(wait=False)
@@ -0,0 +1,251 @@
+"""Cold archive tier for completed todos.
+
+``todo archive`` moves done todos that have not changed for a while out of
+the database into ``<db>.archive``, so the hot file that every command loads
+and rewrites stays small however much history accumulates. The archive is
+NDJSON (one ``Todo.to_dict()`` record per line), optionally compressed:
+
+- ``zlib``: gzip members (deflate), recognised by the gzip magic
+- ``lzma``: xz streams, recognised by the xz magic
+
+Each archive run appends one member, so earlier members are copied as raw
+bytes and never recompressed. ``<db>.archive.meta`` records the highest id
+ever archived, which keeps new todos in the hot file from reusing the id of
+an archived one.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO, Protocol, TypedDict
+
+from .formats import _MAX_RECORD_CHARS
+from .storage import _write_file_atomic
+from .todo import Todo, _now_us
+
+ARCHIVE_COMPRESSIONS = ("none", "zlib", "lzma")
+
+# Done todos untouched for this many days are archived by default
+DEFAULT_ARCHIVE_AGE_DAYS = 30.0
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+_META_MARKER = "flywheel-archive"
+_META_VERSION = 1
+
+
+class _Meta(TypedDict):
+    high_water: int
+    count: int
+
+
+class _Lines(Protocol):
+    """What reading an archive needs of a (decompressing) binary stream."""
+
+    def readline(self, size: int = -1, /) -> bytes: ...
+
+
+def archive_path_for(path: str | Path) -> Path:
+    """Return the cold file that holds the archived todos of database ``path``."""
+    path = Path(path)
+    return path.with_name(path.name + ".archive")
+
+
+def archive_cutoff(older_than_days: float) -> int:
+    """Return the epoch-microsecond instant ``older_than_days`` days ago."""
+    return _now_us() - int(older_than_days * 86_400_000_000)
+
+
+def archivable(todo: Todo, cutoff: int) -> bool:
+    """Whether ``todo`` is done and was last updated before ``cutoff`` (epoch µs)."""
+    if not todo.done:
+        return False
+    updated = todo.updated_us
+    if updated is None:
+        from datetime import UTC, datetime
+
+        # Hand-written timestamps: naive is taken as UTC, anything we
+        # cannot read is never old enough to move
+        try:
+            parsed = datetime.fromisoformat(todo.updated_at)
+        except ValueError:
+            return False
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=UTC)
+        updated = int(parsed.timestamp() * 1_000_000)
+    return updated < cutoff
+
+
+class TodoArchive:
+    """The cold tier of one database.
+
+    Writers must hold the database's exclusive lock (``TodoApp.archive()``
+    does); the archive and its meta file are each replaced atomically, so
+    readers need no lock.
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.path = archive_path_for(db_path)
+        self.meta_path = self.path.with_name(self.path.name + ".meta")
+
+    def compression(self) -> str | None:
+        """Return the compression of the existing archive, or None if there is none."""
+        try:
+            with self.path.open("rb") as f:
+                return _detect_compression(f.read(len(_XZ_MAGIC)))
+        except FileNotFoundError:
+            return None
+
+    def high_water(self) -> int:
+        """Return the highest id ever archived (0 when nothing was)."""
+        return self._read_meta()["high_water"]
+
+    def count(self) -> int:
+        """Return the number of archived todos, without reading the archive."""
+        return self._read_meta()["count"]
+
+    def iter_load(self) -> Iterator[Todo]:
+        """Yield the archived todos in the order they were archived.
+
+        Security: records are limited to _MAX_RECORD_CHARS and validated by
+        ``Todo.from_dict``, like the hot file.
+        """
+        try:
+            raw = self.path.open("rb")
+        except FileNotFoundError:
+            return
+        now = _now_us()
+        with raw, _decompressed(raw) as f:
+            for lineno, line in enumerate(iter(lambda: f.readline(_MAX_RECORD_CHARS + 1), b""), 1):
+                if len(line) > _MAX_RECORD_CHARS:
+                    raise ValueError(
+                        f"Archive record {lineno} in '{self.path}' is too large "
+                        f"(more than {_MAX_RECORD_CHARS:,} bytes)"
+                    )
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    raise ValueError(
+                        f"Invalid archive record {lineno} in '{self.path}': {e}"
+                    ) from e
+                if not isinstance(data, dict):
+                    raise ValueError(
+                        f"Invalid archive record {lineno} in '{self.path}': expected a JSON object"
+                    )
+                yield Todo.from_dict(data, now)
+
+    def append(self, todos: Iterable[Todo], compression: str | None = None) -> int:
+        """Add ``todos`` to the archive; returns the number added.
+
+        ``compression`` defaults to that of the existing archive (``none``
+        for a new one). Asking for a different one re-encodes the archive.
+        """
+        if compression is not None and compression not in ARCHIVE_COMPRESSIONS:
+            raise ValueError(
+                f"Unknown archive compression: {compression!r}. "
+                f"Choose from: {', '.join(ARCHIVE_COMPRESSIONS)}"
+            )
+        todos = list(todos)
+        if not todos:
+            return 0
+
+        current = self.compression()
+        compression = compression or current or "none"
+        if current is None:
+            body = b""
+        elif current == compression:
+            body = self.path.read_bytes()
+        else:
+            body = _compress(_ndjson(self.iter_load()), compression)
+        body += _compress(_ndjson(todos), compression)
+
+        # The meta file goes first: if we crash before the archive is
+        # replaced, a high-water mark that is too high only skips some ids
+        meta = self._read_meta()
+        self._write_meta(
+            max(meta["high_water"], *(todo.id for todo in todos)), meta["count"] + len(todos)
+        )
+        _write_file_atomic(self.path, body)
+        return len(todos)
+
+    def _read_meta(self) -> _Meta:
+        try:
+            raw = self.meta_path.read_bytes()
+        except FileNotFoundError:
+            return {"high_water": 0, "count": 0}
+        try:
+            meta = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid archive meta file '{self.meta_path}': {e}") from e
+        if (
+            not isinstance(meta, dict)
+            or meta.get("format") != _META_MARKER
+            or not isinstance(meta.get("high_water"), int)
+            or not isinstance(meta.get("count"), int)
+        ):
+            raise ValueError(f"Invalid archive meta file '{self.meta_path}'")
+        return {"high_water": meta["high_water"], "count": meta["count"]}
+
+    def _write_meta(self, high_water: int, count: int) -> None:
+        meta = {
+            "format": _META_MARKER,
+            "version": _META_VERSION,
+            "high_water": high_water,
+            "count": count,
+        }
+        _write_file_atomic(self.meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def _detect_compression(head: bytes) -> str:
+    if head.startswith(_GZIP_MAGIC):
+        return "zlib"
+    if head.startswith(_XZ_MAGIC):
+        return "lzma"
+    return "none"
+
+
+def _ndjson(todos: Iterable[Todo]) -> bytes:
+    return b"".join(
+        json.dumps(todo.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        + b"\n"
+        for todo in todos
+    )
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        import gzip
+
+        return gzip.compress(data, mtime=0)
+    if compression == "lzma":
+        compressed: bytes = _lzma().compress(data)
+        return compressed
+    return data
+
+
+def _decompressed(raw: BinaryIO) -> contextlib.AbstractContextManager[_Lines]:
+    compression = _detect_compression(raw.read(len(_XZ_MAGIC)))
+    raw.seek(0)
+    if compression == "zlib":
+        import gzip
+
+        # GzipFile and LZMAFile both read every concatenated member
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if compression == "lzma":
+        stream: contextlib.AbstractContextManager[_Lines] = _lzma().LZMAFile(raw, "rb")
+        return stream
+    return contextlib.nullcontext(raw)
+
+
+def _lzma():
+    try:
+        import lzma
+    except ImportError as e:  # pragma: no cover - Python built without liblzma
+        raise ValueError("lzma compression is not available in this Python build") from e
+    return lzma
@@ -0,0 +1,133 @@
+"""Storage backend selection."""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Iterator
+from pathlib import Path
+from typing import Protocol, TypeGuard, runtime_checkable
+
+from .storage import DEFAULT_DURABILITY, TodoStorage
+from .todo import Todo
+
+BACKENDS = ("json", "oplog", "sqlite", "sharded", "slots")
+
+_SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_SLOTS_SUFFIX = ".slots"
+
+
+class TodoStore(Protocol):
+    """What every storage engine provides: whole-collection loads and saves."""
+
+    path: Path
+
+    def load(self) -> list[Todo]: ...
+
+    def iter_load(self) -> Iterator[Todo]: ...
+
+    def save(self, todos: Collection[Todo]) -> None: ...
+
+    def next_id(self, todos: Collection[Todo]) -> int: ...
+
+
+@runtime_checkable
+class RecordStore(Protocol):
+    """Storage engine that applies single-item operations in place.
+
+    TodoApp routes lookups and mutations to these methods instead of loading
+    the whole collection. Each returns ``None``/``False`` when the id does not
+    exist so the caller can report it uniformly.
+    """
+
+    def get(self, todo_id: int) -> Todo | None: ...
+
+    def insert(self, text: str) -> Todo: ...
+
+    def set_done(self, todo_id: int, done: bool) -> Todo | None: ...
+
+    def delete(self, todo_id: int) -> bool: ...
+
+    def pending(self) -> list[Todo]: ...
+
+
+_RECORD_STORE_METHODS = ("get", "insert", "set_done", "delete", "pending")
+
+
+def is_record_store(storage: object) -> TypeGuard[RecordStore]:
+    """Return ``isinstance(storage, RecordStore)`` without typing's protocol check.
+
+    The runtime protocol check imports ``inspect`` on first use, which would
+    cost more than the rest of a read-only command's startup.
+    """
+    return all(callable(getattr(storage, name, None)) for name in _RECORD_STORE_METHODS)
+
+
+def open_storage(
+    path: str | None = None, backend: str | None = None, durability: str = DEFAULT_DURABILITY
+) -> TodoStore:
+    """Return the storage engine for ``path``.
+
+    When ``backend`` is not given it is detected from the files on disk: a
+    database with an operation log beside it keeps using the log, so a plain
+    JSON run can never silently ignore mutations that only exist in the log,
+    and SQLite and slot databases are recognised by file header (or, for a
+    file that does not exist yet, by suffix). A
+    directory holding a shard manifest is a sharded database; new sharded
+    databases have to be requested with ``backend="sharded"``.
+
+    ``durability`` (one of ``storage.DURABILITY_MODES``) is passed to every
+    engine.
+    """
+    if backend is None:
+        backend = _detect_backend(Path(path or ".todo.json"))
+
+    if backend == "json":
+        return TodoStorage(path, durability=durability)
+    if backend == "oplog":
+        from .oplog import OpLogStorage
+
+        return OpLogStorage(path, durability=durability)
+    if backend == "sqlite":
+        from .sqlite_storage import SqliteStorage
+
+        return SqliteStorage(path, durability=durability)
+    if backend == "sharded":
+        from .sharded import ShardedStorage
+
+        return ShardedStorage(path, durability=durability)
+    if backend == "slots":
+        from .slots import SlotStorage
+
+        return SlotStorage(path, durability=durability)
+    raise ValueError(f"Unknown storage backend: {backend!r}. Choose from: {', '.join(BACKENDS)}")
+
+
+def _detect_backend(path: Path) -> str:
+    from .oplog import log_path_for
+    from .sharded import MANIFEST_NAME
+    from .slots import SLOTS_MAGIC
+
+    if (path / MANIFEST_NAME).is_file():
+        return "sharded"
+    if path.exists():
+        # Existing files are identified by content; a JSON file may well be
+        # called todos.db
+        if _has_magic(path, _SQLITE_MAGIC):
+            return "sqlite"
+        if _has_magic(path, SLOTS_MAGIC):
+            return "slots"
+    elif path.suffix in _SQLITE_SUFFIXES:
+        return "sqlite"
+    elif path.suffix == _SLOTS_SUFFIX:
+        return "slots"
+    if log_path_for(path).exists():
+        return "oplog"
+    return "json"
+
+
+def _has_magic(path: Path, magic: bytes) -> bool:
+    try:
+        with path.open("rb") as f:
+            return f.read(len(magic)) == magic
+    except OSError:
+        return False
@@ -3,23 +3,88 @@
 from __future__ import annotations
 
 import argparse
+import builtins
+import os
 import sys
-
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+from . import profiling
+from .archive import ARCHIVE_COMPRESSIONS, DEFAULT_ARCHIVE_AGE_DAYS, TodoArchive
+from .backends import BACKENDS, TodoStore, is_record_store, open_storage
+from .client import FORWARDED_COMMANDS, forward
+from .collection import TodoCollection
+from .formats import FORMATS
 from .formatter import TodoFormatter, _sanitize_text
-from .storage import TodoStorage
+from .importer import IMPORT_FORMATS
+from .locking import ConflictError
+from .search import SearchIndex, parse_query
+from .storage import DEFAULT_DURABILITY, DURABILITY_MODES, TodoStorage
 from .todo import Todo
+from .transaction import TodoTransaction
 
+# Startup cost matters: shell prompts run `todo list --pending` on every
+# prompt. Modules only some commands need (the server, the importer's
+# readers, the lazy record index, random and time) are imported inside
+# the code paths that use them; see benchmarks/startup.py for the budget.
 
-class TodoApp:
-    """Simple in-process todo application."""
+# Attempts for a single operation that keeps colliding with other writers,
+# and the base of the randomized exponential backoff between them (seconds)
+_CONFLICT_RETRIES = 10
+_CONFLICT_BACKOFF = 0.005
 
-    def __init__(self, db_path: str | None = None) -> None:
-        self.storage = TodoStorage(db_path)
+# Formatted lines `todo list` hands to stdout per write() call
+_OUTPUT_CHUNK_LINES = 512
 
-    def _load(self) -> list[Todo]:
-        return self.storage.load()
+# Up to this many search hits are read by id from the memory-mapped file;
+# more are picked out of one pass over the database
+_LAZY_SEARCH_RESULTS = 1000
 
-    def _save(self, todos: list[Todo]) -> None:
+
+class TodoApp:
+    """Simple in-process todo application.
+
+    ``cache=True`` keeps parsed todos between calls for long-lived library
+    use (see ``TodoStorage``); it only affects the json backend.
+
+    The json and oplog backends have a cold tier (``archive_store``) that
+    ``archive()`` moves old done todos into. Mutations only ever see the hot
+    database; ``iter_todos(archived=True)`` reads both.
+
+    The same backends keep a search index (``search_index``) that
+    ``search()`` creates on first use; every save made through the app
+    after that appends its text changes to it.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        backend: str | None = None,
+        cache: bool = False,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        self.storage: TodoStore = open_storage(db_path, backend, durability)
+        if isinstance(self.storage, TodoStorage):
+            self.storage.cache = cache
+        self.archive_store = (
+            None if is_record_store(self.storage) else TodoArchive(self.storage.path)
+        )
+        self.search_index = None
+        if not is_record_store(self.storage):
+            # The oplog backend keeps half of the database in its log
+            log_path = getattr(self.storage, "log_path", None)
+            sources = [self.storage.path, *([log_path] if log_path is not None else [])]
+            self.search_index = SearchIndex(self.storage.path, sources)
+
+    def _lazy_records(self) -> bool:
+        """Whether single-record reads should go through LazyTodoFile."""
+        return isinstance(self.storage, TodoStorage) and not self.storage.cache
+
+    def _load(self) -> TodoCollection:
+        return TodoCollection(self.storage.load())
+
+    def _save(self, todos: TodoCollection) -> None:
         self.storage.save(todos)
 
     def add(self, text: str) -> Todo:
@@ -27,97 +92,494 @@ class TodoApp:
         if not text:
             raise ValueError("Todo text cannot be empty")
 
-        todos = self._load()
-        todo = Todo(id=self.storage.next_id(todos), text=text)
-        todos.append(todo)
-        self._save(todos)
-        return todo
+        if is_record_store(self.storage):
+            return self.storage.insert(text)
+
+        return self._mutate(lambda tx: tx.add(text))
 
     def list(self, show_all: bool = True) -> list[Todo]:
-        todos = self._load()
+        if not show_all and is_record_store(self.storage):
+            return self.storage.pending()
+
+        todos = self.storage.load()
         if show_all:
             return todos
         return [todo for todo in todos if not todo.done]
 
-    def mark_done(self, todo_id: int) -> Todo:
-        todos = self._load()
+    def iter_todos(self, show_all: bool = True, archived: bool = False) -> Generator[Todo]:
+        """Yield todos as storage decodes them, without building the full list.
+
+        ``archived=True`` continues with the archived todos once the hot ones
+        are exhausted.
+        """
+        if not show_all and is_record_store(self.storage):
+            yield from self.storage.pending()
+            return
+
+        todos = self.storage.iter_load()
+        if not (archived and show_all and self.archive_store is not None):
+            for todo in todos:
+                if show_all or not todo.done:
+                    yield todo
+            return
+
+        seen: set[int] = set()
         for todo in todos:
-            if todo.id == todo_id:
-                todo.mark_done()
-                self._save(todos)
-                return todo
-        raise ValueError(f"Todo #{todo_id} not found")
+            seen.add(todo.id)
+            yield todo
+        for todo in self.archive_store.iter_load():
+            # A todo can be in both tiers after a crash mid-archive; the hot
+            # copy wins
+            if todo.id not in seen:
+                seen.add(todo.id)
+                yield todo
+
+    def get(self, todo_id: int) -> Todo:
+        if is_record_store(self.storage):
+            return _found(todo_id, self.storage.get(todo_id))
+        if self._lazy_records():
+            from .lazy import LazyTodoFile
+
+            with LazyTodoFile(self.storage.path) as records:
+                return _found(todo_id, records.get(todo_id))
+        return _found(todo_id, self._load().get(todo_id))
+
+    def mark_done(self, todo_id: int) -> Todo:
+        if is_record_store(self.storage):
+            return _found(todo_id, self.storage.set_done(todo_id, True))
+
+        return self._mutate(lambda tx: tx.mark_done(todo_id))
 
     def mark_undone(self, todo_id: int) -> Todo:
-        todos = self._load()
-        for todo in todos:
-            if todo.id == todo_id:
-                todo.mark_undone()
-                self._save(todos)
-                return todo
-        raise ValueError(f"Todo #{todo_id} not found")
+        if is_record_store(self.storage):
+            return _found(todo_id, self.storage.set_done(todo_id, False))
+
+        return self._mutate(lambda tx: tx.mark_undone(todo_id))
 
     def remove(self, todo_id: int) -> None:
-        todos = self._load()
-        for i, todo in enumerate(todos):
-            if todo.id == todo_id:
-                todos.pop(i)
-                self._save(todos)
-                return
+        if is_record_store(self.storage):
+            if not self.storage.delete(todo_id):
+                raise ValueError(f"Todo #{todo_id} not found")
+            return
+
+        self._mutate(lambda tx: tx.remove(todo_id))
+
+    def rename(self, todo_id: int, text: str) -> Todo:
+        return self._mutate(lambda tx: tx.rename(todo_id, text))
+
+    def _mutate[T](self, apply: Callable[[TodoTransaction], T]) -> T:
+        """Apply one operation to freshly loaded todos and save, retrying on conflict.
+
+        When another process saves between our load and save, ``save()``
+        raises ConflictError; the operation is then re-applied to the new
+        state (so e.g. an added todo gets the next id that is actually free)
+        after a short randomized backoff.
+        """
+        attempt = 0
+        while True:
+            tx = TodoTransaction(self.storage, self._load(), self._id_floor())
+            with profiling.phase("mutate"):
+                result = apply(tx)
+            try:
+                if tx.changed:
+                    self._commit(tx)
+                return result
+            except ConflictError:
+                attempt += 1
+                if attempt == _CONFLICT_RETRIES:
+                    raise
+                import random
+                import time
+
+                time.sleep(random.uniform(0, min(_CONFLICT_BACKOFF * 2**attempt, 0.1)))
+
+    @contextmanager
+    def transaction(self) -> Iterator[TodoTransaction]:
+        """Load once, apply many operations in memory and save once.
+
+        Commits with a single atomic ``save()`` when the block exits normally;
+        any exception discards every change made inside the block. Other
+        writers wait for the block to finish.
+        """
+        # A block cannot be replayed on conflict, so it holds the exclusive
+        # lock instead (for backends that have one) from load to save
+        lock = getattr(self.storage, "lock", None)
+        with lock() if lock is not None else nullcontext():
+            tx = TodoTransaction(self.storage, self._load(), self._id_floor())
+            with profiling.phase("mutate"):
+                yield tx
+            if tx.changed:
+                self._commit(tx)
+
+    def _commit(self, tx: TodoTransaction) -> None:
+        """Save ``tx`` and log its text changes to an existing search index."""
+        index = self.search_index
+        if index is None or not index.exists():
+            self._save(tx.todos)
+            return
+        # Under the lock, so the stamps before and after are of our save alone
+        lock = getattr(self.storage, "lock", None)
+        with lock() if lock is not None else nullcontext():
+            base = index.stamp()
+            self._save(tx.todos)
+            index.record(base, tx.edits)
+
+    def _id_floor(self) -> int:
+        return self.archive_store.high_water() if self.archive_store is not None else 0
+
+    def archive(
+        self, older_than_days: float = DEFAULT_ARCHIVE_AGE_DAYS, compression: str | None = None
+    ) -> int:
+        """Move done todos not updated for ``older_than_days`` to the archive.
+
+        Returns the number moved. The archive is written before the hot
+        database drops them, so a crash in between can only leave a todo in
+        both tiers, never in neither.
+        """
+        if self.archive_store is None:
+            raise ValueError("Archiving is only supported by the json and oplog backends")
+        if older_than_days < 0:
+            raise ValueError(f"Archive age cannot be negative, got {older_than_days}")
+        from .archive import archivable, archive_cutoff
+
+        cutoff = archive_cutoff(older_than_days)
+        with self.transaction() as tx:
+            old = [todo for todo in tx.todos if archivable(todo, cutoff)]
+            self.archive_store.append(old, compression)
+            for todo in old:
+                tx.remove(todo.id)
+        return len(old)
+
+    def search(self, terms: builtins.list[str]) -> builtins.list[Todo]:
+        """Return the todos matching query ``terms`` (see ``search.parse_query``)."""
+        if self.search_index is None:
+            raise ValueError("Search is only supported by the json and oplog backends")
+        ids = self.search_index.search(parse_query(terms), self.storage.iter_load)
+        if not ids:
+            return []
+        if self._lazy_records() and len(ids) < _LAZY_SEARCH_RESULTS:
+            from .lazy import LazyTodoFile
+
+            with LazyTodoFile(self.storage.path) as records:
+                found = [records.get(todo_id) for todo_id in ids]
+            return [todo for todo in found if todo is not None]
+        wanted = set(ids)
+        return [todo for todo in self.storage.iter_load() if todo.id in wanted]
+
+    def stats(self) -> dict:
+        """Return todo counts, plus the storage's I/O metrics when it keeps them."""
+        counts = getattr(self.storage, "counts", None)
+        if counts is not None:
+            total, done = counts()
+        else:
+            total = done = 0
+            for todo in self.iter_todos():
+                total += 1
+                done += todo.done
+        metrics = getattr(self.storage, "metrics", None)
+        return {
+            "total": total,
+            "pending": total - done,
+            "done": done,
+            "storage": None if metrics is None else metrics.as_dict(),
+        }
+
+    def import_records(
+        self, records: Iterator[tuple[int, dict]], progress: Callable[[int], None] | None = None
+    ) -> int:
+        """Add every record in one transaction; returns the number imported."""
+        from .importer import import_records
+
+        with self.transaction() as tx:
+            return import_records(tx, records, progress)
+
+    def migrate(self, format: str) -> int:
+        """Rewrite the database in ``format``; returns the number of todos."""
+        if not isinstance(self.storage, TodoStorage):
+            raise ValueError("Format migration is only supported by the json backend")
+        return self.storage.migrate(format)
+
+
+def _found(todo_id: int, todo: Todo | None) -> Todo:
+    if todo is None:
         raise ValueError(f"Todo #{todo_id} not found")
+    return todo
+
+
+def _count(value: str) -> int:
+    """Parse a non-negative count for --limit/--offset."""
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid count: {value!r}") from None
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"invalid count: {value!r} (must not be negative)")
+    return count
+
+
+def _write_lines(lines: Iterable[str], flush: bool = False) -> None:
+    """Write ``lines`` to stdout, _OUTPUT_CHUNK_LINES per write() call.
+
+    Lines are pulled from ``lines`` only as chunks are written, so output
+    starts before a long list is fully read, and the rows read before an
+    error are still written. ``flush`` writes and flushes every line on its
+    own for readers that want each row immediately.
+    """
+    out = sys.stdout
+    size = 1 if flush else _OUTPUT_CHUNK_LINES
+    chunk: list[str] = []
+    try:
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= size:
+                out.write("\n".join(chunk) + "\n")
+                chunk.clear()
+                if flush:
+                    out.flush()
+    finally:
+        if chunk:
+            out.write("\n".join(chunk) + "\n")
+
+
+def _discard_stdout() -> None:
+    """Point stdout at /dev/null after the reader closed the pipe.
+
+    Otherwise flushing what is still buffered at exit raises BrokenPipeError
+    again and Python prints a traceback-like warning.
+    """
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        return  # not a real file (captured output): nothing will flush
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fd)
+    os.close(devnull)
+
+
+def _id_target(value: str) -> tuple[int, int]:
+    """Parse an id ("7") or inclusive id range ("1-50") as (start, end)."""
+    start, sep, end = value.partition("-")
+    try:
+        first = int(start)
+        last = int(end) if sep else first
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid id or range: {value!r}") from None
+    if first > last:
+        raise argparse.ArgumentTypeError(f"invalid range: {value!r} (start is after end)")
+    return first, last
+
+
+def _target_ids(tx: TodoTransaction, targets: list[tuple[int, int]]) -> list[int]:
+    """Expand targets; explicit ids must exist, ranges match the existing ids."""
+    ids: list[int] = []
+    for start, end in targets:
+        ids.extend([start] if start == end else tx.ids_between(start, end))
+    return list(dict.fromkeys(ids))
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="todo", description="Minimal Todo CLI")
-    parser.add_argument("--db", default=".todo.json", help="Path to JSON database")
+    parser.add_argument(
+        "--db",
+        default=".todo.json",
+        help="Path to database file (a directory for the sharded backend)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=None,
+        help="Storage engine (default: detected from the files beside --db)",
+    )
+    parser.add_argument(
+        "--durability",
+        choices=DURABILITY_MODES,
+        default=DEFAULT_DURABILITY,
+        help="fsync policy: fast (none), durable (every save) or group (batched)"
+        f" (default: {DEFAULT_DURABILITY})",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent in each phase to stderr (or set FLYWHEEL_PROFILE=1)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        default=None,
+        help="Also write cProfile statistics to FILE, for reading with pstats",
+    )
 
     sub = parser.add_subparsers(dest="command", required=True)
 
-    p_add = sub.add_parser("add", help="Add a todo")
-    p_add.add_argument("text", help="Todo text")
+    p_add = sub.add_parser("add", help="Add one or more todos")
+    p_add.add_argument("text", nargs="+", help="Todo text (one todo per argument)")
 
     p_list = sub.add_parser("list", help="List todos")
-    p_list.add_argument("--pending", action="store_true", help="Show only pending todos")
-
-    p_done = sub.add_parser("done", help="Mark todo done")
-    p_done.add_argument("id", type=int)
-
-    p_undone = sub.add_parser("undone", help="Mark todo undone")
-    p_undone.add_argument("id", type=int)
-
-    p_rm = sub.add_parser("rm", help="Remove todo")
-    p_rm.add_argument("id", type=int)
+    list_filter = p_list.add_mutually_exclusive_group()
+    list_filter.add_argument("--pending", action="store_true", help="Show only pending todos")
+    list_filter.add_argument(
+        "--all", action="store_true", help="Include todos moved to the archive"
+    )
+    p_list.add_argument(
+        "--limit", type=_count, default=None, metavar="N", help="Show at most N todos"
+    )
+    p_list.add_argument(
+        "--offset", type=_count, default=0, metavar="N", help="Skip the first N todos"
+    )
+    p_list.add_argument(
+        "--stream", action="store_true", help="Write each todo as soon as it is read"
+    )
+
+    p_search = sub.add_parser("search", help="Find todos by the words in their text")
+    p_search.add_argument(
+        "terms",
+        nargs="+",
+        metavar="TERM",
+        help='Words that must all match; OR separates alternatives, "word*" matches a prefix',
+    )
+
+    p_stats = sub.add_parser("stats", help="Show todo counts and storage I/O metrics")
+    p_stats.add_argument("--json", action="store_true", help="Print the numbers as JSON")
+
+    p_show = sub.add_parser("show", help="Show one todo")
+    p_show.add_argument("id", type=int)
+
+    p_done = sub.add_parser("done", help="Mark todos done")
+    p_done.add_argument(
+        "ids", nargs="+", type=_id_target, metavar="ID", help="Id or range like 1-50"
+    )
+
+    p_undone = sub.add_parser("undone", help="Mark todos undone")
+    p_undone.add_argument(
+        "ids", nargs="+", type=_id_target, metavar="ID", help="Id or range like 1-50"
+    )
+
+    p_rm = sub.add_parser("rm", help="Remove todos")
+    p_rm.add_argument("ids", nargs="+", type=_id_target, metavar="ID", help="Id or range like 1-50")
+
+    p_rename = sub.add_parser("rename", help="Change a todo's text")
+    p_rename.add_argument("id", type=int)
+    p_rename.add_argument("text", help="New todo text")
+
+    p_archive = sub.add_parser("archive", help="Move old completed todos to the archive")
+    p_archive.add_argument(
+        "--older-than",
+        type=float,
+        default=DEFAULT_ARCHIVE_AGE_DAYS,
+        metavar="DAYS",
+        help=f"Archive done todos not updated for DAYS days (default: {DEFAULT_ARCHIVE_AGE_DAYS:g})",
+    )
+    p_archive.add_argument(
+        "--compress",
+        choices=ARCHIVE_COMPRESSIONS,
+        default=None,
+        help="Archive compression (default: keep the archive's current one, none for a new one)",
+    )
+
+    p_import = sub.add_parser("import", help="Add todos in bulk from a file or stdin")
+    p_import.add_argument("file", nargs="?", default="-", help="Input file (default: stdin)")
+    p_import.add_argument(
+        "--format",
+        choices=IMPORT_FORMATS,
+        default=None,
+        help="Input format (default: from the file suffix, plain lines for stdin)",
+    )
+
+    p_serve = sub.add_parser("serve", help="Keep the database in memory and serve CLI commands")
+    p_serve.add_argument(
+        "--group-window",
+        type=float,
+        default=2.0,
+        metavar="MS",
+        help="Milliseconds to wait for more writes before committing (default: 2)",
+    )
+
+    p_migrate = sub.add_parser("migrate", help="Convert the database to another file format")
+    p_migrate.add_argument("--format", required=True, choices=FORMATS, help="Target format")
 
     return parser
 
 
-def run_command(args: argparse.Namespace) -> int:
-    app = TodoApp(db_path=args.db)
-
+def run_command(args: argparse.Namespace, app: TodoApp | None = None) -> int:
     try:
+        if app is None:
+            if args.command in FORWARDED_COMMANDS and args.backend in (None, "json"):
+                # A running `todo serve` already holds the parsed database
+                status = forward(args)
+                if status is not None:
+                    return status
+            if args.command == "serve":
+                from .server import serve
+
+                return serve(args.db, args.group_window / 1000, args.durability)
+            app = TodoApp(db_path=args.db, backend=args.backend, durability=args.durability)
+
         if args.command == "add":
-            todo = app.add(args.text)
-            print(f"Added #{todo.id}: {_sanitize_text(todo.text)}")
+            if len(args.text) == 1:
+                todos = [app.add(args.text[0])]
+            else:
+                with app.transaction() as tx:
+                    todos = [tx.add(text) for text in args.text]
+            for todo in todos:
+                print(f"Added #{todo.id}: {_sanitize_text(todo.text)}")
             return 0
 
         if args.command == "list":
-            todos = app.list(show_all=not args.pending)
-            print(TodoFormatter.format_list(todos))
+            stream = app.iter_todos(show_all=not args.pending, archived=args.all)
+            stop = None if args.limit is None else args.offset + args.limit
+            page = islice(stream, args.offset, stop)
+            try:
+                with profiling.phase("format"):
+                    _write_lines(TodoFormatter.iter_lines(page), flush=args.stream)
+            except BrokenPipeError:
+                # The reader (`todo list | head`) has seen enough
+                _discard_stdout()
+            finally:
+                # Stop decoding the database early when the page is full
+                stream.close()
+            return 0
+
+        if args.command == "search":
+            todos = app.search(args.terms)
+            with profiling.phase("format"):
+                if not todos:
+                    print("No matching todos.")
+                for todo in todos:
+                    print(TodoFormatter.format_todo(todo))
+            return 0
+
+        if args.command == "stats":
+            _print_stats(app.stats(), args.json)
+            return 0
+
+        if args.command == "show":
+            todo = app.get(args.id)
+            with profiling.phase("format"):
+                print(TodoFormatter.format_todo(todo))
             return 0
 
-        if args.command == "done":
-            todo = app.mark_done(args.id)
-            print(f"Done #{todo.id}: {_sanitize_text(todo.text)}")
+        if args.command in ("done", "undone", "rm"):
+            _run_batch(app, args.command, args.ids)
             return 0
 
-        if args.command == "undone":
-            todo = app.mark_undone(args.id)
-            print(f"Undone #{todo.id}: {_sanitize_text(todo.text)}")
+        if args.command == "rename":
+            todo = app.rename(args.id, args.text)
+            print(f"Renamed #{todo.id}: {_sanitize_text(todo.text)}")
             return 0
 
-        if args.command == "rm":
-            app.remove(args.id)
-            print(f"Removed #{args.id}")
+        if args.command == "archive":
+            count = app.archive(args.older_than, args.compress)
+            print(f"Archived {count} todos")
+            return 0
+
+        if args.command == "import":
+            count = _run_import(app, args.file, args.format)
+            print(f"Imported {count} todos")
+            return 0
+
+        if args.command == "migrate":
+            count = app.migrate(args.format)
+            print(f"Migrated {count} todos to {args.format} format")
             return 0
 
         raise ValueError(f"Unsupported command: {args.command}")
@@ -126,10 +588,116 @@ def run_command(args: argparse.Namespace) -> int:
         return 1
 
 
+def _run_batch(app: TodoApp, command: str, targets: list[tuple[int, int]]) -> None:
+    """Apply done/undone/rm to every target, committing them all at once."""
+    if len(targets) == 1 and targets[0][0] == targets[0][1]:
+        # A single id keeps the per-record fast paths of each backend
+        todo_id = targets[0][0]
+        if command == "rm":
+            app.remove(todo_id)
+            print(f"Removed #{todo_id}")
+            return
+        todo = app.mark_done(todo_id) if command == "done" else app.mark_undone(todo_id)
+        print(f"{command.capitalize()} #{todo.id}: {_sanitize_text(todo.text)}")
+        return
+
+    with app.transaction() as tx:
+        ids = _target_ids(tx, targets)
+        if command == "rm":
+            for todo_id in ids:
+                tx.remove(todo_id)
+        else:
+            apply = tx.mark_done if command == "done" else tx.mark_undone
+            todos = [apply(todo_id) for todo_id in ids]
+
+    # Report only after the batch was committed
+    if command == "rm":
+        for todo_id in ids:
+            print(f"Removed #{todo_id}")
+    else:
+        for todo in todos:
+            print(f"{command.capitalize()} #{todo.id}: {_sanitize_text(todo.text)}")
+
+
+def _print_stats(stats: dict, as_json: bool) -> None:
+    if as_json:
+        import json
+
+        print(json.dumps(stats, sort_keys=True))
+        return
+    print(f"Todos: {stats['total']:,} ({stats['pending']:,} pending, {stats['done']:,} done)")
+    metrics = stats["storage"]
+    if metrics is None:
+        return
+    print(
+        f"Read: {metrics['bytes_read']:,} bytes, {metrics['records_read']:,} records"
+        f" ({metrics['loads']:,} loads, parse {metrics['parse_ns'] / 1e6:.1f} ms)"
+    )
+    print(
+        f"Written: {metrics['bytes_written']:,} bytes, {metrics['records_written']:,} records"
+        f" ({metrics['saves']:,} saves, encode {metrics['encode_ns'] / 1e6:.1f} ms)"
+    )
+
+
+def _run_import(app: TodoApp, file: str, format: str | None) -> int:
+    from .importer import detect_import_format, iter_records
+
+    format = format or detect_import_format(file)
+    progress = _print_progress if sys.stderr.isatty() else None
+    try:
+        if file == "-":
+            return app.import_records(iter_records(sys.stdin, format), progress)
+        with open(file, encoding="utf-8", newline="") as stream:
+            return app.import_records(iter_records(stream, format), progress)
+    finally:
+        if progress is not None:
+            print(file=sys.stderr)
+
+
+def _print_progress(count: int) -> None:
+    print(f"\rImported {count:,} todos...", end="", file=sys.stderr, flush=True)
+
+
 def main(argv: list[str] | None = None) -> int:
-    parser = build_parser()
-    args = parser.parse_args(argv)
-    return run_command(args)
+    argv = sys.argv[1:] if argv is None else argv
+    # Started before parsing when we can tell, so that parsing is timed too
+    timer = profiling.start() if _profile_requested(argv) else None
+    try:
+        with profiling.phase("parse"):
+            args = build_parser().parse_args(argv)
+        if timer is None and not (args.profile or args.profile_dump):
+            return run_command(args)
+        timer = timer or profiling.start()
+        return _run_profiled(args, timer)
+    finally:
+        if timer is not None:
+            profiling.stop()
+
+
+def _profile_requested(argv: list[str]) -> bool:
+    if os.environ.get("FLYWHEEL_PROFILE", "") not in ("", "0"):
+        return True
+    return any(arg == "--profile" or arg.startswith("--profile-dump") for arg in argv)
+
+
+def _run_profiled(args: argparse.Namespace, timer: profiling.PhaseTimer) -> int:
+    """Run ``args`` and report its phases to stderr (and cProfile stats to a file)."""
+    profiler = None
+    if args.profile_dump:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return run_command(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            try:
+                profiler.dump_stats(args.profile_dump)
+            except OSError as exc:
+                print(f"Error: cannot write profile to {args.profile_dump}: {exc}", file=sys.stderr)
+        timer.report(sys.stderr, f"todo {args.command}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""CLI side of the ``todo serve`` protocol.
+
+Kept apart from ``flywheel.server`` so that a command run while no server is
+up costs one ``stat`` of ``<db>.sock``, without importing the socket and
+threading machinery the server needs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+# Commands a running server executes on behalf of the CLI. import and migrate
+# read client-side files or rewrite the database and always run locally.
+FORWARDED_COMMANDS = frozenset({"add", "list", "show", "stats", "done", "undone", "rm", "rename"})
+
+# Seconds the client waits for a response before giving up
+_CLIENT_TIMEOUT = 60.0
+
+
+def socket_path_for(path: str | Path | None) -> Path:
+    """Return the socket a server for database ``path`` listens on."""
+    path = Path(path or ".todo.json")
+    return path.with_name(path.name + ".sock")
+
+
+def forward(args: argparse.Namespace) -> int | None:
+    """Run ``args`` on a server for its database, or None if none is running.
+
+    The response's output is written to this process's stdout/stderr.
+    """
+    sock = _connect(socket_path_for(args.db))
+    if sock is None:
+        return None
+
+    request = {key: value for key, value in vars(args).items() if key != "backend"}
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ValueError("Todo server closed the connection without a response")
+
+    response = json.loads(line)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return int(response["status"])
+
+
+def _connect(socket_path: Path):
+    """Return a socket connected to ``socket_path``, or None if nobody listens.
+
+    Security: only a server run by this user is used. Anyone else's socket
+    (say in a shared directory) would see the commands sent to it and could
+    write anything to the terminal, so it is ignored and the command runs
+    locally.
+    """
+    try:
+        st = os.lstat(socket_path)
+    except OSError:
+        return None
+    if not _private_socket(st):
+        return None
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(_CLIENT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        # No listener (stale socket) or unreachable: run locally instead
+        sock.close()
+        return None
+    if _peer_uid(sock) not in (None, os.getuid()):
+        # The socket was swapped for someone else's after the lstat()
+        sock.close()
+        return None
+    return sock
+
+
+def _private_socket(st: os.stat_result) -> bool:
+    """Whether ``st`` is a socket of this user that nobody else can write to."""
+    if not hasattr(os, "getuid"):
+        return False  # no ownership to check against (Windows)
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _peer_uid(sock) -> int | None:
+    """The uid of the process on the other end, where the platform reports it."""
+    import socket
+
+    option = getattr(socket, "SO_PEERCRED", None)
+    if option is None:
+        return None
+    import struct
+
+    credentials = sock.getsockopt(socket.SOL_SOCKET, option, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    return int(uid)
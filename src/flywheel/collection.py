@@ -0,0 +1,72 @@
+"""Id-indexed todo collection."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from .todo import Todo
+
+
+class TodoCollection:
+    """Ordered set of todos keyed by id.
+
+    Iterates in insertion order like the list it replaces, while lookup,
+    removal and ``next_id()`` are O(1). The highest id is tracked as todos
+    are appended; removing the current maximum marks it unknown and the next
+    ``next_id()`` call recomputes it once, so ids keep the existing
+    ``max(id) + 1`` semantics.
+
+    A database with repeated ids (only possible by editing the file) loads
+    with the first todo of each id, as ``LazyTodoFile`` reads it; the later
+    copies are dropped by the next save.
+    """
+
+    __slots__ = ("_items", "_max_id")
+
+    def __init__(self, todos: Iterable[Todo] = ()) -> None:
+        self._items: dict[int, Todo] = {}
+        # None means "not known yet"; computed lazily by next_id()
+        self._max_id: int | None = None
+        for todo in todos:
+            if todo.id not in self._items:
+                self.append(todo)
+
+    def __iter__(self) -> Iterator[Todo]:
+        return iter(self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, todo: object) -> bool:
+        return isinstance(todo, Todo) and self._items.get(todo.id) == todo
+
+    def __repr__(self) -> str:
+        return f"TodoCollection({list(self._items.values())!r})"
+
+    def get(self, todo_id: int) -> Todo | None:
+        return self._items.get(todo_id)
+
+    def append(self, todo: Todo) -> None:
+        """Add ``todo`` at the end; ids must be unique within the collection."""
+        if todo.id in self._items:
+            raise ValueError(f"Duplicate todo id #{todo.id} in storage")
+        self._items[todo.id] = todo
+        if self._max_id is not None and todo.id > self._max_id:
+            self._max_id = todo.id
+
+    def pop(self, todo_id: int) -> Todo | None:
+        """Remove and return the todo with ``todo_id``, or None if absent."""
+        todo = self._items.pop(todo_id, None)
+        if todo is not None and todo_id == self._max_id:
+            self._max_id = None
+        return todo
+
+    def next_id(self) -> int:
+        if not self._items:
+            return 1
+        if self._max_id is None:
+            self._max_id = max(self._items)
+        return self._max_id + 1
+
+    def to_list(self) -> list[Todo]:
+        return list(self._items.values())
@@ -0,0 +1,541 @@
+"""On-disk encodings for todo databases.
+
+Three formats are supported and detected automatically when reading:
+
+- ``pretty``: a bare JSON array indented by two spaces. This is the original,
+  human-editable layout and carries no header.
+- ``compact``: a JSON object envelope without whitespace. Its header keys
+  (``format`` and ``version``) come before the ``todos`` array.
+- ``binary``: a fixed header (magic, version, record count) followed by packed
+  ``struct`` records with length-prefixed UTF-8 strings.
+
+Since version 2, compact and binary files also carry a CRC-32 of their
+records (see ``read_trusted``), and since version 4 the number of todos and
+of done todos in their header (see ``read_counts``), which the checksum
+covers since version 5. Pretty files stay
+plain, hand-editable lists and are always validated record by record.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+import struct
+import zlib
+from collections.abc import Buffer, Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from .todo import Todo
+
+FORMATS = ("pretty", "compact", "binary")
+DEFAULT_FORMAT = "pretty"
+
+# Layout version written into compact and binary headers; version 2 added
+# the records checksum, version 3 epoch-microsecond timestamps, version 4
+# the todo counts, version 5 extended the checksum over the counts
+FORMAT_VERSION = 5
+
+# DoS limits, enforced while streaming instead of on total file size:
+# the largest single encoded todo record (1M characters) ...
+_MAX_RECORD_CHARS = 1024 * 1024
+# ... and the largest number of todos in one database
+_MAX_TODO_COUNT = 2_000_000
+
+# Characters read from disk per refill of the streaming decoder (64KB)
+_READ_CHUNK_CHARS = 64 * 1024
+# Longest token cut off by the end of a chunk that the decoder reports as an
+# error at its start: a surrogate pair escape (\ud83d\ude00) or -Infinity
+_PARTIAL_TOKEN_CHARS = 12
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+_ENVELOPE_MARKER = "flywheel-todo"
+
+_BINARY_MAGIC = b"FLYWTODO"
+# magic, version, reserved flags, record count
+_BINARY_HEADER = struct.Struct("<8sHHQ")
+# Since version 4: number of done records, right after the header
+_BINARY_DONE_COUNT = struct.Struct("<Q")
+# Where the checksummed bytes start: the record count, then the done count
+# and the records (version 5 and later)
+_BINARY_CHECKSUM_START = _BINARY_HEADER.size - struct.calcsize("<Q")
+# id, flags, byte length of text, created_at, updated_at. Timestamps are
+# epoch microseconds, or the byte length of a string stored after the text
+# when their _TEXT flag is set (values Todo cannot express as microseconds).
+_BINARY_RECORD = struct.Struct("<qBIqq")
+_BINARY_DONE = 1
+_BINARY_CREATED_TEXT = 2
+_BINARY_UPDATED_TEXT = 4
+# Versions 1 and 2: id, done, byte lengths of text / created_at / updated_at
+_BINARY_RECORD_V2 = struct.Struct("<qBIII")
+# (id, flags, text length, created, updated) as unpacked from a record header
+type _RecordHeader = tuple[int, int, int, int, int]
+# Header flag: a CRC-32 of the counts and records follows the last record
+_BINARY_FLAG_CHECKSUM = 1
+_BINARY_CHECKSUM = struct.Struct("<I")
+
+# Start of a compact file written with a checksum, up to the todos array
+_COMPACT_CHECKSUM_PREFIX = b'{"format":"%s","version":%d,"checksum":' % (
+    _ENVELOPE_MARKER.encode(),
+    FORMAT_VERSION,
+)
+# What follows the checksum (version 4 and later)
+_COMPACT_COUNTS = re.compile(rb'\d+,"count":(\d+),"done":(\d+),"todos":')
+
+
+def detect_format(head: bytes) -> str:
+    """Return the format of a database whose first bytes are ``head``."""
+    if head.startswith(_BINARY_MAGIC):
+        return "binary"
+    if head.lstrip(_WHITESPACE.encode()).startswith(b"{"):
+        return "compact"
+    return "pretty"
+
+
+def encode(todos: Iterable[Todo], format: str) -> bytes:
+    """Serialize ``todos`` in ``format``."""
+    if format == "binary":
+        return _encode_binary(todos)
+
+    if format == "compact":
+        # Same bytes json.dumps() of the whole envelope would give, with the
+        # CRC-32 of everything after it (the counts and the todos array)
+        # spliced in first
+        payload = [todo.to_record() for todo in todos]
+        done = sum(1 for record in payload if record["done"])
+        array = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        body = b'"count":%d,"done":%d,"todos":%s' % (len(payload), done, array)
+        return b"%s%d,%s}" % (_COMPACT_CHECKSUM_PREFIX, zlib.crc32(body), body)
+    if format == "pretty":
+        payload = [todo.to_dict() for todo in todos]
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    raise ValueError(f"Unknown storage format: {format!r}. Choose from: {', '.join(FORMATS)}")
+
+
+def read_records(f: BinaryIO, path: Path) -> tuple[str, Iterator[object]]:
+    """Detect the format of open file ``f`` and stream its raw records.
+
+    JSON records are yielded as decoded values (callers validate them);
+    binary records are yielded as dicts in ``Todo.to_record()`` shape.
+    """
+    head = f.read(len(_BINARY_MAGIC))
+    f.seek(0)
+    format = detect_format(head)
+    if format == "binary":
+        return format, _iter_binary(f, path)
+    return format, _iter_json(f, path)
+
+
+def _iter_json(f: BinaryIO, path: Path) -> Iterator[object]:
+    text = io.TextIOWrapper(f, encoding="utf-8")
+    try:
+        yield from _JsonArrayReader(text, path)
+    finally:
+        # Hand ``f`` back open: the caller owns it (and reads its position)
+        if not f.closed:
+            text.detach()
+
+
+def read_trusted(data: bytes, fd: int | None = None) -> tuple[str, list[Todo]] | None:
+    """Decode ``data`` without per-record validation if it is provably ours.
+
+    That is the case when the file is compact or binary, carries a records
+    checksum that matches, and (when the open file ``fd`` is given) is owned
+    by this user and not writable by anyone else. Returns None for anything
+    else, and for any record that fails to decode, so that the caller falls
+    back to the validating loader. A CRC is no signature: the ownership
+    check is what keeps a file another user could have crafted out of here.
+    """
+    if fd is not None and not _private(fd):
+        return None
+    try:
+        if data.startswith(_COMPACT_CHECKSUM_PREFIX):
+            todos = _trusted_compact(data)
+            format = "compact"
+        elif data.startswith(_BINARY_MAGIC):
+            todos = _trusted_binary(data)
+            format = "binary"
+        else:
+            return None
+    except (KeyError, TypeError, ValueError, UnicodeDecodeError, struct.error):
+        return None
+    if todos is None or len(todos) > _MAX_TODO_COUNT:
+        return None
+    return format, todos
+
+
+def read_counts(data: bytes, fd: int | None = None) -> tuple[int, int] | None:
+    """Return (todos, done todos) from the header of database contents ``data``.
+
+    Only compact and binary files of version 4 and later carry the counts,
+    and they are believed only from version 5 on, where the checksum covers
+    them as well as the records: on the same terms as ``read_trusted``
+    decodes records, that is when the checksum matches and the open file
+    ``fd`` (when given) is private to this user. None means the records have
+    to be counted.
+    """
+    if fd is not None and not _private(fd):
+        return None
+    try:
+        if data.startswith(_COMPACT_CHECKSUM_PREFIX):
+            compact = _verified_compact(data)
+            if compact is None:
+                return None
+            counts, _array = compact
+            return int(counts.group(1)), int(counts.group(2))
+        if data.startswith(_BINARY_MAGIC):
+            binary = _verified_binary(data)
+            if binary is None:
+                return None
+            count, _body = binary
+            (done,) = _BINARY_DONE_COUNT.unpack_from(data, _BINARY_HEADER.size)
+            return count, done
+    except (ValueError, struct.error):
+        return None
+    return None
+
+
+def binary_records_offset(version: int) -> int:
+    """Return where the first record of a binary file of ``version`` starts."""
+    return _BINARY_HEADER.size + (_BINARY_DONE_COUNT.size if version >= 4 else 0)
+
+
+def _private(fd: int) -> bool:
+    if not hasattr(os, "getuid"):
+        return False  # no ownership to check against (Windows)
+    st = os.fstat(fd)
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _verified_compact(data: bytes) -> tuple[re.Match[bytes], memoryview] | None:
+    """Return the counts match and records of a compact file whose checksum matches."""
+    comma = data.index(b",", len(_COMPACT_CHECKSUM_PREFIX))
+    checksum = int(data[len(_COMPACT_CHECKSUM_PREFIX) : comma])
+    counts = _COMPACT_COUNTS.match(data, len(_COMPACT_CHECKSUM_PREFIX))
+    if counts is None or not data.endswith(b"}"):
+        return None
+    if zlib.crc32(memoryview(data)[comma + 1 : -1]) != checksum:
+        return None
+    return counts, memoryview(data)[counts.end() : -1]
+
+
+def _trusted_compact(data: bytes) -> list[Todo] | None:
+    compact = _verified_compact(data)
+    if compact is None:
+        return None
+    _counts, array = compact
+    return [
+        Todo(d["id"], d["text"], d["done"], d["created_at"], d["updated_at"])
+        for d in json.loads(bytes(array))
+    ]
+
+
+def _verified_binary(data: bytes) -> tuple[int, memoryview] | None:
+    """Return the record count and records of a binary file whose checksum matches."""
+    _magic, version, flags, count = _BINARY_HEADER.unpack_from(data, 0)
+    if version != FORMAT_VERSION or not flags & _BINARY_FLAG_CHECKSUM:
+        return None
+    end = len(data) - _BINARY_CHECKSUM.size
+    (checksum,) = _BINARY_CHECKSUM.unpack_from(data, end)
+    if zlib.crc32(memoryview(data)[_BINARY_CHECKSUM_START:end]) != checksum:
+        return None
+    return count, memoryview(data)[binary_records_offset(version) : end]
+
+
+def _trusted_binary(data: bytes) -> list[Todo] | None:
+    binary = _verified_binary(data)
+    if binary is None:
+        return None
+    count, body = binary
+    todos = []
+    unpack, size, offset = _BINARY_RECORD.unpack_from, _BINARY_RECORD.size, 0
+    for _ in range(count):
+        todo_id, flags, text_len, created, updated = unpack(body, offset)
+        offset += size
+        text = str(body[offset : offset + text_len], "utf-8")
+        offset += text_len
+        if flags & _BINARY_CREATED_TEXT:
+            created, offset = str(body[offset : offset + created], "utf-8"), offset + created
+        if flags & _BINARY_UPDATED_TEXT:
+            updated, offset = str(body[offset : offset + updated], "utf-8"), offset + updated
+        todos.append(Todo(todo_id, text, bool(flags & _BINARY_DONE), created, updated))
+    return todos if offset == len(body) else None
+
+
+def _check_version(version: object, path: Path) -> None:
+    if not isinstance(version, int) or isinstance(version, bool) or version > FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported todo file version {version!r} in '{path}' "
+            f"(this flywheel reads up to version {FORMAT_VERSION})."
+        )
+
+
+def _encode_binary(todos: Iterable[Todo]) -> bytes:
+    chunks: list[bytes] = []
+    count = done = 0
+    for todo in todos:
+        text = todo.text.encode("utf-8")
+        flags = _BINARY_DONE if todo.done else 0
+        done += todo.done
+        strings = []
+        created, updated = todo.created_us, todo.updated_us
+        if created is None:
+            strings.append(todo.created_at.encode("utf-8"))
+            flags |= _BINARY_CREATED_TEXT
+            created = len(strings[-1])
+        if updated is None:
+            strings.append(todo.updated_at.encode("utf-8"))
+            flags |= _BINARY_UPDATED_TEXT
+            updated = len(strings[-1])
+        try:
+            header = _BINARY_RECORD.pack(todo.id, flags, len(text), created, updated)
+        except struct.error as e:
+            raise ValueError(f"Todo #{todo.id} cannot be stored in binary format: {e}") from e
+        chunks.extend((header, text, *strings))
+        count += 1
+    header = _BINARY_HEADER.pack(_BINARY_MAGIC, FORMAT_VERSION, _BINARY_FLAG_CHECKSUM, count)
+    data = header + _BINARY_DONE_COUNT.pack(done) + b"".join(chunks)
+    checksum = zlib.crc32(memoryview(data)[_BINARY_CHECKSUM_START:])
+    return data + _BINARY_CHECKSUM.pack(checksum)
+
+
+def _iter_binary(f: BinaryIO, path: Path) -> Iterator[dict]:
+    header = f.read(_BINARY_HEADER.size)
+    if len(header) < _BINARY_HEADER.size:
+        raise ValueError(f"Truncated binary todo file '{path}': incomplete header.")
+    _magic, version, flags, count = _BINARY_HEADER.unpack(header)
+    _check_version(version, path)
+    layout = binary_record_layout(version)
+    # Since version 4 the header ends with the done count, which this
+    # path recomputes anyway
+    extra = binary_records_offset(version) - _BINARY_HEADER.size
+    if len(f.read(extra)) < extra:
+        raise ValueError(f"Truncated binary todo file '{path}': incomplete header.")
+
+    for index in range(count):
+        raw = f.read(layout.size)
+        if len(raw) < layout.size:
+            raise ValueError(f"Truncated binary todo file '{path}' at record #{index + 1}.")
+        fields = _unpack_binary_record(layout, raw, 0, path, index + 1)
+        body = f.read(_binary_body_size(fields, path))
+        yield _binary_record(fields, body, path, index + 1)
+
+    # This path validates every record anyway, so the checksum is not verified
+    if flags & _BINARY_FLAG_CHECKSUM and len(f.read(_BINARY_CHECKSUM.size)) < _BINARY_CHECKSUM.size:
+        raise ValueError(f"Truncated binary todo file '{path}': missing checksum.")
+    if f.read(1):
+        raise ValueError(f"Unexpected data after {count} records in binary todo file '{path}'.")
+
+
+def binary_record_layout(version: int) -> struct.Struct:
+    """Return the record header struct of binary files of ``version``."""
+    return _BINARY_RECORD if version >= 3 else _BINARY_RECORD_V2
+
+
+def _unpack_binary_record(
+    layout: struct.Struct, buffer: Buffer, offset: int, path: Path, number: int
+) -> _RecordHeader:
+    """Unpack one record header as (id, flags, text length, created, updated)."""
+    fields = layout.unpack_from(buffer, offset)
+    if layout is _BINARY_RECORD:
+        if fields[1] & ~(_BINARY_DONE | _BINARY_CREATED_TEXT | _BINARY_UPDATED_TEXT):
+            raise ValueError(f"Invalid record flags in '{path}' at record #{number}.")
+        return fields
+    # Versions 1 and 2 store both timestamps as strings
+    todo_id, done, text_len, created_len, updated_len = fields
+    if done not in (0, 1):
+        raise ValueError(
+            f"Invalid value for 'done': {done!r}. 'done' must be a boolean (true/false) or 0/1."
+        )
+    flags = done | _BINARY_CREATED_TEXT | _BINARY_UPDATED_TEXT
+    return todo_id, flags, text_len, created_len, updated_len
+
+
+def _binary_body_size(fields: _RecordHeader, path: Path) -> int:
+    _todo_id, flags, size, created, updated = fields
+    if flags & _BINARY_CREATED_TEXT:
+        size += created
+    if flags & _BINARY_UPDATED_TEXT:
+        size += updated
+    if size > _MAX_RECORD_CHARS:
+        raise ValueError(
+            f"Todo record in '{path}' exceeds {_MAX_RECORD_CHARS:,} characters. "
+            f"This protects against denial-of-service attacks."
+        )
+    return size
+
+
+def _binary_record(fields: _RecordHeader, body: bytes, path: Path, number: int) -> dict:
+    """Build the record dict for unpacked ``fields`` and their string ``body``."""
+    todo_id, flags, text_len, created, updated = fields
+    if len(body) < _binary_body_size(fields, path):
+        raise ValueError(f"Truncated binary todo file '{path}' at record #{number}.")
+    created_at: int | str = created
+    updated_at: int | str = updated
+    try:
+        text = body[:text_len].decode("utf-8")
+        offset = text_len
+        if flags & _BINARY_CREATED_TEXT:
+            created_at = body[offset : offset + created].decode("utf-8")
+            offset += created
+        if flags & _BINARY_UPDATED_TEXT:
+            updated_at = body[offset : offset + updated].decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid UTF-8 in '{path}' at record #{number}.") from e
+    return {
+        "id": todo_id,
+        "text": text,
+        "done": bool(flags & _BINARY_DONE),
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+
+class _JsonArrayReader:
+    """Decode the elements of a todo array from a JSON text stream.
+
+    The array is either the whole document (pretty) or the ``todos`` member
+    of a compact envelope. Errors are reported like json.loads() would, with
+    line and column numbers relative to the whole file.
+    """
+
+    def __init__(self, f: TextIO, path: Path) -> None:
+        self._f = f
+        self._path = path
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        # Line/column of _buf[0] within the file, for error messages
+        self._line = 1
+        self._col = 1
+        self.header: dict[str, object] = {}
+
+    def __iter__(self) -> Iterator[object]:
+        char = self._peek()
+        if char == "[":
+            yield from self._array()
+        elif char == "{":
+            yield from self._envelope()
+        else:
+            # Decode whatever is there so invalid JSON is reported as such
+            self._value()
+            raise ValueError("Todo storage must be a JSON list")
+
+        if self._peek() != "":
+            self._fail("Extra data", self._pos)
+
+    def _array(self) -> Iterator[object]:
+        self._pos += 1
+        if self._peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                self._fail("Expecting ',' delimiter", self._pos - 1)
+
+    def _envelope(self) -> Iterator[object]:
+        self._pos += 1
+        has_todos = False
+        while self._peek() != "}":
+            if self._peek() != '"':
+                self._fail("Expecting property name enclosed in double quotes", self._pos)
+            key = self._value()
+            if self._peek() != ":":
+                self._fail("Expecting ':' delimiter", self._pos)
+            self._pos += 1
+
+            if key == "todos" and self.header.get("format") == _ENVELOPE_MARKER:
+                _check_version(self.header.get("version"), self._path)
+                if self._peek() != "[":
+                    raise ValueError("Todo storage 'todos' member must be a JSON list")
+                yield from self._array()
+                has_todos = True
+            else:
+                self.header[str(key)] = self._value()
+
+            if self._peek() == ",":
+                self._pos += 1
+            elif self._peek() != "}":
+                self._fail("Expecting ',' delimiter", self._pos)
+        self._pos += 1
+
+        if not has_todos:
+            raise ValueError("Todo storage must be a JSON list")
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos : self._pos + 1]
+
+    def _value(self) -> object:
+        if self._peek() == "":
+            self._fail("Expecting value", self._pos)
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # Only an error the end of the buffer may have caused goes
+                # away with more input; report anything else right here. A
+                # record too long to read further is reported as oversized
+                # only if it is one long string, otherwise by its error.
+                unterminated = e.msg.startswith("Unterminated string")
+                cut_off = unterminated or e.pos >= len(self._buf) - _PARTIAL_TOKEN_CHARS
+                oversized = len(self._buf) - self._pos > _MAX_RECORD_CHARS
+                if self._eof or not cut_off or (oversized and not unterminated):
+                    self._fail(e.msg, e.pos)
+            else:
+                # A number ending exactly at the buffer edge may continue in
+                # the next chunk; anything else is complete.
+                if end < len(self._buf) or self._eof:
+                    self._check_size(end - self._pos)
+                    self._pos = end
+                    return value
+
+            self._check_size(len(self._buf) - self._pos)
+            self._fill()
+
+    def _check_size(self, size: int) -> None:
+        if size > _MAX_RECORD_CHARS:
+            raise ValueError(
+                f"Todo record in '{self._path}' exceeds {_MAX_RECORD_CHARS:,} characters. "
+                f"This protects against denial-of-service attacks."
+            )
+
+    def _fill(self) -> bool:
+        """Read the next chunk, discarding consumed input. False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(_READ_CHUNK_CHARS)
+        if not chunk:
+            self._eof = True
+            return False
+
+        consumed = self._buf[: self._pos]
+        newlines = consumed.count("\n")
+        if newlines:
+            self._line += newlines
+            self._col = len(consumed) - consumed.rfind("\n")
+        else:
+            self._col += len(consumed)
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _fail(self, msg: str, pos: int) -> None:
+        newlines = self._buf.count("\n", 0, pos)
+        line = self._line + newlines
+        col = pos - self._buf.rfind("\n", 0, pos) if newlines else self._col + pos
+        raise ValueError(f"Invalid JSON in '{self._path}': {msg}. Check line {line}, column {col}.")
@@ -2,8 +2,20 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+
 from .todo import Todo
 
+# One str.translate() table for every character _sanitize_text() escapes:
+# ASCII control characters (0x00-0x1f), DEL (0x7f) and C1 (0x80-0x9f) become
+# \xNN escapes, except \n, \r and \t, which get their readable forms.
+# The backslash is escaped in the same single pass: translate() never
+# rescans its output, which gives exactly the result of escaping the
+# backslash first, so literal "\x1b" text cannot pass for a sanitized
+# control character.
+_ESCAPES = {code: f"\\x{code:02x}" for code in (*range(0x20), *range(0x7f, 0xa0))}
+_ESCAPES.update({ord("\\"): "\\\\", ord("\n"): "\\n", ord("\r"): "\\r", ord("\t"): "\\t"})
+
 
 def _sanitize_text(text: str) -> str:
     """Escape control characters to prevent terminal output manipulation.
@@ -12,30 +24,11 @@ def _sanitize_text(text: str) -> str:
     C1 control characters (0x80-0x9f) with their escaped representations
     to prevent injection attacks via todo text.
     """
-    # First: Escape backslash to prevent collision with escape sequences
-    # This MUST be done before any other escaping to prevent ambiguity
-    # between literal backslash-escape text and sanitized control characters.
-    text = text.replace("\\", "\\\\")
-
-    # Common control characters - replace with readable escapes
-    replacements = [
-        ("\n", "\\n"),
-        ("\r", "\\r"),
-        ("\t", "\\t"),
-    ]
-    for char, escaped in replacements:
-        text = text.replace(char, escaped)
-
-    # Other control characters (0x00-0x1f excluding \n, \r, \t), DEL (0x7f), and C1 (0x80-0x9f)
-    # Replace with \\xNN escape sequences
-    result = []
-    for char in text:
-        code = ord(char)
-        if (0 <= code <= 0x1f and char not in ("\n", "\r", "\t")) or 0x7f <= code <= 0x9f:
-            result.append(f"\\x{code:02x}")
-        else:
-            result.append(char)
-    return "".join(result)
+    # Fast path: every character we escape except the backslash is a Cc
+    # control character, which isprintable() rejects
+    if text.isprintable() and "\\" not in text:
+        return text
+    return text.translate(_ESCAPES)
 
 
 class TodoFormatter:
@@ -49,6 +42,14 @@ class TodoFormatter:
 
     @classmethod
     def format_list(cls, todos: list[Todo]) -> str:
-        if not todos:
-            return "No todos yet."
-        return "\n".join(cls.format_todo(todo) for todo in todos)
+        return "\n".join(cls.iter_lines(todos))
+
+    @classmethod
+    def iter_lines(cls, todos: Iterable[Todo]) -> Iterator[str]:
+        """Yield one formatted line per todo as ``todos`` is consumed."""
+        empty = True
+        for todo in todos:
+            empty = False
+            yield cls.format_todo(todo)
+        if empty:
+            yield "No todos yet."
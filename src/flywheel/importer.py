@@ -0,0 +1,129 @@
+"""Streaming bulk import of todos from NDJSON, CSV or plain text."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Iterator
+from typing import TextIO
+
+from .formats import _MAX_RECORD_CHARS, _MAX_TODO_COUNT
+from .transaction import TodoTransaction
+
+IMPORT_FORMATS = ("ndjson", "csv", "lines")
+
+# Records between two progress callbacks
+_PROGRESS_EVERY = 10_000
+
+_NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+_CSV_TRUE = frozenset({"1", "true", "yes", "y", "x", "done"})
+_CSV_FALSE = frozenset({"", "0", "false", "no", "n"})
+
+
+def detect_import_format(name: str) -> str:
+    """Guess the import format from a file name; plain lines otherwise."""
+    lowered = name.lower()
+    if lowered.endswith(_NDJSON_SUFFIXES):
+        return "ndjson"
+    if lowered.endswith(".csv"):
+        return "csv"
+    return "lines"
+
+
+def iter_records(stream: TextIO, format: str) -> Iterator[tuple[int, dict]]:
+    """Yield ``(line number, record)`` pairs from ``stream`` one at a time.
+
+    Records are dicts in ``Todo.to_dict()`` shape without an id. Nothing is
+    read ahead, so memory is bounded by the longest line. Security: lines
+    longer than _MAX_RECORD_CHARS are rejected to prevent DoS.
+    """
+    if format == "ndjson":
+        for number, line in _iter_lines(stream):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {number}: {e.msg}") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"Invalid record on line {number}: expected a JSON object")
+            yield number, record
+    elif format == "csv":
+        yield from _iter_csv(stream)
+    elif format == "lines":
+        for number, line in _iter_lines(stream):
+            yield number, {"text": line}
+    else:
+        raise ValueError(
+            f"Unknown import format: {format!r}. Choose from: {', '.join(IMPORT_FORMATS)}"
+        )
+
+
+def import_records(
+    tx: TodoTransaction,
+    records: Iterator[tuple[int, dict]],
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Add every record to ``tx``; returns the number of todos imported.
+
+    Each record is validated by ``TodoTransaction.add_record`` (the same
+    rules as ``Todo.from_dict``) and gets the next free id. Any invalid
+    record raises, so the surrounding transaction commits all or nothing.
+    """
+    count = 0
+    for number, record in records:
+        try:
+            tx.add_record(record)
+        except ValueError as e:
+            raise ValueError(f"Invalid record on line {number}: {e}") from e
+        count += 1
+        if len(tx.todos) > _MAX_TODO_COUNT:
+            raise ValueError(
+                f"Import would exceed {_MAX_TODO_COUNT:,} todos. "
+                f"This protects against denial-of-service attacks."
+            )
+        if progress is not None and count % _PROGRESS_EVERY == 0:
+            progress(count)
+    if progress is not None:
+        progress(count)
+    return count
+
+
+def _iter_lines(stream: TextIO) -> Iterator[tuple[int, str]]:
+    number = 0
+    while True:
+        line = stream.readline(_MAX_RECORD_CHARS + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > _MAX_RECORD_CHARS:
+            raise ValueError(
+                f"Line {number} exceeds {_MAX_RECORD_CHARS:,} characters. "
+                f"This protects against denial-of-service attacks."
+            )
+        line = line.strip()
+        if line:
+            yield number, line
+
+
+def _iter_csv(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    import csv
+
+    reader = csv.DictReader(stream)
+    try:
+        if reader.fieldnames is None or "text" not in reader.fieldnames:
+            raise ValueError("CSV input needs a header row with a 'text' column")
+        for row in reader:
+            record: dict = {"text": row["text"] or ""}
+            done = (row.get("done") or "").strip().lower()
+            if done in _CSV_TRUE:
+                record["done"] = True
+            elif done in _CSV_FALSE:
+                record["done"] = False
+            else:
+                raise ValueError(
+                    f"Invalid value for 'done' on line {reader.line_num}: {row['done']!r}"
+                )
+            for field in ("created_at", "updated_at"):
+                if row.get(field):
+                    record[field] = row[field]
+            yield reader.line_num, record
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV on line {reader.line_num}: {e}") from e
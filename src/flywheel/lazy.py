@@ -0,0 +1,244 @@
+"""Memory-mapped lazy access to todo records."""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from .formats import (
+    _BINARY_HEADER,
+    _DECODER,
+    _ENVELOPE_MARKER,
+    _MAX_RECORD_CHARS,
+    FORMAT_VERSION,
+    _binary_body_size,
+    _binary_record,
+    _unpack_binary_record,
+    binary_record_layout,
+    binary_records_offset,
+    detect_format,
+)
+from .storage import TodoStorage
+from .todo import Todo
+
+# Record start in the pretty layout TodoStorage.save() writes (indent=2).
+# Encoded strings cannot contain a raw newline, so "\n  {" only ever occurs
+# at the start of a top-level record. The id group is missing when a record
+# was hand-edited into another shape, which switches to the fallback path.
+_RECORD_START = re.compile(rb'\n  \{(?:\n    "id": (-?\d+),\n)?')
+_ARRAY_END = re.compile(rb"\n\]\s*\Z")
+
+# Record start in the compact envelope. A raw '"' cannot occur inside an
+# encoded string, so '[{"' / ',{"' always opens a record; the id group is
+# missing when the record does not start with its id.
+_COMPACT_PREFIX = re.compile(
+    rb'\{"format":"%s","version":\d+,(?:"checksum":\d+,)?(?:"count":\d+,"done":\d+,)?"todos":\['
+    % _ENVELOPE_MARKER.encode()
+)
+_COMPACT_RECORD_START = re.compile(rb'[\[,]\{"(?:id":(-?\d+),)?')
+
+
+class LazyTodoFile:
+    """Read-only view of a JSON database that decodes records on access.
+
+    The file is memory-mapped and a compact offset index (sorted ids plus
+    byte spans, stored in ``array`` objects) is built with a single regex
+    pass over JSON files, or by walking the fixed record headers of binary
+    files. Looking up or checking one id is a binary search and only that
+    record is decoded and validated.
+
+    Files that do not use a layout written by ``TodoStorage.save()`` are
+    still supported: they fall back to a full streaming load.
+
+    Only the records that are accessed are validated. A lookup can therefore
+    succeed on a file whose other records ``TodoStorage.load()`` would
+    reject; use the full loader when the whole file must be checked.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._map: mmap.mmap | None = None
+        self._format = "pretty"
+        self._binary_layout = binary_record_layout(FORMAT_VERSION)
+        self._ids = array("q")
+        self._starts = array("q")
+        self._ends = array("q")
+        # Materialized todos when the file layout is not recognized
+        self._fallback: dict[int, Todo] | None = None
+        self._open()
+
+    def __enter__(self) -> LazyTodoFile:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        if self._fallback is not None:
+            return len(self._fallback)
+        return len(self._ids)
+
+    def __contains__(self, todo_id: object) -> bool:
+        if self._fallback is not None:
+            return todo_id in self._fallback
+        return isinstance(todo_id, int) and self._find(todo_id) >= 0
+
+    def get(self, todo_id: int) -> Todo | None:
+        if self._fallback is not None:
+            return self._fallback.get(todo_id)
+
+        index = self._find(todo_id)
+        if index < 0 or self._map is None:
+            return None
+        start, end = self._starts[index], self._ends[index]
+        if self._format == "binary":
+            layout = self._binary_layout
+            fields = _unpack_binary_record(layout, self._map, start, self.path, index + 1)
+            body = self._map[start + layout.size : end]
+            return Todo.from_dict(_binary_record(fields, body, self.path, index + 1), micros=True)
+
+        if end - start > _MAX_RECORD_CHARS:
+            raise ValueError(f"Todo record in '{self.path}' exceeds {_MAX_RECORD_CHARS:,} bytes.")
+        try:
+            data = json.loads(self._map[start:end])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in '{self.path}' for todo #{todo_id}: {e.msg}.") from e
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid todo record for #{todo_id}: expected a JSON object")
+        return Todo.from_dict(data, micros=self._format == "compact")
+
+    def _find(self, todo_id: int) -> int:
+        index = bisect_left(self._ids, todo_id)
+        if index < len(self._ids) and self._ids[index] == todo_id:
+            return index
+        return -1
+
+    def _open(self) -> None:
+        try:
+            f = self.path.open("rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped; let the full loader report them
+                self._load_fallback()
+                return
+
+        if not self._build_index(self._map):
+            self.close()
+            self._load_fallback()
+
+    def _build_index(self, data: mmap.mmap) -> bool:
+        """Index record spans; False if the file is not in a saved layout."""
+        self._format = detect_format(data[:16])
+        try:
+            if self._format == "binary":
+                spans = self._binary_spans(data)
+            elif self._format == "compact":
+                spans = self._compact_spans(data)
+            else:
+                spans = self._pretty_spans(data)
+        except (OverflowError, ValueError, struct.error):
+            return False
+        if spans is None:
+            return False
+
+        ids, starts, ends = spans
+        if any(ids[i] >= ids[i + 1] for i in range(len(ids) - 1)):
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            ids = array("q", (ids[i] for i in order))
+            starts = array("q", (starts[i] for i in order))
+            ends = array("q", (ends[i] for i in order))
+            if any(ids[i] == ids[i + 1] for i in range(len(ids) - 1)):
+                # Duplicate ids: let the full loader define the semantics
+                return False
+
+        self._ids, self._starts, self._ends = ids, starts, ends
+        return True
+
+    @staticmethod
+    def _pretty_spans(data: mmap.mmap) -> tuple[array, array, array] | None:
+        ids, starts = array("q"), array("q")
+        if data[:2] == b"[]":
+            return (ids, starts, array("q")) if data[2:].strip() == b"" else None
+        if data[:1] != b"[":
+            return None
+
+        for match in _RECORD_START.finditer(data):
+            if match.group(1) is None:
+                return None
+            ids.append(int(match.group(1)))
+            starts.append(match.start() + 1)
+
+        end_match = _ARRAY_END.search(data)
+        if not starts or starts[0] != 2 or end_match is None:
+            return None
+
+        # Records are separated by "," right before the next "\n  {"
+        ends = array("q", (start - 2 for start in starts[1:]))
+        ends.append(end_match.start())
+        return ids, starts, ends
+
+    @staticmethod
+    def _compact_spans(data: mmap.mmap) -> tuple[array, array, array] | None:
+        ids, starts = array("q"), array("q")
+        prefix = _COMPACT_PREFIX.match(data)
+        if prefix is None:
+            return None
+        if data[prefix.end() : prefix.end() + 1] == b"]":
+            return ids, starts, array("q")
+
+        for match in _COMPACT_RECORD_START.finditer(data, prefix.end() - 1):
+            if match.group(1) is None:
+                return None
+            ids.append(int(match.group(1)))
+            starts.append(match.start() + 1)
+        if not starts or starts[0] != prefix.end():
+            return None
+
+        # Records are separated by the "," each following match starts with;
+        # the last one ends wherever its object does.
+        ends = array("q", (start - 1 for start in starts[1:]))
+        tail = data[starts[-1] : starts[-1] + _MAX_RECORD_CHARS * 4]
+        text = tail.decode("utf-8", errors="replace")
+        _, end = _DECODER.raw_decode(text)
+        ends.append(starts[-1] + len(text[:end].encode("utf-8")))
+        return ids, starts, ends
+
+    def _binary_spans(self, data: mmap.mmap) -> tuple[array, array, array] | None:
+        ids, starts, ends = array("q"), array("q"), array("q")
+        _magic, version, _flags, count = _BINARY_HEADER.unpack_from(data, 0)
+        if version > FORMAT_VERSION:
+            return None
+        self._binary_layout = layout = binary_record_layout(version)
+
+        offset = binary_records_offset(version)
+        for number in range(1, count + 1):
+            fields = _unpack_binary_record(layout, data, offset, self.path, number)
+            end = offset + layout.size + _binary_body_size(fields, self.path)
+            if end > len(data):
+                return None
+            ids.append(fields[0])
+            starts.append(offset)
+            ends.append(end)
+            offset = end
+        return ids, starts, ends
+
+    def _load_fallback(self) -> None:
+        todos: dict[int, Todo] = {}
+        for todo in TodoStorage(str(self.path)).iter_load():
+            todos.setdefault(todo.id, todo)
+        self._fallback = todos
@@ -0,0 +1,133 @@
+"""Cross-process locking and revision stamps for todo databases.
+
+Writers hold an exclusive ``flock`` on a sidecar ``<db>.lock`` file while
+they check for conflicts and replace the database; readers hold a shared
+lock while they read. The lock file also stores the database revision, a
+counter every locked save increments. The revision lives beside the file
+rather than inside it because the pretty format is a bare JSON list with
+nowhere to put it.
+
+Where ``fcntl`` is unavailable (Windows) the locks are no-ops and conflict
+detection relies on the revision and file stat alone.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import stat
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+# Longest revision stamp we read back: a decimal 64-bit counter plus newline
+_REVISION_BYTES = 21
+
+
+class ConflictError(ValueError):
+    """The database changed on disk after it was loaded."""
+
+
+def lock_path_for(path: str | Path) -> Path:
+    """Return the lock file that guards database ``path``."""
+    path = Path(path)
+    return path.with_name(path.name + ".lock")
+
+
+@contextlib.contextmanager
+def locked(path: Path, exclusive: bool) -> Iterator[int | None]:
+    """Hold the lock for database ``path``; yields the lock file descriptor.
+
+    Shared locks never create the lock file: a database nobody has written
+    with locking yet yields None and is read unlocked.
+    """
+    lock_path = lock_path_for(path)
+    flags = os.O_RDWR | getattr(os, "O_NOFOLLOW", 0)
+    try:
+        if exclusive:
+            # Security: owner read/write only, and never follow a planted symlink
+            fd = os.open(lock_path, flags | os.O_CREAT, stat.S_IRUSR | stat.S_IWUSR)
+        else:
+            fd = os.open(lock_path, flags)
+    except FileNotFoundError:
+        if exclusive:
+            raise
+        yield None
+        return
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield fd
+    finally:
+        # Closing the descriptor releases the flock
+        os.close(fd)
+
+
+class DatabaseLock:
+    """A storage instance's handle on its database lock, re-entrant within it.
+
+    ``hold()`` keeps the lock across several loads and saves; ``acquire()``
+    reuses a held lock, or takes it for just one ``with`` block. Both yield
+    the lock file descriptor. ``prepare`` runs before ``hold()`` takes an
+    exclusive lock, e.g. to create the database's directory.
+    """
+
+    def __init__(self, path: Path, prepare: Callable[[], None] | None = None) -> None:
+        self.path = path
+        self.fd: int | None = None
+        self._prepare = prepare
+
+    @contextlib.contextmanager
+    def hold(self, exclusive: bool = True) -> Iterator[int | None]:
+        if self.fd is not None:
+            yield self.fd
+            return
+        if exclusive and self._prepare is not None:
+            self._prepare()
+        with locked(self.path, exclusive) as fd:
+            self.fd = fd
+            try:
+                yield fd
+            finally:
+                self.fd = None
+
+    def acquire(self, exclusive: bool) -> contextlib.AbstractContextManager[int | None]:
+        if self.fd is not None:
+            return contextlib.nullcontext(self.fd)
+        return locked(self.path, exclusive)
+
+
+def bump_revision(fd: int | None) -> None:
+    """Count a single-item write in the revision stamp of lock file ``fd``.
+
+    Writers like this leave the revision they loaded alone on purpose: a
+    later save() of todos loaded before the write must see a conflict and
+    reload.
+    """
+    if fd is not None:
+        write_revision(fd, read_revision(fd) + 1)
+
+
+def read_revision(fd: int | None) -> int:
+    """Return the revision stored in lock file ``fd`` (0 when none yet)."""
+    if fd is None:
+        return 0
+    os.lseek(fd, 0, os.SEEK_SET)
+    raw = os.read(fd, _REVISION_BYTES)
+    try:
+        return int(raw or b"0")
+    except ValueError:
+        # A damaged stamp only costs a spurious conflict, never a lost update
+        return -1
+
+
+def write_revision(fd: int, revision: int) -> None:
+    data = b"%d\n" % revision
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data)
+    os.ftruncate(fd, len(data))
@@ -0,0 +1,238 @@
+"""Append-only operation log storage for todos."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import stat
+from collections.abc import Collection, Iterator
+from pathlib import Path
+
+from .locking import ConflictError
+from .storage import (
+    DEFAULT_DURABILITY,
+    TodoStorage,
+    _ensure_parent_directory,
+    _fsync_directory,
+    _group_flusher,
+)
+from .todo import Todo, _now_us
+
+# Compact the log into the snapshot once it grows past this many bytes (1MB)
+_DEFAULT_COMPACT_THRESHOLD_BYTES = 1024 * 1024
+
+
+class OpLogStorage:
+    """Todo storage that appends one record per mutation.
+
+    The database is split into a snapshot (a regular JSON file written by
+    TodoStorage) and a sidecar ``<db>.log`` file holding one JSON record per
+    line. ``load()`` reads the snapshot and replays the log on top of it;
+    ``save()`` appends only the records that changed since the last load or
+    save, so a mutation costs O(changed) bytes of I/O instead of O(n).
+
+    Once the log grows past ``compact_threshold`` bytes it is folded back into
+    the snapshot. Log records carry the full todo (``put``) or just its id
+    (``del``), so replaying a log on top of a snapshot that already contains
+    its effects is harmless; a crash between writing the snapshot and
+    truncating the log therefore never loses or duplicates data.
+
+    Appends and compaction hold the snapshot's exclusive lock, and ``save()``
+    raises ConflictError when another process appended to the log or
+    compacted it since this instance loaded, so concurrent writers can retry
+    instead of recording changes against a stale state.
+
+    ``durability`` applies to the snapshot and to appends: ``durable``
+    fsyncs the log after each append (and its directory when the append
+    created it).
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        compact_threshold: int = _DEFAULT_COMPACT_THRESHOLD_BYTES,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        self.snapshot = TodoStorage(path, durability=durability)
+        self.durability = durability
+        self.path = self.snapshot.path
+        self.log_path = log_path_for(self.path)
+        self.compact_threshold = compact_threshold
+        # Last persisted state (id -> serialized todo), used to diff on save
+        self._known: dict[int, dict] | None = None
+        # Log size in bytes when it was last read or appended to
+        self._log_seen = 0
+
+    def load(self) -> list[Todo]:
+        # Hold the lock so a concurrent compaction cannot truncate the log
+        # between reading the snapshot and reading the log
+        with self.snapshot.lock(exclusive=False):
+            todos = {todo.id: todo for todo in self.snapshot.load()}
+            now = _now_us()
+            for record in self._read_log():
+                if record["op"] == "put":
+                    todo = Todo.from_dict(record["todo"], now, micros=True)
+                    todos[todo.id] = todo
+                else:
+                    todos.pop(record["id"], None)
+
+        self._known = {todo_id: todo.to_record() for todo_id, todo in todos.items()}
+        return list(todos.values())
+
+    def iter_load(self) -> Iterator[Todo]:
+        # The log can rewrite any earlier record, so replay has to finish first
+        yield from self.load()
+
+    def save(self, todos: Collection[Todo]) -> None:
+        """Append the difference between ``todos`` and the persisted state."""
+        with self.snapshot.lock() as lock_fd:
+            if self._known is None:
+                self.load()
+            else:
+                self._check_unchanged(lock_fd)
+            known = self._known or {}
+
+            current = {todo.id: todo.to_record() for todo in todos}
+            records: list[dict[str, object]] = [
+                {"op": "put", "todo": data}
+                for todo_id, data in current.items()
+                if known.get(todo_id) != data
+            ]
+            records.extend(
+                {"op": "del", "id": todo_id} for todo_id in known if todo_id not in current
+            )
+
+            if records:
+                self._append(records)
+            self._known = current
+
+            if self.log_size() > self.compact_threshold:
+                self.compact(todos)
+
+    def compact(self, todos: Collection[Todo] | None = None) -> None:
+        """Fold the log into the snapshot and truncate it.
+
+        The snapshot is replaced atomically before the log is truncated, so a
+        crash in between leaves a log whose records are already reflected in
+        the snapshot.
+        """
+        with self.snapshot.lock() as lock_fd:
+            if todos is None:
+                todos = self.load()
+            else:
+                self._check_unchanged(lock_fd)
+            self.snapshot.save(todos)
+            with contextlib.suppress(FileNotFoundError):
+                os.truncate(self.log_path, 0)
+            self._log_seen = 0
+        self._known = {todo.id: todo.to_record() for todo in todos}
+
+    def _check_unchanged(self, lock_fd: int | None) -> None:
+        if self.log_size() != self._log_seen:
+            raise ConflictError(
+                f"Operation log '{self.log_path}' was changed by another process "
+                f"since it was loaded"
+            )
+        self.snapshot.check_unchanged(lock_fd)
+
+    def lock(self, exclusive: bool = True):
+        """Hold the database lock across several loads and saves."""
+        return self.snapshot.lock(exclusive)
+
+    def log_size(self) -> int:
+        try:
+            return self.log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        return self.snapshot.next_id(todos)
+
+    def _read_log(self) -> list[dict]:
+        try:
+            raw = self.log_path.read_bytes()
+        except FileNotFoundError:
+            self._log_seen = 0
+            return []
+        self._log_seen = len(raw)
+
+        lines = raw.split(b"\n")
+        # A trailing fragment without newline is a torn append from a crash;
+        # it was never acknowledged, so it is safe to ignore.
+        if lines and lines[-1]:
+            lines.pop()
+
+        records = []
+        for lineno, line in enumerate(lines, start=1):
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(
+                    f"Invalid record in operation log '{self.log_path}' at line {lineno}: {e.msg}."
+                ) from e
+            records.append(_validate_record(record, self.log_path, lineno))
+        return records
+
+    def _append(self, records: list[dict]) -> None:
+        _ensure_parent_directory(self.log_path)
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        ).encode("utf-8")
+
+        # O_NOFOLLOW refuses to append through a symlink planted at the log path;
+        # the log is created owner read/write only, like the snapshot temp file.
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0)
+        fd = os.open(self.log_path, flags, stat.S_IRUSR | stat.S_IWUSR)
+        try:
+            size = _drop_torn_tail(fd)
+            # A single write keeps one save() from interleaving with another
+            # process appending to the same log.
+            os.write(fd, payload)
+            if self.durability == "durable":
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        if self.durability == "durable" and size == 0:
+            # The log may be new; its directory entry has to reach the disk too
+            _fsync_directory(self.log_path.parent)
+        elif self.durability == "group":
+            _group_flusher().add(self.log_path)
+        self._log_seen = size + len(payload)
+
+
+def _drop_torn_tail(fd: int) -> int:
+    """Cut a torn trailing fragment off the log open at ``fd``; returns its size.
+
+    load() ignores a final line without newline, but appending right after
+    it would glue the next record onto the fragment and corrupt the log for
+    good. Callers hold the exclusive lock, so nobody is mid-append.
+    """
+    size = os.fstat(fd).st_size
+    if size == 0:
+        return 0
+    os.lseek(fd, size - 1, os.SEEK_SET)
+    if os.read(fd, 1) == b"\n":
+        return size
+    os.lseek(fd, 0, os.SEEK_SET)
+    raw = os.read(fd, size)
+    size = raw.rfind(b"\n") + 1
+    os.ftruncate(fd, size)
+    return size
+
+
+def log_path_for(path: Path) -> Path:
+    """Return the operation log path that belongs to database ``path``."""
+    return path.with_name(path.name + ".log")
+
+
+def _validate_record(record: object, log_path: Path, lineno: int) -> dict:
+    if isinstance(record, dict):
+        if record.get("op") == "put" and isinstance(record.get("todo"), dict):
+            return record
+        if record.get("op") == "del" and isinstance(record.get("id"), int):
+            return record
+    raise ValueError(f"Invalid record in operation log '{log_path}' at line {lineno}.")
@@ -0,0 +1,129 @@
+"""Phase timing behind ``todo --profile`` and ``FLYWHEEL_PROFILE``.
+
+Storage and the CLI mark their phases with ``phase(name)``. While no timer
+is active (the normal case) that returns a shared no-op context manager,
+and per-record hooks are only installed by code that checked ``active()``
+first, so unprofiled runs pay one global lookup per phase.
+
+Phases nest: time spent in an inner phase is taken out of the outer one,
+so the report adds up to the wall time of the command, with whatever no
+phase claimed (locking, imports, the command's own bookkeeping) shown as
+``other``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from collections.abc import Callable, Iterator
+from typing import TextIO
+
+# In the order a command goes through them
+PHASES = (
+    "parse",  # argument parsing
+    "read",  # reading the whole database file
+    "decode",  # JSON / binary decoding of records (and the reads of streaming loads)
+    "validate",  # Todo.from_dict on every decoded record
+    "mutate",  # applying the command to the loaded todos
+    "encode",  # serializing todos for save()
+    "write",  # writing (and fsyncing) the temp file
+    "replace",  # os.replace of the temp file over the database
+    "format",  # rendering output
+)
+
+_NO_PHASE = contextlib.nullcontext()
+
+_active: PhaseTimer | None = None
+
+
+class PhaseTimer:
+    """Accumulates exclusive time and call counts per phase."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter_ns()
+        self.totals: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.counts: dict[str, int] = dict.fromkeys(PHASES, 0)
+        # Time spent in nested phases, per open phase (innermost last)
+        self._nested: list[int] = []
+
+    def _enter(self) -> int:
+        self._nested.append(0)
+        return time.perf_counter_ns()
+
+    def _exit(self, name: str, start: int) -> None:
+        elapsed = time.perf_counter_ns() - start
+        self.totals[name] += elapsed - self._nested.pop()
+        self.counts[name] += 1
+        if self._nested:
+            self._nested[-1] += elapsed
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name, start)
+
+    def timed[**P, R](self, name: str, function: Callable[P, R]) -> Callable[P, R]:
+        """Wrap ``function`` so each call is counted towards phase ``name``."""
+
+        def call(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = self._enter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._exit(name, start)
+
+        return call
+
+    def timed_iter[T](self, name: str, items: Iterator[T]) -> Iterator[T]:
+        """Yield from ``items``, counting the time to produce each towards ``name``."""
+        while True:
+            start = self._enter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                self._exit(name, start)
+            yield item
+
+    def report(self, stream: TextIO, title: str) -> None:
+        """Write the per-phase breakdown, with percentages of the wall time."""
+        total = time.perf_counter_ns() - self.started
+        other = total - sum(self.totals.values())
+        print(f"profile: {title}: {total / 1e6:.1f} ms", file=stream)
+        for name in PHASES:
+            print(self._line(name, self.totals[name], self.counts[name], total), file=stream)
+        print(self._line("other", max(other, 0), 0, total), file=stream)
+
+    @staticmethod
+    def _line(name: str, ns: int, count: int, total: int) -> str:
+        share = 100 * ns / total if total else 0.0
+        calls = f"{count:>9,} calls" if count else ""
+        return f"  {name:<9} {ns / 1e6:>10.1f} ms {share:>5.1f}% {calls}".rstrip()
+
+
+def start() -> PhaseTimer:
+    """Start timing phases; returns the active timer."""
+    global _active
+    if _active is None:
+        _active = PhaseTimer()
+    return _active
+
+
+def stop() -> PhaseTimer | None:
+    """Stop timing phases; returns the timer that was active, if any."""
+    global _active
+    timer, _active = _active, None
+    return timer
+
+
+def active() -> PhaseTimer | None:
+    return _active
+
+
+def phase(name: str) -> contextlib.AbstractContextManager[None]:
+    """Count the time spent in the ``with`` block towards phase ``name``."""
+    return _NO_PHASE if _active is None else _active.phase(name)
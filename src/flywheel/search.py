@@ -0,0 +1,234 @@
+"""Persistent inverted index behind ``todo search``.
+
+``<db>.search`` maps every word token of every todo's text to the ids of
+the todos that contain it, so a query reads the postings of its terms
+instead of scanning every ``Todo.text``. Tokens are the lowercased ``\\w+``
+runs of the text.
+
+The file is line-delimited JSON in the spirit of the operation log: a
+snapshot of the postings followed by one change record per save made
+since, so keeping the index current costs one small append per write:
+
+    {"format": "flywheel-search", "version": 1, "stamp": S0, "postings": {"milk": [1, 4]}}
+    {"base": S0, "stamp": S1, "put": {"7": ["buy", "eggs"]}, "del": [4]}
+
+A stamp identifies the state of the database files (mtime, size, inode).
+Each change record names the state it applies to (``base``) and the one
+it produces; when the chain breaks, or the last stamp no longer matches
+the files (a hand edit, a write by a process that did not update the
+index), the index is rebuilt from the database on the next query. It is
+also rewritten once change records pile up.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from .formats import _private
+from .storage import _stat_key, _write_file_atomic
+from .todo import Todo
+
+_MARKER = "flywheel-search"
+_VERSION = 1
+
+# Change records after which a query rewrites the snapshot
+_COMPACT_CHANGES = 1000
+
+# Query keyword that separates alternatives; terms next to each other are ANDed
+OR = "OR"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def index_path_for(path: str | Path) -> Path:
+    """Return the search index file of database ``path``."""
+    path = Path(path)
+    return path.with_name(path.name + ".search")
+
+
+def tokenize(text: str) -> set[str]:
+    """Return the distinct lowercase word tokens of ``text``."""
+    return set(_TOKEN.findall(text.lower()))
+
+
+def parse_query(terms: list[str]) -> list[list[str]]:
+    """Split query ``terms`` into alternatives of required tokens.
+
+    ``["milk", "OR", "egg*", "fresh"]`` is ``[["milk"], ["egg*", "fresh"]]``:
+    a todo matches when it has every token of at least one alternative. A
+    trailing ``*`` matches any token starting with the rest; a term with
+    punctuation ("e-mail") requires each of its words. ``AND`` is accepted
+    and ignored.
+    """
+    groups: list[list[str]] = [[]]
+    for term in terms:
+        if term == OR:
+            groups.append([])
+            continue
+        if term == "AND":
+            continue
+        prefix = term.endswith("*")
+        words = _TOKEN.findall(term.lower())
+        if prefix and words:
+            words[-1] += "*"
+        groups[-1].extend(words)
+    groups = [group for group in groups if group]
+    if not groups:
+        raise ValueError("Search query has no words to look for")
+    return groups
+
+
+class SearchIndex:
+    """The search index of one database, stored beside it.
+
+    ``sources`` are the files that hold the database; their stat is the
+    stamp that tells whether the index is current.
+    """
+
+    def __init__(self, db_path: str | Path, sources: list[Path]) -> None:
+        self.path = index_path_for(db_path)
+        self.sources = sources
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def stamp(self) -> list[list[int] | None]:
+        """Return the current state of the database files."""
+        stamp: list[list[int] | None] = []
+        for source in self.sources:
+            try:
+                stamp.append(list(_stat_key(source.stat())))
+            except FileNotFoundError:
+                stamp.append(None)
+        return stamp
+
+    def search(self, groups: list[list[str]], load: Callable[[], Iterable[Todo]]) -> list[int]:
+        """Return the sorted ids matching parsed query ``groups``.
+
+        ``load`` yields the database's todos; it is only called when the
+        index is missing or stale and has to be rebuilt.
+        """
+        postings = self._read()
+        if postings is None:
+            postings = self.rebuild(load())
+        tokens = sorted(postings)
+
+        matched: set[int] = set()
+        for group in groups:
+            ids: set[int] | None = None
+            for term in group:
+                found = _lookup(postings, tokens, term)
+                ids = found if ids is None else ids & found
+                if not ids:
+                    break
+            matched |= ids or set()
+        return sorted(matched)
+
+    def rebuild(self, todos: Iterable[Todo]) -> dict[str, list[int]]:
+        """Index ``todos`` from scratch and write a fresh snapshot."""
+        # Stamped before reading: a write that lands meanwhile leaves the
+        # index stale rather than wrongly current
+        stamp = self.stamp()
+        postings: dict[str, list[int]] = {}
+        for todo in todos:
+            for token in tokenize(todo.text):
+                postings.setdefault(token, []).append(todo.id)
+        self._write_snapshot(stamp, postings)
+        return postings
+
+    def record(self, base: list, edits: dict[int, str | None]) -> None:
+        """Append the change made by one save that started from state ``base``.
+
+        ``edits`` maps each id whose text was set to that text, and each
+        removed id to None. Does nothing when there is no index to keep
+        current; an index that is not current already stays stale.
+        """
+        put = {
+            str(todo_id): sorted(tokenize(text))
+            for todo_id, text in edits.items()
+            if text is not None
+        }
+        change = {
+            "base": base,
+            "stamp": self.stamp(),
+            "put": put,
+            "del": [todo_id for todo_id, text in edits.items() if text is None],
+        }
+        line = json.dumps(change, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            # Security: never follow a symlink planted at the index path
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_NOFOLLOW", 0))
+        except FileNotFoundError:
+            return
+        try:
+            # One write per change, so concurrent appends do not interleave
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def _read(self) -> dict[str, list[int]] | None:
+        """Return the current postings, or None when the index must be rebuilt."""
+        try:
+            with self.path.open("rb") as f:
+                if not _private(f.fileno()):
+                    return None  # someone else could have written it
+                lines = f.read().splitlines()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        try:
+            header = json.loads(lines[0])
+            if header.get("format") != _MARKER or header.get("version") != _VERSION:
+                return None
+            postings: dict[str, list[int]] = header["postings"]
+            stamp = header["stamp"]
+            changes = [json.loads(line) for line in lines[1:]]
+            if changes:
+                forward: dict[int, list[str]] = {}
+                for token, ids in postings.items():
+                    for todo_id in ids:
+                        forward.setdefault(todo_id, []).append(token)
+                for change in changes:
+                    if change["base"] != stamp:
+                        return None
+                    stamp = change["stamp"]
+                    for todo_id in change["del"]:
+                        forward.pop(todo_id, None)
+                    for todo_id, tokens in change["put"].items():
+                        forward[int(todo_id)] = tokens
+                postings = {}
+                for todo_id, tokens in forward.items():
+                    for token in tokens:
+                        postings.setdefault(token, []).append(todo_id)
+        except (IndexError, KeyError, TypeError, AttributeError, ValueError):
+            # Damaged or foreign index: the database is the source of truth
+            return None
+        if stamp != self.stamp():
+            return None
+        if len(changes) >= _COMPACT_CHANGES:
+            with contextlib.suppress(OSError):
+                self._write_snapshot(stamp, postings)
+        return postings
+
+    def _write_snapshot(self, stamp: list, postings: dict[str, list[int]]) -> None:
+        header = {"format": _MARKER, "version": _VERSION, "stamp": stamp, "postings": postings}
+        data = json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n"
+        # Derived data: a lost index is rebuilt, so it is never fsynced
+        _write_file_atomic(self.path, data.encode("utf-8"), "fast")
+
+
+def _lookup(postings: dict[str, list[int]], tokens: list[str], term: str) -> set[int]:
+    if not term.endswith("*"):
+        return set(postings.get(term, ()))
+    prefix = term[:-1]
+    ids: set[int] = set()
+    index = bisect_left(tokens, prefix)
+    while index < len(tokens) and tokens[index].startswith(prefix):
+        ids.update(postings[tokens[index]])
+        index += 1
+    return ids
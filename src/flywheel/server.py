@@ -0,0 +1,267 @@
+"""Resident todo server on a Unix domain socket.
+
+``todo serve`` keeps the database parsed in memory and answers CLI commands
+sent over ``<db>.sock``. Each request and response is one line of JSON: the
+client (``flywheel.client``) sends its parsed arguments, the server runs them
+against its resident TodoApp and returns the exit status plus the captured
+stdout/stderr, so a forwarded command prints exactly what a local run would.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Collection, Iterator
+
+from .client import FORWARDED_COMMANDS, _connect, socket_path_for
+from .locking import ConflictError
+from .storage import DEFAULT_DURABILITY, TodoStorage
+from .todo import Todo
+
+# Default time the committer waits for more writes to join a group (2ms)
+_DEFAULT_GROUP_WINDOW = 0.002
+
+# Security: cap one request line so a client cannot exhaust server memory
+_MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+
+class ResidentStorage:
+    """In-memory front for a TodoStorage that commits writes in groups.
+
+    ``save()`` only replaces the pending in-memory state and returns; a
+    committer thread waits ``window`` seconds for further writes and then
+    persists the newest state with one ``TodoStorage.save()``. Callers that
+    need durability wait with ``wait_committed()``. Reads return the pending
+    state when there is one, and otherwise go through the stat-validated
+    cache of the underlying storage, so edits made to the file by other
+    processes are picked up.
+
+    If a commit fails, every write in its group is dropped and reported to
+    its waiters, and the in-memory state falls back to the file. The server
+    re-runs the requests of a group that failed with ConflictError.
+    """
+
+    def __init__(self, storage: TodoStorage, window: float = _DEFAULT_GROUP_WINDOW) -> None:
+        storage.cache = True
+        self.storage = storage
+        # `todo stats` reports the I/O of the whole server lifetime
+        self.metrics = storage.metrics
+        self.path = storage.path
+        self.window = window
+        self.seq = 0
+        self.commits = 0
+        self._committed = 0
+        self._pending: list[Todo] | None = None
+        # (first seq, last seq, error) of the most recent failed group
+        self._failed: tuple[int, int, Exception] | None = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="todo-committer", daemon=True)
+        self._thread.start()
+
+    def load(self) -> list[Todo]:
+        with self._cond:
+            if self._pending is not None:
+                return [copy.copy(todo) for todo in self._pending]
+        with self._io_lock:
+            return self.storage.load()
+
+    def iter_load(self) -> Iterator[Todo]:
+        yield from self.load()
+
+    def save(self, todos: Collection[Todo]) -> None:
+        with self._cond:
+            self._pending = list(todos)
+            self.seq += 1
+            self._cond.notify_all()
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        return self.storage.next_id(todos)
+
+    def wait_committed(self, seq: int) -> None:
+        """Block until write ``seq`` is on disk; raise if its group failed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._committed >= seq)
+            if self._failed is not None and self._failed[0] <= seq <= self._failed[1]:
+                raise self._failed[2]
+
+    def close(self) -> None:
+        """Commit outstanding writes and stop the committer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.seq > self._committed or self._closed)
+                if self.seq == self._committed:
+                    return
+            if not self._closed:
+                # Let writers that arrive meanwhile share this commit
+                time.sleep(self.window)
+
+            with self._cond:
+                todos, first, last = self._pending, self._committed + 1, self.seq
+            try:
+                # Always set here: save() sets it together with each seq
+                if todos is not None:
+                    with self._io_lock:
+                        self.storage.save(todos)
+                error = None
+            except (OSError, ValueError) as e:
+                # ValueError covers ConflictError from a concurrent local writer
+                error = e
+
+            with self._cond:
+                if error is not None:
+                    # Drop the whole group, including writes that built on it
+                    last = self.seq
+                    self._failed = (first, last, error)
+                    self._pending = None
+                elif self.seq == last:
+                    self._pending = None
+                self._committed = last
+                self.commits += 1
+                self._cond.notify_all()
+
+
+class TodoServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded server answering CLI requests for one json database.
+
+    Binds ``<db>.sock`` (owner read/write only) and serves a resident
+    TodoApp whose storage is a ResidentStorage. ``server_close()`` commits
+    outstanding writes and removes the socket.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        window: float = _DEFAULT_GROUP_WINDOW,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        from .cli import TodoApp
+
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("todo serve needs Unix domain sockets, which this platform lacks")
+
+        app = TodoApp(db_path, durability=durability)
+        if not isinstance(app.storage, TodoStorage):
+            raise ValueError("todo serve only supports the json backend")
+        self.socket_path = socket_path_for(db_path)
+        running = _connect(self.socket_path)
+        if running is not None:
+            running.close()
+            raise ValueError(f"A todo server is already running on '{self.socket_path}'")
+        with contextlib.suppress(FileNotFoundError):
+            # Stale socket left by a server that did not shut down cleanly
+            os.unlink(self.socket_path)
+
+        self.storage = ResidentStorage(app.storage, window)
+        app.storage = self.storage
+        self.app = app
+        # Commands run one at a time; commit waits happen outside this lock
+        self.exec_lock = threading.Lock()
+
+        # Security: the socket is owner read/write only, like the database
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _Handler)
+        except OSError:
+            self.storage.close()
+            raise
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        self.storage.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: TodoServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline(_MAX_REQUEST_BYTES + 1)
+        if not line:
+            return
+        try:
+            if len(line) > _MAX_REQUEST_BYTES:
+                raise ValueError("Request too large")
+            request = json.loads(line)
+            if not isinstance(request, dict) or request.get("command") not in FORWARDED_COMMANDS:
+                raise ValueError("Unsupported request")
+            response = self._execute(request)
+        except (ValueError, TypeError) as e:
+            response = {"status": 1, "stdout": "", "stderr": f"Error: {e}\n"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    def _execute(self, request: dict) -> dict:
+        """Run ``request`` and wait until its write, if any, is on disk.
+
+        When the group commit fails with ConflictError (another process
+        wrote the file outside the server), the whole group is dropped and
+        every client re-applies its own operation to the reloaded state,
+        just as TodoApp retries a local operation.
+        """
+        from .cli import _CONFLICT_RETRIES, run_command
+
+        storage = self.server.storage
+        for attempt in range(1, _CONFLICT_RETRIES + 1):
+            args = argparse.Namespace(**request)
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with self.server.exec_lock:
+                before = storage.seq
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    status = run_command(args, app=self.server.app)
+                written = storage.seq
+
+            if written != before:
+                try:
+                    storage.wait_committed(written)
+                except ConflictError as e:
+                    if attempt < _CONFLICT_RETRIES:
+                        continue
+                    return {"status": 1, "stdout": "", "stderr": f"Error: {e}\n"}
+                except (OSError, ValueError) as e:
+                    return {"status": 1, "stdout": "", "stderr": f"Error: {e}\n"}
+            break
+        return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def serve(
+    db_path: str | None = None,
+    window: float = _DEFAULT_GROUP_WINDOW,
+    durability: str = DEFAULT_DURABILITY,
+) -> int:
+    """Serve the json database at ``db_path`` until SIGINT or SIGTERM."""
+    server = TodoServer(db_path, window, durability)
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    previous = signal.signal(signal.SIGTERM, stop)
+    print(f"Serving '{server.storage.path}' on '{server.socket_path}'", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        server.server_close()
+    return 0
@@ -0,0 +1,276 @@
+"""Sharded todo storage: one directory, one file per id range."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+from collections.abc import Collection, Iterator
+from pathlib import Path
+
+from .collection import TodoCollection
+from .formats import DEFAULT_FORMAT, FORMATS, encode
+from .locking import (
+    ConflictError,
+    DatabaseLock,
+    bump_revision,
+    read_revision,
+    write_revision,
+)
+from .storage import (
+    DEFAULT_DURABILITY,
+    TodoStorage,
+    _check_durability,
+    _ensure_parent_directory,
+    _write_file_atomic,
+)
+from .todo import Todo
+
+MANIFEST_NAME = "manifest.json"
+
+# Todos per shard for new databases; existing ones keep their manifest's size
+_DEFAULT_SHARD_SIZE = 1000
+
+_MANIFEST_MARKER = "flywheel-shards"
+# Manifest layout version, independent of the todo file format version
+_MANIFEST_VERSION = 1
+
+
+class ShardedStorage:
+    """Todo storage split into shard files under one directory.
+
+    Todo ``id`` N lives in shard ``(N - 1) // shard_size``, so consecutive
+    adds fill one shard at a time. ``manifest.json`` records the shard size,
+    the shards that exist and the id high-water mark; ids are assigned
+    above the mark and never reused. Each shard is a regular todo file
+    (any of the storage formats) written with the same atomic temp file +
+    ``os.replace`` path as TodoStorage.
+
+    Single-item operations (the RecordStore methods) read and rewrite only
+    the shard that holds the id. ``save()`` compares every shard with what
+    was last loaded and rewrites only the dirty ones. All writers hold the
+    directory's exclusive lock; ``save()`` raises ConflictError when another
+    process changed the database since this instance loaded it.
+
+    Shard and manifest writes follow ``durability`` like TodoStorage.save().
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        shard_size: int = _DEFAULT_SHARD_SIZE,
+        format: str | None = None,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        if shard_size < 1:
+            raise ValueError(f"Shard size must be at least 1, got {shard_size}")
+        if format is not None and format not in FORMATS:
+            raise ValueError(
+                f"Unknown storage format: {format!r}. Choose from: {', '.join(FORMATS)}"
+            )
+        _check_durability(durability)
+        self.path = Path(path or ".todo.d")
+        self.durability = durability
+        self.manifest_path = self.path / MANIFEST_NAME
+        self.format = format or DEFAULT_FORMAT
+        self.shard_size = shard_size
+        self._high_water = 0
+        # Serialized todos per shard as last loaded or saved, to find dirty shards
+        self._known: dict[int, dict[int, dict]] | None = None
+        self._revision = 0
+        self._lock = DatabaseLock(
+            self.manifest_path, lambda: _ensure_parent_directory(self.manifest_path)
+        )
+
+    def lock(self, exclusive: bool = True) -> contextlib.AbstractContextManager[int | None]:
+        """Hold the database lock across several loads and saves."""
+        return self._lock.hold(exclusive)
+
+    def load(self) -> list[Todo]:
+        with self._lock.acquire(exclusive=False) as lock_fd:
+            self._revision = read_revision(lock_fd)
+            manifest = self._read_manifest()
+            shards = manifest["shards"]
+            # Decoding holds the GIL, so threads would not make this any faster
+            parts = [self._load_shard(index) for index in shards]
+
+        self._known = {
+            index: {todo.id: todo.to_record() for todo in part}
+            for index, part in zip(shards, parts, strict=True)
+        }
+        return [todo for part in parts for todo in part]
+
+    def iter_load(self) -> Iterator[Todo]:
+        yield from self.load()
+
+    def save(self, todos: Collection[Todo]) -> None:
+        """Rewrite the shards whose todos differ from the last load or save."""
+        # lock() rather than acquire(): the baseline load() below must reuse
+        # the held descriptor, or its shared flock would wait on our own lock
+        with self.lock() as lock_fd:
+            revision = read_revision(lock_fd)
+            if self._known is None:
+                self.load()
+            elif revision != self._revision:
+                raise ConflictError(
+                    f"'{self.path}' was changed by another process since it was loaded"
+                )
+
+            groups: dict[int, list[Todo]] = {}
+            for todo in todos:
+                groups.setdefault(self.shard_of(todo.id), []).append(todo)
+            known = self._known or {}
+            current = {
+                index: {todo.id: todo.to_record() for todo in part}
+                for index, part in groups.items()
+            }
+
+            high_water = max(self._high_water, *(max(part) for part in current.values()), 0)
+            added = [index for index in current if index not in known]
+            removed = [index for index in known if index not in current]
+            # New shards are written before the manifest lists them and
+            # dropped shards are unlisted before their files are removed, so
+            # the manifest never names a missing file.
+            for index, part in groups.items():
+                if known.get(index) != current[index]:
+                    self._write_shard(index, part)
+            if added or removed or high_water != self._high_water:
+                self._write_manifest(sorted(current), high_water)
+            for index in removed:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self._shard_path(index))
+
+            if lock_fd is not None:
+                write_revision(lock_fd, revision + 1)
+            self._revision = revision + 1
+            self._known = current
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        if isinstance(todos, TodoCollection):
+            base = todos.next_id()
+        else:
+            base = max((todo.id for todo in todos), default=0) + 1
+        return max(base, self._high_water + 1)
+
+    def shard_of(self, todo_id: int) -> int:
+        return (todo_id - 1) // self.shard_size
+
+    def get(self, todo_id: int) -> Todo | None:
+        with self._lock.acquire(exclusive=False):
+            manifest = self._read_manifest()
+            index = self.shard_of(todo_id)
+            if index not in manifest["shards"]:
+                return None
+            return next((t for t in self._load_shard(index) if t.id == todo_id), None)
+
+    def insert(self, text: str) -> Todo:
+        with self.lock() as lock_fd:
+            manifest = self._read_manifest()
+            todo = Todo(id=manifest["high_water"] + 1, text=text)
+            index = self.shard_of(todo.id)
+            shards = manifest["shards"]
+            part = self._load_shard(index) if index in shards else []
+            part.append(todo)
+            self._write_shard(index, part)
+            self._write_manifest(sorted({*shards, index}), todo.id)
+            bump_revision(lock_fd)
+        return todo
+
+    def set_done(self, todo_id: int, done: bool) -> Todo | None:
+        with self.lock() as lock_fd:
+            manifest = self._read_manifest()
+            index = self.shard_of(todo_id)
+            if index not in manifest["shards"]:
+                return None
+            part = self._load_shard(index)
+            todo = next((t for t in part if t.id == todo_id), None)
+            if todo is None:
+                return None
+            if done:
+                todo.mark_done()
+            else:
+                todo.mark_undone()
+            self._write_shard(index, part)
+            bump_revision(lock_fd)
+        return todo
+
+    def delete(self, todo_id: int) -> bool:
+        with self.lock() as lock_fd:
+            manifest = self._read_manifest()
+            index = self.shard_of(todo_id)
+            if index not in manifest["shards"]:
+                return False
+            part = self._load_shard(index)
+            remaining = [t for t in part if t.id != todo_id]
+            if len(remaining) == len(part):
+                return False
+            if remaining:
+                self._write_shard(index, remaining)
+            else:
+                shards = [i for i in manifest["shards"] if i != index]
+                self._write_manifest(shards, manifest["high_water"])
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self._shard_path(index))
+            bump_revision(lock_fd)
+        return True
+
+    def pending(self) -> list[Todo]:
+        return [todo for todo in self.load() if not todo.done]
+
+    def _shard_path(self, index: int) -> Path:
+        return self.path / f"shard-{index:06d}.json"
+
+    def _load_shard(self, index: int) -> list[Todo]:
+        todos = TodoStorage(str(self._shard_path(index))).load()
+        for todo in todos:
+            if self.shard_of(todo.id) != index:
+                raise ValueError(
+                    f"Todo #{todo.id} is stored in the wrong shard '{self._shard_path(index)}'"
+                )
+        return todos
+
+    def _write_shard(self, index: int, todos: list[Todo]) -> None:
+        _write_file_atomic(self._shard_path(index), encode(todos, self.format), self.durability)
+
+    def _read_manifest(self) -> dict:
+        try:
+            raw = self.manifest_path.read_bytes()
+        except FileNotFoundError:
+            return {"shard_size": self.shard_size, "high_water": 0, "shards": []}
+
+        try:
+            manifest = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid shard manifest '{self.manifest_path}': {e}") from e
+        if not isinstance(manifest, dict) or manifest.get("format") != _MANIFEST_MARKER:
+            raise ValueError(f"'{self.manifest_path}' is not a flywheel shard manifest")
+        version = manifest.get("version")
+        if not isinstance(version, int) or version > _MANIFEST_VERSION:
+            raise ValueError(f"Unsupported shard manifest version {version!r}")
+        shard_size, high_water = manifest.get("shard_size"), manifest.get("high_water")
+        shards = manifest.get("shards")
+        if (
+            not isinstance(shard_size, int)
+            or shard_size < 1
+            or not isinstance(high_water, int)
+            or not isinstance(shards, list)
+            or not all(isinstance(index, int) for index in shards)
+        ):
+            raise ValueError(f"Invalid shard manifest '{self.manifest_path}'")
+
+        self.shard_size = shard_size
+        self._high_water = high_water
+        return manifest
+
+    def _write_manifest(self, shards: list[int], high_water: int) -> None:
+        manifest = {
+            "format": _MANIFEST_MARKER,
+            "version": _MANIFEST_VERSION,
+            "shard_size": self.shard_size,
+            "high_water": high_water,
+            "shards": shards,
+        }
+        _write_file_atomic(
+            self.manifest_path, json.dumps(manifest).encode("utf-8"), self.durability
+        )
+        self._high_water = high_water
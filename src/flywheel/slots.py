@@ -0,0 +1,472 @@
+"""Slot-file todo storage: fixed-size records, texts in a separate heap.
+
+The database file holds a header and one fixed-size slot per todo, sorted by
+id; every string lives in a heap file beside it:
+
+    header  magic, version, flags, slot count, id high-water mark,
+            free list head, free slot count, heap generation
+    slot    id, created_at, flags, updated_at, text offset, text length
+
+Timestamps are epoch microseconds, or (with their _TEXT flag set, as in the
+binary format) the byte length of a string stored in the heap after the
+text. Because a slot has a fixed size and position, marking a todo done or
+undone is one ``pwrite`` of its flags and ``updated_at`` (9 bytes), and a
+lookup is a binary search over the slots.
+
+New todos take the next id above the high-water mark, so appending their
+slot keeps the file sorted. A removed todo's slot is flagged free and
+pushed onto the free list (its text offset links to the next free slot);
+it keeps its id so the binary search still works. Free slots and the heap
+bytes they point to are reclaimed by ``vacuum()``, which rewrites both
+files and runs by itself once half of the slots are free.
+
+Rewrites (``save()`` and ``vacuum()``) write a new heap generation
+``<db>.heap-<n>`` before atomically replacing the slot file that names it,
+so a crash leaves either the old or the new pair, never a mix.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import struct
+from collections.abc import Collection, Iterator
+from pathlib import Path
+
+from .collection import TodoCollection
+from .locking import (
+    ConflictError,
+    DatabaseLock,
+    bump_revision,
+    read_revision,
+    write_revision,
+)
+from .storage import (
+    DEFAULT_DURABILITY,
+    _check_durability,
+    _ensure_parent_directory,
+    _group_flusher,
+    _write_file_atomic,
+)
+from .todo import Todo, _now_us
+
+SLOTS_MAGIC = b"FLYWSLOT"
+_VERSION = 1
+
+# magic, version, flags (reserved), slot count, high-water id, free list head
+# (slot index + 1, 0 when empty), free slot count, heap generation
+_HEADER = struct.Struct("<8sHHQQQQQ")
+# id, created_at, flags, updated_at, text offset (next free slot + 1 for a
+# free slot), text length. flags and updated_at are adjacent so a status
+# change is a single write.
+_SLOT = struct.Struct("<qqBqQI")
+_STATUS = struct.Struct("<Bq")
+_STATUS_OFFSET = 16
+
+_DONE = 1
+_FREE = 2
+_CREATED_TEXT = 4
+_UPDATED_TEXT = 8
+
+# vacuum() runs by itself once at least this many slots, and half of all
+# slots, are free
+_AUTO_VACUUM_MIN_FREE = 64
+
+
+def heap_path_for(path: Path, generation: int) -> Path:
+    """Return the heap file of generation ``generation`` of slot file ``path``."""
+    return path.with_name(f"{path.name}.heap-{generation}")
+
+
+def _pread(fd: int, size: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)  # pragma: no cover - Windows
+    return os.read(fd, size)
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+        return
+    os.lseek(fd, offset, os.SEEK_SET)  # pragma: no cover - Windows
+    os.write(fd, data)
+
+
+class _Header:
+    """Mutable view of a slot file header."""
+
+    __slots__ = ("free_count", "free_head", "generation", "high_water", "slot_count")
+
+    def __init__(
+        self,
+        slot_count: int = 0,
+        high_water: int = 0,
+        free_head: int = 0,
+        free_count: int = 0,
+        generation: int = 0,
+    ) -> None:
+        self.slot_count = slot_count
+        self.high_water = high_water
+        self.free_head = free_head
+        self.free_count = free_count
+        self.generation = generation
+
+    def pack(self) -> bytes:
+        return _HEADER.pack(
+            SLOTS_MAGIC,
+            _VERSION,
+            0,
+            self.slot_count,
+            self.high_water,
+            self.free_head,
+            self.free_count,
+            self.generation,
+        )
+
+
+class SlotStorage:
+    """Todo storage in a slot file with in-place status updates.
+
+    Implements the RecordStore methods (``get``, ``insert``, ``set_done``,
+    ``delete``, ``pending``) directly on the file: ``set_done`` writes 9
+    bytes in place, ``insert`` appends to the heap and the slot array, and
+    ``delete`` frees a slot. ``load()``/``save()`` read and rewrite
+    everything, for the operations that work on the whole collection.
+
+    Writers hold the exclusive lock of the sidecar lock file; ``save()``
+    raises ConflictError when another process changed the database since
+    this instance loaded it. In-place writes follow ``durability``: fsync
+    per write (durable), batched fsync (group) or none (fast).
+    """
+
+    def __init__(self, path: str | None = None, durability: str = DEFAULT_DURABILITY) -> None:
+        _check_durability(durability)
+        self.path = Path(path or ".todo.slots")
+        self.durability = durability
+        self._revision: int | None = None
+        self._lock = DatabaseLock(self.path, lambda: _ensure_parent_directory(self.path))
+
+    def lock(self, exclusive: bool = True) -> contextlib.AbstractContextManager[int | None]:
+        """Hold the database lock across several loads and saves."""
+        return self._lock.hold(exclusive)
+
+    def load(self) -> list[Todo]:
+        with self._lock.acquire(exclusive=False) as lock_fd:
+            self._revision = read_revision(lock_fd)
+            fd = self._open(os.O_RDONLY)
+            if fd is None:
+                return []
+            try:
+                header = self._read_header(fd)
+                slots = _pread(fd, header.slot_count * _SLOT.size, _HEADER.size)
+            finally:
+                os.close(fd)
+            heap = self._read_heap(header.generation)
+
+        todos = []
+        for index, fields in enumerate(_SLOT.iter_unpack(slots)):
+            if not fields[2] & _FREE:
+                todos.append(self._todo(fields, heap, 0, index))
+        return todos
+
+    def iter_load(self) -> Iterator[Todo]:
+        yield from self.load()
+
+    def save(self, todos: Collection[Todo]) -> None:
+        """Rewrite the slot file and a new heap generation with ``todos``."""
+        with self.lock() as lock_fd:
+            revision = read_revision(lock_fd)
+            if self._revision is not None and revision != self._revision:
+                raise ConflictError(
+                    f"'{self.path}' was changed by another process since it was loaded"
+                )
+            self._rewrite(todos)
+            if lock_fd is not None:
+                write_revision(lock_fd, revision + 1)
+            self._revision = revision + 1
+
+    def vacuum(self) -> int:
+        """Drop free slots and unreferenced heap bytes; returns the slots reclaimed."""
+        with self.lock() as lock_fd:
+            header = self._header()
+            if header is None or not header.free_count:
+                return 0
+            # Like a single-item write: a save() of todos loaded before this
+            # one still has to reload
+            loaded = self._revision
+            todos = self.load()
+            self._revision = loaded
+            self._rewrite(todos)
+            bump_revision(lock_fd)
+        return header.free_count
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        if isinstance(todos, TodoCollection):
+            base = todos.next_id()
+        else:
+            base = max((todo.id for todo in todos), default=0) + 1
+        header = self._header()
+        return max(base, (header.high_water if header is not None else 0) + 1)
+
+    def get(self, todo_id: int) -> Todo | None:
+        with self._lock.acquire(exclusive=False):
+            fd = self._open(os.O_RDONLY)
+            if fd is None:
+                return None
+            try:
+                header = self._read_header(fd)
+                found = self._find(fd, header, todo_id)
+                if found is None:
+                    return None
+                index, fields = found
+                return self._read_todo(header, fields, index)
+            finally:
+                os.close(fd)
+
+    def insert(self, text: str) -> Todo:
+        with self.lock() as lock_fd:
+            if self._header() is None:
+                self._rewrite([])
+            fd = self._open(os.O_RDWR)
+            if fd is None:
+                # Only possible if the file was deleted by hand under our lock
+                raise FileNotFoundError(f"Todo database '{self.path}' disappeared")
+            try:
+                header = self._read_header(fd)
+                todo = Todo(id=header.high_water + 1, text=text)
+                data = todo.text.encode("utf-8")
+                heap_path = heap_path_for(self.path, header.generation)
+                # The heap bytes go first: a crash before the slot is counted
+                # in the header only leaves unreferenced heap bytes behind
+                heap_fd = os.open(heap_path, os.O_RDWR | getattr(os, "O_NOFOLLOW", 0))
+                try:
+                    offset = os.fstat(heap_fd).st_size
+                    _pwrite(heap_fd, data, offset)
+                    self._flush(heap_fd, heap_path)
+                finally:
+                    os.close(heap_fd)
+                slot = _SLOT.pack(todo.id, todo.created_us, 0, todo.updated_us, offset, len(data))
+                _pwrite(fd, slot, _HEADER.size + header.slot_count * _SLOT.size)
+                header.slot_count += 1
+                header.high_water = todo.id
+                _pwrite(fd, header.pack(), 0)
+                self._flush(fd, self.path)
+            finally:
+                os.close(fd)
+            bump_revision(lock_fd)
+        return todo
+
+    def set_done(self, todo_id: int, done: bool) -> Todo | None:
+        with self.lock() as lock_fd:
+            fd = self._open(os.O_RDWR)
+            if fd is None:
+                return None
+            try:
+                header = self._read_header(fd)
+                found = self._find(fd, header, todo_id)
+                if found is None:
+                    return None
+                index, (todo_id, created, flags, _updated, offset, length) = found
+                # updated_at becomes a plain timestamp, whatever it was before
+                flags = (flags & ~(_DONE | _UPDATED_TEXT)) | (_DONE if done else 0)
+                now = _now_us()
+                slot_offset = _HEADER.size + index * _SLOT.size
+                _pwrite(fd, _STATUS.pack(flags, now), slot_offset + _STATUS_OFFSET)
+                self._flush(fd, self.path)
+                fields = (todo_id, created, flags, now, offset, length)
+                todo = self._read_todo(header, fields, index)
+            finally:
+                os.close(fd)
+            bump_revision(lock_fd)
+        return todo
+
+    def delete(self, todo_id: int) -> bool:
+        with self.lock() as lock_fd:
+            fd = self._open(os.O_RDWR)
+            if fd is None:
+                return False
+            try:
+                header = self._read_header(fd)
+                found = self._find(fd, header, todo_id)
+                if found is None:
+                    return False
+                index, (todo_id, created, flags, updated, _offset, length) = found
+                link = header.free_head
+                slot = _SLOT.pack(todo_id, created, flags | _FREE, updated, link, length)
+                _pwrite(fd, slot, _HEADER.size + index * _SLOT.size)
+                header.free_head = index + 1
+                header.free_count += 1
+                _pwrite(fd, header.pack(), 0)
+                self._flush(fd, self.path)
+            finally:
+                os.close(fd)
+            bump_revision(lock_fd)
+            if (
+                header.free_count >= _AUTO_VACUUM_MIN_FREE
+                and header.free_count * 2 >= header.slot_count
+            ):
+                self.vacuum()
+        return True
+
+    def pending(self) -> list[Todo]:
+        return [todo for todo in self.load() if not todo.done]
+
+    def free_slots(self) -> list[int]:
+        """Return the indexes on the free list, most recently freed first."""
+        with self._lock.acquire(exclusive=False):
+            fd = self._open(os.O_RDONLY)
+            if fd is None:
+                return []
+            try:
+                header = self._read_header(fd)
+                free: list[int] = []
+                link = header.free_head
+                while link and len(free) < header.free_count:
+                    free.append(link - 1)
+                    link = self._read_slot(fd, link - 1)[4]
+                return free
+            finally:
+                os.close(fd)
+
+    def _open(self, flags: int) -> int | None:
+        try:
+            # Security: never follow a symlink planted at the database path
+            return os.open(self.path, flags | getattr(os, "O_NOFOLLOW", 0))
+        except FileNotFoundError:
+            return None
+
+    def _flush(self, fd: int, path: Path) -> None:
+        if self.durability == "durable":
+            os.fsync(fd)
+        elif self.durability == "group":
+            _group_flusher().add(path)
+
+    def _header(self) -> _Header | None:
+        fd = self._open(os.O_RDONLY)
+        if fd is None:
+            return None
+        try:
+            return self._read_header(fd)
+        finally:
+            os.close(fd)
+
+    def _read_header(self, fd: int) -> _Header:
+        raw = _pread(fd, _HEADER.size, 0)
+        if len(raw) < _HEADER.size or not raw.startswith(SLOTS_MAGIC):
+            raise ValueError(f"'{self.path}' is not a flywheel slot file")
+        _magic, version, _flags, *fields = _HEADER.unpack(raw)
+        if version > _VERSION:
+            raise ValueError(f"Unsupported slot file version {version!r} in '{self.path}'")
+        header = _Header(*fields)
+        if os.fstat(fd).st_size < _HEADER.size + header.slot_count * _SLOT.size:
+            raise ValueError(f"Truncated slot file '{self.path}'")
+        return header
+
+    def _read_slot(self, fd: int, index: int) -> tuple:
+        return _SLOT.unpack(_pread(fd, _SLOT.size, _HEADER.size + index * _SLOT.size))
+
+    def _find(self, fd: int, header: _Header, todo_id: int) -> tuple[int, tuple] | None:
+        """Binary-search the slots for a live ``todo_id``; returns (index, fields)."""
+        low, high = 0, header.slot_count
+        while low < high:
+            middle = (low + high) // 2
+            fields = self._read_slot(fd, middle)
+            if fields[0] < todo_id:
+                low = middle + 1
+            elif fields[0] > todo_id:
+                high = middle
+            else:
+                return None if fields[2] & _FREE else (middle, fields)
+        return None
+
+    def _read_heap(self, generation: int) -> bytes:
+        path = heap_path_for(self.path, generation)
+        try:
+            with path.open("rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ValueError(f"Missing heap file '{path}' of slot file '{self.path}'") from None
+
+    def _read_todo(self, header: _Header, fields: tuple, index: int) -> Todo:
+        """Build the todo of slot ``fields``, reading only its heap bytes."""
+        _id, created, flags, updated, offset, length = fields
+        if flags & _CREATED_TEXT:
+            length += created
+        if flags & _UPDATED_TEXT:
+            length += updated
+        path = heap_path_for(self.path, header.generation)
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except FileNotFoundError:
+            raise ValueError(f"Missing heap file '{path}' of slot file '{self.path}'") from None
+        try:
+            data = _pread(fd, length, offset)
+        finally:
+            os.close(fd)
+        return self._todo(fields, data, offset, index)
+
+    def _todo(self, fields: tuple, heap: bytes, base: int, index: int) -> Todo:
+        """Build the todo of slot ``fields`` from ``heap``, which starts at offset ``base``."""
+        todo_id, created, flags, updated, offset, length = fields
+        start = offset - base
+        end = start + length
+        strings = []
+        for flag, size in ((_CREATED_TEXT, created), (_UPDATED_TEXT, updated)):
+            if flags & flag:
+                strings.append((end, end + size))
+                end += size
+        if start < 0 or end > len(heap):
+            raise ValueError(f"Slot #{index + 1} of '{self.path}' points outside its heap")
+        try:
+            text = heap[start : start + length].decode("utf-8")
+            if flags & _CREATED_TEXT:
+                created = heap[slice(*strings.pop(0))].decode("utf-8")
+            if flags & _UPDATED_TEXT:
+                updated = heap[slice(*strings.pop(0))].decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise ValueError(
+                f"Invalid UTF-8 in the heap of '{self.path}' at slot #{index + 1}"
+            ) from e
+        return Todo(todo_id, text, bool(flags & _DONE), created, updated)
+
+    def _rewrite(self, todos: Collection[Todo]) -> None:
+        """Write ``todos`` to a new heap generation and slot file, then drop the old heap."""
+        _ensure_parent_directory(self.path)
+        old = self._header()
+        header = _Header(generation=(old.generation + 1) if old is not None else 0)
+        header.high_water = max(
+            old.high_water if old is not None else 0,
+            max((todo.id for todo in todos), default=0),
+        )
+
+        heap: list[bytes] = []
+        slots: list[bytes] = []
+        offset = 0
+        for todo in sorted(todos, key=lambda todo: todo.id):
+            text = todo.text.encode("utf-8")
+            flags = _DONE if todo.done else 0
+            strings = []
+            created, updated = todo.created_us, todo.updated_us
+            if created is None:
+                strings.append(todo.created_at.encode("utf-8"))
+                flags |= _CREATED_TEXT
+                created = len(strings[-1])
+            if updated is None:
+                strings.append(todo.updated_at.encode("utf-8"))
+                flags |= _UPDATED_TEXT
+                updated = len(strings[-1])
+            try:
+                slots.append(_SLOT.pack(todo.id, created, flags, updated, offset, len(text)))
+            except struct.error as e:
+                raise ValueError(f"Todo #{todo.id} cannot be stored in a slot file: {e}") from e
+            heap.extend((text, *strings))
+            offset += len(text) + sum(len(string) for string in strings)
+        header.slot_count = len(slots)
+
+        heap_path = heap_path_for(self.path, header.generation)
+        _write_file_atomic(heap_path, b"".join(heap), self.durability)
+        _write_file_atomic(self.path, header.pack() + b"".join(slots), self.durability)
+        if old is not None and old.generation != header.generation:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(heap_path_for(self.path, old.generation))
@@ -0,0 +1,204 @@
+"""SQLite-backed todo storage."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import stat
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from .locking import ConflictError
+from .storage import DEFAULT_DURABILITY, _check_durability, _ensure_parent_directory
+from .todo import Todo, _utc_now_iso
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0 CHECK (done IN (0, 1)),
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+) STRICT;
+CREATE INDEX IF NOT EXISTS todos_done_id ON todos (done, id);
+"""
+
+_COLUMNS = "id, text, done, created_at, updated_at"
+
+_UPSERT = (
+    f"INSERT INTO todos ({_COLUMNS}) VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+    "text = excluded.text, done = excluded.done, "
+    "created_at = excluded.created_at, updated_at = excluded.updated_at"
+)
+
+# PRAGMA synchronous per durability mode. NORMAL skips the per-commit sync of
+# the journal and leaves flushing to SQLite's checkpoints, its own grouping.
+_SYNCHRONOUS = {"fast": "OFF", "durable": "FULL", "group": "NORMAL"}
+
+
+class SqliteStorage:
+    """Persistent storage for todos in a SQLite database.
+
+    ``id`` is the table's INTEGER PRIMARY KEY (the rowid b-tree) and
+    ``(done, id)`` carries a secondary index, so single-item operations and
+    the pending listing are indexed statements rather than full scans.
+    ``durability`` maps to SQLite's ``synchronous`` setting.
+
+    ``save()`` writes only the rows that differ from the last ``load()`` and
+    deletes the ids that were dropped. It raises ConflictError when another
+    connection committed in between, unless both ran under ``lock()``.
+    """
+
+    def __init__(self, path: str | None = None, durability: str = DEFAULT_DURABILITY) -> None:
+        _check_durability(durability)
+        self.path = Path(path or ".todo.sqlite")
+        self.durability = durability
+        self._conn: sqlite3.Connection | None = None
+        # Rows as of the last load or save (id -> row), to diff on save
+        self._known: dict[int, tuple] | None = None
+        # PRAGMA data_version at that load; changes when others commit
+        self._data_version: int | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            _ensure_parent_directory(self.path)
+            if not self.path.exists():
+                # Create the file owner read/write only before SQLite opens it
+                fd = os.open(
+                    self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, stat.S_IRUSR | stat.S_IWUSR
+                )
+                os.close(fd)
+            conn = sqlite3.connect(self.path)
+            conn.execute(f"PRAGMA synchronous = {_SYNCHRONOUS[self.durability]}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @contextmanager
+    def lock(self, exclusive: bool = True) -> Iterator[None]:
+        """Hold a write transaction (``BEGIN IMMEDIATE``) across loads and saves.
+
+        Other writers wait until the block exits; it commits then, or rolls
+        back on an exception. Nested ``lock()`` calls and writes reuse the
+        open transaction.
+        """
+        conn = self._connection()
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            self._known = None
+            raise
+        conn.commit()
+
+    def load(self) -> list[Todo]:
+        conn = self._connection()
+        # Read before the rows: a commit in between then shows as a conflict
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        todos = list(self.iter_load())
+        self._known = {todo.id: _todo_to_row(todo) for todo in todos}
+        self._data_version = version
+        return todos
+
+    def iter_load(self) -> Iterator[Todo]:
+        rows = self._connection().execute(f"SELECT {_COLUMNS} FROM todos ORDER BY id")
+        for row in rows:
+            yield _row_to_todo(row)
+
+    def save(self, todos: Collection[Todo]) -> None:
+        """Upsert the changed rows and delete the removed ids in one transaction."""
+        rows = {todo.id: _todo_to_row(todo) for todo in todos}
+        with self.lock():
+            conn = self._connection()
+            known = self._known
+            if known is None:
+                known = {row[0]: row for row in conn.execute(f"SELECT {_COLUMNS} FROM todos")}
+            elif conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+                raise ConflictError(
+                    f"'{self.path}' was changed by another process since it was loaded"
+                )
+            conn.executemany(
+                "DELETE FROM todos WHERE id = ?", [(todo_id,) for todo_id in known.keys() - rows]
+            )
+            conn.executemany(
+                _UPSERT, [row for todo_id, row in rows.items() if known.get(todo_id) != row]
+            )
+        self._known = rows
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        return (max((todo.id for todo in todos), default=0) + 1) if todos else 1
+
+    def get(self, todo_id: int) -> Todo | None:
+        row = (
+            self._connection()
+            .execute(f"SELECT {_COLUMNS} FROM todos WHERE id = ?", (todo_id,))
+            .fetchone()
+        )
+        return _row_to_todo(row) if row else None
+
+    def insert(self, text: str) -> Todo:
+        # A NULL INTEGER PRIMARY KEY takes max(id) + 1, matching next_id()
+        now = _utc_now_iso()
+        conn = self._connection()
+        with self.lock():
+            row = conn.execute(
+                f"INSERT INTO todos ({_COLUMNS}) VALUES (NULL, ?, 0, ?, ?) RETURNING {_COLUMNS}",
+                (text, now, now),
+            ).fetchone()
+        self._remember(row[0], row)
+        return _row_to_todo(row)
+
+    def set_done(self, todo_id: int, done: bool) -> Todo | None:
+        conn = self._connection()
+        with self.lock():
+            row = conn.execute(
+                f"UPDATE todos SET done = ?, updated_at = ? WHERE id = ? RETURNING {_COLUMNS}",
+                (int(done), _utc_now_iso(), todo_id),
+            ).fetchone()
+        if row is None:
+            return None
+        self._remember(todo_id, row)
+        return _row_to_todo(row)
+
+    def delete(self, todo_id: int) -> bool:
+        conn = self._connection()
+        with self.lock():
+            cursor = conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        self._remember(todo_id, None)
+        return cursor.rowcount > 0
+
+    def _remember(self, todo_id: int, row: tuple | None) -> None:
+        """Keep the last-load rows in step with our own single-row writes."""
+        if self._known is not None:
+            if row is None:
+                self._known.pop(todo_id, None)
+            else:
+                self._known[todo_id] = row
+
+    def pending(self) -> list[Todo]:
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM todos WHERE done = 0 ORDER BY id"
+        )
+        return [_row_to_todo(row) for row in rows]
+
+
+def _todo_to_row(todo: Todo) -> tuple:
+    return (todo.id, todo.text, int(todo.done), todo.created_at, todo.updated_at)
+
+
+def _row_to_todo(row: tuple) -> Todo:
+    # STRICT table types already guarantee what Todo.from_dict would validate
+    todo_id, text, done, created_at, updated_at = row
+    return Todo(
+        id=todo_id, text=text, done=bool(done), created_at=created_at, updated_at=updated_at
+    )
@@ -1,18 +1,78 @@
-"""JSON-backed todo storage."""
+"""File-backed todo storage."""
 
 from __future__ import annotations
 
 import contextlib
-import json
+import copy
+import io
 import os
 import stat
-import tempfile
+import time
+from collections.abc import Collection, Iterator
 from pathlib import Path
+from typing import BinaryIO
 
-from .todo import Todo
+from . import profiling
+from .collection import TodoCollection
+from .formats import (
+    _MAX_TODO_COUNT,
+    DEFAULT_FORMAT,
+    FORMATS,
+    detect_format,
+    encode,
+    read_counts,
+    read_records,
+    read_trusted,
+)
+from .locking import ConflictError, DatabaseLock, read_revision, write_revision
+from .todo import Todo, _now_us
 
-# Maximum JSON file size to prevent DoS attacks (10MB)
-_MAX_JSON_SIZE_BYTES = 10 * 1024 * 1024
+# How save() makes a write durable:
+# - fast: no fsync at all; for bulk and batch jobs that can redo their work
+# - durable: fsync the temp file before os.replace and the directory after it
+# - group: no fsync per save; files written within _GROUP_WINDOW are flushed
+#   together (and at interpreter exit). A crash inside the window can roll
+#   back to an earlier save, and on filesystems that do not order a rename
+#   after the renamed file's data (ext4 and btrfs do) leave an empty file.
+DURABILITY_MODES = ("fast", "durable", "group")
+DEFAULT_DURABILITY = "durable"
+
+# Seconds group mode collects saves before flushing them together (50ms)
+_GROUP_WINDOW = 0.05
+
+
+class StorageMetrics:
+    """I/O counters of one TodoStorage since it was created.
+
+    ``parse_ns`` is the time ``load()`` spent decoding and validating;
+    ``iter_load()`` hands each record to its caller as soon as it is
+    decoded, so its loads count records and bytes but no time.
+    ``encode_ns`` is the time ``save()`` spent serializing.
+    """
+
+    __slots__ = (
+        "bytes_read",
+        "bytes_written",
+        "encode_ns",
+        "loads",
+        "parse_ns",
+        "records_read",
+        "records_written",
+        "saves",
+    )
+
+    def __init__(self) -> None:
+        self.loads = 0
+        self.saves = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.records_read = 0
+        self.records_written = 0
+        self.parse_ns = 0
+        self.encode_ns = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
 
 
 def _ensure_parent_directory(file_path: Path) -> None:
@@ -51,38 +111,243 @@ def _ensure_parent_directory(file_path: Path) -> None:
 
 
 class TodoStorage:
-    """Persistent storage for todos."""
+    """Persistent storage for todos.
+
+    ``format`` selects the encoding written by ``save()``. When it is None the
+    format of the existing file is kept (detected on load), and new files are
+    written in DEFAULT_FORMAT. Reading always auto-detects the format.
+
+    With ``cache=True`` the parsed todos are kept between calls and reused
+    while the file's (st_mtime_ns, st_size, st_ino) is unchanged, which is
+    meant for long-lived processes that read far more often than they
+    write. Callers always receive copies, and ``save()`` refreshes the
+    cache with what it wrote. ``cache_hits``/``cache_misses`` count lookups.
 
-    def __init__(self, path: str | None = None) -> None:
+    Concurrent processes are coordinated through the sidecar lock file (see
+    ``flywheel.locking``). Loading records the database revision and file
+    stat; ``save()`` takes the exclusive lock and raises ConflictError if
+    either changed since, instead of silently dropping the other writer's
+    update. A save without a prior load overwrites unconditionally.
+
+    ``durability`` is one of DURABILITY_MODES and picks the fsync policy of
+    ``save()``; see the comment on DURABILITY_MODES.
+
+    ``metrics`` (a StorageMetrics) counts loads, saves, bytes and records
+    read and written, and the time spent parsing and encoding.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        format: str | None = None,
+        cache: bool = False,
+        durability: str = DEFAULT_DURABILITY,
+    ) -> None:
+        if format is not None and format not in FORMATS:
+            raise ValueError(
+                f"Unknown storage format: {format!r}. Choose from: {', '.join(FORMATS)}"
+            )
+        _check_durability(durability)
         self.path = Path(path or ".todo.json")
+        self.format = format
+        self.durability = durability
+        self._file_format: str | None = None
+        self.cache = cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.metrics = StorageMetrics()
+        # (stat key, parsed todos) of the file contents last read or written
+        self._cached: tuple[tuple[int, int, int], Collection[Todo]] | None = None
+        # (revision, stat key) of the database as last loaded or saved
+        self._version: tuple[int, tuple[int, int, int] | None] | None = None
+        self._lock = DatabaseLock(self.path, lambda: _ensure_parent_directory(self.path))
+
+    def lock(self, exclusive: bool = True) -> contextlib.AbstractContextManager[int | None]:
+        """Hold the database lock across several loads and saves.
+
+        Yields the lock file descriptor. Nested ``lock()``, ``load()`` and
+        ``save()`` calls reuse the held lock. Used for batches that cannot be
+        retried on conflict.
+        """
+        return self._lock.hold(exclusive)
+
+    def _open_versioned(self) -> BinaryIO | None:
+        """Open the database and record its version, or None if it is missing.
+
+        The shared lock is only held while the version is captured; decoding
+        then reads the already open file, which a concurrent atomic replace
+        cannot change, so readers never hold up writers for long.
+        """
+        with self._lock.acquire(exclusive=False) as lock_fd:
+            revision = read_revision(lock_fd)
+            try:
+                f = self.path.open("rb")
+            except FileNotFoundError:
+                self._version = (revision, None)
+                return None
+            self._version = (revision, _stat_key(os.fstat(f.fileno())))
+            return f
+
+    def check_unchanged(self, lock_fd: int | None) -> int:
+        """Raise ConflictError if the database changed since it was last loaded.
+
+        Must be called with the exclusive lock held; returns the current
+        revision.
+        """
+        revision = read_revision(lock_fd)
+        if self._version is None:
+            return revision
+        try:
+            key = _stat_key(os.stat(self.path))
+        except FileNotFoundError:
+            key = None
+        if self._version != (revision, key):
+            raise ConflictError(f"'{self.path}' was changed by another process since it was loaded")
+        return revision
 
     def load(self) -> list[Todo]:
-        if not self.path.exists():
+        """Return all todos.
+
+        A compact or binary file whose records checksum matches (one this
+        storage wrote and nobody edited since) is decoded without validating
+        each record; see ``formats.read_trusted``. Anything else goes through
+        the same validation as ``iter_load()``.
+        """
+        self.metrics.loads += 1
+        f = self._open_versioned()
+        if f is None:
+            self._cached = None
             return []
 
-        # Security: Check file size before loading to prevent DoS
-        file_size = self.path.stat().st_size
-        if file_size > _MAX_JSON_SIZE_BYTES:
-            size_mb = file_size / (1024 * 1024)
-            limit_mb = _MAX_JSON_SIZE_BYTES / (1024 * 1024)
-            raise ValueError(
-                f"JSON file too large ({size_mb:.1f}MB > {limit_mb:.0f}MB limit). "
-                f"This protects against denial-of-service attacks."
-            )
+        with f:
+            if not self.cache:
+                return self._decode_all(f)
+            # The key comes from the open file, so a concurrent replace can only cause a miss
+            key = _stat_key(os.fstat(f.fileno()))
+            cached = self._cached
+            if cached is not None and cached[0] == key:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+                cached = self._cached = (key, self._decode_all(f))
+        return [copy.copy(todo) for todo in cached[1]]
 
+    def iter_load(self) -> Iterator[Todo]:
+        """Yield validated todos one at a time while the file is decoded.
+
+        Pretty files are decoded record by record, so peak memory is bounded
+        by one read chunk plus the largest record rather than by the file
+        size. Compact and binary files are read whole, as their checksum
+        covers the whole file, and take the trusted path of ``load()`` when
+        it matches. Security: each record is limited to _MAX_RECORD_CHARS
+        and the database to _MAX_TODO_COUNT todos to prevent DoS.
+        """
+        if self.cache:
+            yield from self.load()
+            return
+
+        self.metrics.loads += 1
+        f = self._open_versioned()
+        if f is None:
+            return
+
+        with f:
+            pretty = detect_format(f.read(16)) == "pretty"
+            f.seek(0)
+            if pretty:
+                yield from self._decode(f)
+                return
+            with profiling.phase("read"):
+                data = f.read()
+            todos = self._decode_trusted(data, f.fileno())
+        yield from todos if todos is not None else self._decode(io.BytesIO(data))
+
+    def counts(self) -> tuple[int, int]:
+        """Return the number of todos and of done todos.
+
+        Read from the file header when it has them and the checksum over
+        them and the records matches (see ``formats.read_counts``),
+        otherwise by decoding every record, which counts as a load.
+        """
+        with self._lock.acquire(exclusive=False):
+            try:
+                f = self.path.open("rb")
+            except FileNotFoundError:
+                return 0, 0
+        with f:
+            data = f.read()
+            counts = read_counts(data, f.fileno())
+        if counts is not None:
+            self.metrics.bytes_read += len(data)
+            return counts
+
+        self.metrics.loads += 1
+        start = time.perf_counter_ns()
+        total = done = 0
         try:
-            raw = json.loads(self.path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError as e:
-            raise ValueError(
-                f"Invalid JSON in '{self.path}': {e.msg}. "
-                f"Check line {e.lineno}, column {e.colno}."
-            ) from e
+            # _decode() counts the bytes it reads
+            for todo in self._decode(io.BytesIO(data)):
+                total += 1
+                done += todo.done
+        finally:
+            self.metrics.parse_ns += time.perf_counter_ns() - start
+        return total, done
 
-        if not isinstance(raw, list):
-            raise ValueError("Todo storage must be a JSON list")
-        return [Todo.from_dict(item) for item in raw]
+    def _decode_all(self, f: BinaryIO) -> list[Todo]:
+        with profiling.phase("read"):
+            data = f.read()
+        todos = self._decode_trusted(data, f.fileno())
+        if todos is not None:
+            return todos
+        start = time.perf_counter_ns()
+        try:
+            return list(self._decode(io.BytesIO(data)))
+        finally:
+            self.metrics.parse_ns += time.perf_counter_ns() - start
+
+    def _decode_trusted(self, data: bytes, fd: int) -> list[Todo] | None:
+        """Decode ``data`` read from ``fd`` via ``read_trusted``; None if not trusted."""
+        start = time.perf_counter_ns()
+        try:
+            with profiling.phase("decode"):
+                trusted = read_trusted(data, fd)
+        finally:
+            self.metrics.parse_ns += time.perf_counter_ns() - start
+        if trusted is None:
+            return None
+        self._file_format, todos = trusted
+        self.metrics.bytes_read += len(data)
+        self.metrics.records_read += len(todos)
+        return todos
+
+    def _decode(self, f: BinaryIO) -> Iterator[Todo]:
+        self._file_format, records = read_records(f, self.path)
+        from_dict = Todo.from_dict
+        timer = profiling.active()
+        if timer is not None:
+            records = timer.timed_iter("decode", records)
+            from_dict = timer.timed("validate", from_dict)
+        # Records without timestamps all get this one clock read
+        now = _now_us()
+        # Only compact and binary records store timestamps as epoch microseconds
+        micros = self._file_format != "pretty"
+        count = 0
+        try:
+            for count, item in enumerate(records, start=1):
+                if count > _MAX_TODO_COUNT:
+                    raise ValueError(
+                        f"Too many todos in '{self.path}' (more than {_MAX_TODO_COUNT:,}). "
+                        f"This protects against denial-of-service attacks."
+                    )
+                if not isinstance(item, dict):
+                    raise ValueError(f"Invalid todo record #{count}: expected a JSON object")
+                yield from_dict(item, now, micros)
+        finally:
+            # Also when the caller stopped early
+            self.metrics.records_read += count
+            self.metrics.bytes_read += f.tell()
 
-    def save(self, todos: list[Todo]) -> None:
+    def save(self, todos: Collection[Todo]) -> None:
         """Save todos to file atomically.
 
         Uses write-to-temp-file + atomic rename pattern to prevent data loss
@@ -94,35 +359,191 @@ class TodoStorage:
         # Ensure parent directory exists (lazy creation, validated)
         _ensure_parent_directory(self.path)
 
-        payload = [todo.to_dict() for todo in todos]
-        content = json.dumps(payload, ensure_ascii=False, indent=2)
+        if self.cache:
+            todos = [copy.copy(todo) for todo in todos]
+        start = time.perf_counter_ns()
+        with profiling.phase("encode"):
+            content = encode(todos, self.output_format())
+        self.metrics.encode_ns += time.perf_counter_ns() - start
 
-        # Create temp file in same directory as target for atomic rename
-        # Use tempfile.mkstemp for unpredictable name and O_EXCL semantics
-        fd, temp_path = tempfile.mkstemp(
-            dir=self.path.parent,
-            prefix=f".{self.path.name}.",
-            suffix=".tmp",
-            text=False,  # We'll write binary data to control encoding
-        )
+        with self._lock.acquire(exclusive=True) as lock_fd:
+            revision = self.check_unchanged(lock_fd)
+            written = self._write_atomic(content)
+            self.metrics.saves += 1
+            self.metrics.bytes_written += len(content)
+            self.metrics.records_written += len(todos)
+            if lock_fd is not None:
+                write_revision(lock_fd, revision + 1)
+            self._version = (revision + 1, written)
 
-        try:
-            # Set restrictive permissions (owner read/write only)
-            # This protects against other users reading temp file before rename
-            os.fchmod(fd, stat.S_IRUSR | stat.S_IWUSR)  # 0o600 (rw-------)
+        # The renamed temp file keeps its inode, so its stat identifies what we wrote
+        if self.cache:
+            self._cached = (written, todos)
 
-            # Write content with proper encoding
-            # Use os.write instead of Path.write_text for more control
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(content)
+    def flush(self) -> None:
+        """Flush saves that group durability mode has not flushed yet."""
+        if _group is not None:
+            _group.flush()
 
-            # Atomic rename (os.replace is atomic on both Unix and Windows)
-            os.replace(temp_path, self.path)
+    def _write_atomic(self, content: bytes) -> tuple[int, int, int]:
+        try:
+            return _write_file_atomic(self.path, content, self.durability)
         except OSError:
-            # Clean up temp file on error
-            with contextlib.suppress(OSError):
-                os.unlink(temp_path)
+            self._cached = None
             raise
 
-    def next_id(self, todos: list[Todo]) -> int:
+    def output_format(self) -> str:
+        """Return the format the next ``save()`` will write."""
+        if self.format is not None:
+            return self.format
+        if self._file_format is None:
+            try:
+                with self.path.open("rb") as f:
+                    self._file_format = detect_format(f.read(16))
+            except FileNotFoundError:
+                return DEFAULT_FORMAT
+        return self._file_format
+
+    def migrate(self, format: str) -> int:
+        """Rewrite the database in ``format``; returns the number of todos."""
+        if format not in FORMATS:
+            raise ValueError(
+                f"Unknown storage format: {format!r}. Choose from: {', '.join(FORMATS)}"
+            )
+        todos = self.load()
+        self.format = format
+        self.save(todos)
+        return len(todos)
+
+    def next_id(self, todos: Collection[Todo]) -> int:
+        if isinstance(todos, TodoCollection):
+            return todos.next_id()
         return (max((todo.id for todo in todos), default=0) + 1) if todos else 1
+
+
+def _stat_key(st: os.stat_result) -> tuple[int, int, int]:
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _check_durability(durability: str) -> None:
+    if durability not in DURABILITY_MODES:
+        raise ValueError(
+            f"Unknown durability mode: {durability!r}. Choose from: {', '.join(DURABILITY_MODES)}"
+        )
+
+
+def _write_file_atomic(
+    path: Path, content: bytes, durability: str = DEFAULT_DURABILITY
+) -> tuple[int, int, int]:
+    """Replace ``path`` with ``content``; returns the new file's stat key."""
+    # Only write paths pay for importing tempfile
+    import tempfile
+
+    # Create temp file in same directory as target for atomic rename
+    # Use tempfile.mkstemp for unpredictable name and O_EXCL semantics
+    fd, temp_path = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+        text=False,  # We'll write binary data to control encoding
+    )
+
+    try:
+        # Set restrictive permissions (owner read/write only)
+        # This protects against other users reading temp file before rename
+        os.fchmod(fd, stat.S_IRUSR | stat.S_IWUSR)  # 0o600 (rw-------)
+
+        # Write already-encoded content
+        # Use os.write instead of Path.write_text for more control
+        with profiling.phase("write"), os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            if durability == "durable":
+                # The data has to be on disk before the rename can expose it
+                os.fsync(f.fileno())
+            written = _stat_key(os.fstat(f.fileno()))
+
+        # Atomic rename (os.replace is atomic on both Unix and Windows)
+        with profiling.phase("replace"):
+            os.replace(temp_path, path)
+    except OSError:
+        # Clean up temp file on error
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+    if durability == "durable":
+        # ... and the rename itself only survives a crash once the
+        # directory entry is flushed
+        with profiling.phase("replace"):
+            _fsync_directory(path.parent)
+    elif durability == "group":
+        _group_flusher().add(path)
+    return written
+
+
+def _fsync_directory(directory: Path) -> None:
+    flags = getattr(os, "O_DIRECTORY", None)
+    if flags is None:
+        # Windows cannot open directories; its renames are journaled by NTFS
+        return
+    fd = os.open(directory, os.O_RDONLY | flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _GroupFlusher:
+    """Flushes the files written in group durability mode, once per window.
+
+    The first write after a flush starts a timer; everything written until
+    it fires is fsynced by one pass that also flushes each directory once.
+    """
+
+    def __init__(self) -> None:
+        import atexit
+        import threading
+
+        self._mutex = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._pending: set[Path] = set()
+        atexit.register(self.flush)
+
+    def add(self, path: Path) -> None:
+        import threading
+
+        with self._mutex:
+            self._pending.add(path)
+            if self._timer is None:
+                self._timer = threading.Timer(_GROUP_WINDOW, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._mutex:
+            paths, self._pending = self._pending, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue  # removed since; nothing left to flush
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in {path.parent for path in paths}:
+            _fsync_directory(directory)
+
+
+_group: _GroupFlusher | None = None
+
+
+def _group_flusher() -> _GroupFlusher:
+    global _group
+    if _group is None:
+        _group = _GroupFlusher()
+    return _group
@@ -2,23 +2,150 @@
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
-from datetime import UTC, datetime
+import time
+
+# Timestamps are held as integer microseconds since the Unix epoch (UTC) and
+# only rendered as ISO 8601 strings at the edges: to_dict() and display. A
+# timestamp read as a string stays that string until something needs its
+# value, so loading and re-saving a pretty file converts nothing, and odd
+# hand-written values survive unchanged.
+
+# Lengths of the ISO strings _iso() produces, without and with microseconds
+_ISO_LENGTHS = (25, 32)
+
+# Epoch microseconds _iso() can render: 0001-01-01 to 9999-12-31 (datetime's range)
+_MIN_US = -62_135_596_800_000_000
+_MAX_US = 253_402_300_799_999_999
+
+
+def _now_us() -> int:
+    """Read the clock once, as epoch microseconds."""
+    return time.time_ns() // 1000
+
+
+# (second, rendered date and time) of the last _iso() call: todos saved
+# together mostly share their second
+_last_second: tuple[int, str] = (0, "1970-01-01T00:00:00")
+
+
+def _iso(us: int) -> str:
+    """Render epoch microseconds like ``datetime.isoformat()`` does for UTC."""
+    global _last_second
+    seconds, fraction = divmod(us, 1_000_000)
+    if seconds == _last_second[0]:
+        prefix = _last_second[1]
+    else:
+        try:
+            year, month, day, hour, minute, second = time.gmtime(seconds)[:6]
+        except (OverflowError, OSError, ValueError):
+            from datetime import UTC, datetime, timedelta
+
+            return (datetime(1970, 1, 1, tzinfo=UTC) + timedelta(microseconds=us)).isoformat()
+        prefix = f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}"
+        _last_second = (seconds, prefix)
+    return f"{prefix}.{fraction:06d}+00:00" if fraction else prefix + "+00:00"
 
 
 def _utc_now_iso() -> str:
-    return datetime.now(UTC).isoformat()
+    return _iso(_now_us())
+
+
+def _parse_us(value: str) -> int | None:
+    """Return epoch microseconds for ``value``, or None unless ``_iso()`` reproduces it."""
+    if len(value) not in _ISO_LENGTHS or not value.endswith("+00:00"):
+        return None
+    from datetime import UTC, datetime
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if len(value) == _ISO_LENGTHS[1] and parsed.microsecond == 0:
+        return None  # ".000000" would not survive a round trip
+    delta = parsed - datetime(1970, 1, 1, tzinfo=UTC)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
 
 
-@dataclass(slots=True)
 class Todo:
-    """Simple todo item."""
+    """Simple todo item.
 
-    id: int
-    text: str
-    done: bool = False
-    created_at: str = ""
-    updated_at: str = ""
+    Written out rather than as a ``@dataclass``: importing ``dataclasses``
+    pulls in ``inspect`` and costs more than the rest of the CLI's startup.
+
+    ``created_at``/``updated_at`` accept and return ISO 8601 strings;
+    ``created_us``/``updated_us`` give the same instants as epoch
+    microseconds for sorting and filtering. Mutators take an optional
+    ``now`` (epoch microseconds) so a batch can share one clock read.
+    """
+
+    __slots__ = ("_created", "_updated", "done", "id", "text")
+
+    def __init__(
+        self,
+        id: int,
+        text: str,
+        done: bool = False,
+        created_at: str | int = "",
+        updated_at: str | int = "",
+    ) -> None:
+        self.id = id
+        self.text = text
+        self.done = done
+        self._created: str | int = created_at or _now_us()
+        self._updated: str | int = updated_at or self._created
+
+    @property
+    def created_at(self) -> str:
+        value = self._created
+        return value if isinstance(value, str) else _iso(value)
+
+    @created_at.setter
+    def created_at(self, value: str | int) -> None:
+        self._created = value
+
+    @property
+    def updated_at(self) -> str:
+        value = self._updated
+        return value if isinstance(value, str) else _iso(value)
+
+    @updated_at.setter
+    def updated_at(self, value: str | int) -> None:
+        self._updated = value
+
+    @property
+    def created_us(self) -> int | None:
+        """Creation time in epoch microseconds (None if it is not a UTC ISO timestamp)."""
+        value = self._created
+        if isinstance(value, str):
+            us = _parse_us(value)
+            if us is None:
+                return None
+            self._created = value = us
+        return value
+
+    @property
+    def updated_us(self) -> int | None:
+        """Last update time in epoch microseconds (None if it is not a UTC ISO timestamp)."""
+        value = self._updated
+        if isinstance(value, str):
+            us = _parse_us(value)
+            if us is None:
+                return None
+            self._updated = value = us
+        return value
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.id, self.text, self.done, self.created_at, self.updated_at) == (
+            other.id,
+            other.text,
+            other.done,
+            other.created_at,
+            other.updated_at,
+        )
+
+    __hash__ = None  # type: ignore[assignment]
 
     def __repr__(self) -> str:
         """Return a concise, debug-friendly representation of the Todo.
@@ -33,32 +160,57 @@ class Todo:
 
         return f"Todo(id={self.id}, text={display_text!r}, done={self.done})"
 
-    def __post_init__(self) -> None:
-        if not self.created_at:
-            self.created_at = _utc_now_iso()
-        if not self.updated_at:
-            self.updated_at = self.created_at
-
-    def mark_done(self) -> None:
+    def mark_done(self, now: int | None = None) -> None:
         self.done = True
-        self.updated_at = _utc_now_iso()
+        self._updated = now or _now_us()
 
-    def mark_undone(self) -> None:
+    def mark_undone(self, now: int | None = None) -> None:
         self.done = False
-        self.updated_at = _utc_now_iso()
+        self._updated = now or _now_us()
 
-    def rename(self, text: str) -> None:
+    def rename(self, text: str, now: int | None = None) -> None:
         text = text.strip()
         if not text:
             raise ValueError("Todo text cannot be empty")
         self.text = text
-        self.updated_at = _utc_now_iso()
+        self._updated = now or _now_us()
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        created = self.created_at
+        # Never-updated todos share one value; format it only once
+        updated = created if self._updated == self._created else self.updated_at
+        return {
+            "id": self.id,
+            "text": self.text,
+            "done": self.done,
+            "created_at": created,
+            "updated_at": updated,
+        }
+
+    def to_record(self) -> dict:
+        """Like ``to_dict()``, but with timestamps as epoch microseconds where possible.
+
+        This is the shape the compact format stores.
+        """
+        created, updated = self.created_us, self.updated_us
+        return {
+            "id": self.id,
+            "text": self.text,
+            "done": self.done,
+            "created_at": self._created if created is None else created,
+            "updated_at": self._updated if updated is None else updated,
+        }
 
     @classmethod
-    def from_dict(cls, data: dict) -> Todo:
+    def from_dict(cls, data: dict, now: int | None = None, micros: bool = False) -> Todo:
+        """Build a validated Todo from a ``to_dict()``/``to_record()`` shaped dict.
+
+        Missing timestamps are set to ``now`` (read from the clock when not
+        given), so a loader can stamp a whole legacy file with one clock read.
+        Integer timestamps are only read as epoch microseconds with
+        ``micros=True``, for records written by ``to_record()``; otherwise
+        they are kept as strings like any other odd value.
+        """
         # Validate required fields with clear error messages
         if "id" not in data:
             raise ValueError("Missing required field 'id' in todo data")
@@ -93,10 +245,25 @@ class Todo:
                 "'done' must be a boolean (true/false) or 0/1."
             )
 
+        created_at = _timestamp(data.get("created_at"), micros) or now or _now_us()
         return cls(
             id=todo_id,
             text=data["text"],
             done=done,
-            created_at=str(data.get("created_at") or ""),
-            updated_at=str(data.get("updated_at") or ""),
+            created_at=created_at,
+            updated_at=_timestamp(data.get("updated_at"), micros) or created_at,
         )
+
+
+def _timestamp(value: object, micros: bool) -> str | int:
+    """Keep str timestamps, and with ``micros`` renderable epoch microseconds; else str()."""
+    if not value:
+        return ""
+    if (
+        micros
+        and isinstance(value, int)
+        and not isinstance(value, bool)
+        and _MIN_US <= value <= _MAX_US
+    ):
+        return value
+    return value if isinstance(value, str) else str(value)
@@ -0,0 +1,105 @@
+"""Batched todo mutations committed with a single save."""
+
+from __future__ import annotations
+
+from .backends import TodoStore
+from .collection import TodoCollection
+from .todo import Todo, _now_us
+
+
+class TodoTransaction:
+    """In-memory view of the database that collects mutations.
+
+    Obtained from ``TodoApp.transaction()``. Every operation applies to the
+    loaded collection only; nothing reaches storage until the ``with`` block
+    exits cleanly, and then everything is written by one atomic ``save()``.
+    If the block raises, the collection is discarded and the file is left
+    exactly as it was.
+
+    New todos get ids above ``id_floor`` as well as above every loaded todo,
+    so ids that moved to the archive are never handed out again.
+
+    The clock is read once per transaction: every todo it creates or
+    changes is stamped with the same ``now``. ``edits`` maps the id of
+    every todo whose text was set to that text, and every removed id to
+    None, for the search index.
+    """
+
+    def __init__(self, storage: TodoStore, todos: TodoCollection, id_floor: int = 0) -> None:
+        self._storage = storage
+        self.todos = todos
+        self.id_floor = id_floor
+        self.changed = False
+        self.now = _now_us()
+        self.edits: dict[int, str | None] = {}
+
+    def add(self, text: str) -> Todo:
+        text = text.strip()
+        if not text:
+            raise ValueError("Todo text cannot be empty")
+        todo = Todo(id=self._next_id(), text=text, created_at=self.now)
+        self.todos.append(todo)
+        self.edits[todo.id] = todo.text
+        self.changed = True
+        return todo
+
+    def add_record(self, data: dict) -> Todo:
+        """Add a todo from a ``to_dict()``-shaped record under the next free id.
+
+        Any id in ``data`` is ignored. The text follows the same rules as
+        ``add()`` and everything else is validated by ``Todo.from_dict``.
+        """
+        text = data.get("text")
+        if not isinstance(text, str):
+            raise ValueError(f"Invalid value for 'text': {text!r}. 'text' must be a string.")
+        text = text.strip()
+        if not text:
+            raise ValueError("Todo text cannot be empty")
+        todo = Todo.from_dict({**data, "id": self._next_id(), "text": text}, self.now)
+        self.todos.append(todo)
+        self.edits[todo.id] = todo.text
+        self.changed = True
+        return todo
+
+    def mark_done(self, todo_id: int) -> Todo:
+        todo = self._get(todo_id)
+        todo.mark_done(self.now)
+        self.changed = True
+        return todo
+
+    def mark_undone(self, todo_id: int) -> Todo:
+        todo = self._get(todo_id)
+        todo.mark_undone(self.now)
+        self.changed = True
+        return todo
+
+    def rename(self, todo_id: int, text: str) -> Todo:
+        todo = self._get(todo_id)
+        todo.rename(text, self.now)
+        self.edits[todo.id] = todo.text
+        self.changed = True
+        return todo
+
+    def remove(self, todo_id: int) -> Todo:
+        todo = self.todos.pop(todo_id)
+        if todo is None:
+            raise ValueError(f"Todo #{todo_id} not found")
+        self.edits[todo_id] = None
+        self.changed = True
+        return todo
+
+    def ids_between(self, start: int, end: int) -> list[int]:
+        """Return the existing ids in ``start..end`` (inclusive), in order."""
+        ids = sorted(todo.id for todo in self.todos if start <= todo.id <= end)
+        if not ids:
+            raise ValueError(f"No todos in range #{start}-{end}")
+        return ids
+
+    def _get(self, todo_id: int) -> Todo:
+        todo = self.todos.get(todo_id)
+        if todo is None:
+            raise ValueError(f"Todo #{todo_id} not found")
+        return todo
+
+    def _next_id(self) -> int:
+        return max(self._storage.next_id(self.todos), self.id_floor + 1)
@@ -0,0 +1,127 @@
+"""Tests for the cold archive tier of completed todos."""
+
+from __future__ import annotations
+
+import pytest
+
+from flywheel.archive import TodoArchive, archive_path_for
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+_OLD = "2020-01-01T00:00:00+00:00"
+
+
+def _seed(db, count: int = 6) -> None:
+    """Todos 1..count; the odd ones are done since 2020."""
+    TodoStorage(str(db)).save(
+        [
+            Todo(id=i, text=f"task {i}", done=i % 2 == 1, created_at=_OLD, updated_at=_OLD)
+            for i in range(1, count + 1)
+        ]
+    )
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "lzma"])
+def test_archive_moves_old_done_todos(tmp_path, compression) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db)
+    app = TodoApp(str(db))
+    app.mark_done(2)  # done, but just now
+
+    assert app.archive(older_than_days=30, compression=compression) == 3
+
+    assert [todo.id for todo in app.list()] == [2, 4, 6]
+    assert [todo.id for todo in app.iter_todos(archived=True)] == [2, 4, 6, 1, 3, 5]
+    assert TodoArchive(db).compression() == compression
+    assert TodoArchive(db).count() == 3
+
+
+def test_archive_appends_and_can_switch_compression(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db)
+    app = TodoApp(str(db))
+    app.archive(compression="zlib")
+
+    for todo_id in (2, 4):
+        app.mark_done(todo_id)
+    assert app.archive(older_than_days=0) == 2
+    assert TodoArchive(db).compression() == "zlib"
+
+    app.mark_done(6)
+    assert app.archive(older_than_days=0, compression="lzma") == 1
+    assert TodoArchive(db).compression() == "lzma"
+    assert sorted(todo.id for todo in TodoArchive(db).iter_load()) == [1, 2, 3, 4, 5, 6]
+    assert app.list() == []
+
+
+def test_archived_ids_are_not_reused(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db, count=5)
+    app = TodoApp(str(db))
+    app.archive()
+
+    assert [todo.id for todo in app.list()] == [2, 4]
+    assert app.add("new").id == 6
+    with app.transaction() as tx:
+        assert tx.add("batched").id == 7
+
+
+def test_mutations_do_not_see_the_archive(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db)
+    app = TodoApp(str(db))
+    app.archive()
+    archived = archive_path_for(db).read_bytes()
+
+    with pytest.raises(ValueError, match=r"Todo #1 not found"):
+        app.mark_undone(1)
+    app.remove(2)
+
+    assert archive_path_for(db).read_bytes() == archived
+
+
+def test_hot_copy_wins_over_archived_duplicate(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db, count=2)
+    # What a crash between writing the archive and the hot file leaves behind
+    TodoArchive(db).append([Todo(id=1, text="archived copy", done=True)])
+
+    todos = list(TodoApp(str(db)).iter_todos(archived=True))
+
+    assert [(todo.id, todo.text) for todo in todos] == [(1, "task 1"), (2, "task 2")]
+
+
+def test_invalid_archive_record_is_rejected(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    _seed(db, count=1)
+    archive_path_for(db).write_text('{"id": "x", "text": "bad"}\n')
+
+    with pytest.raises(ValueError, match=r"'id' must be an integer"):
+        list(TodoApp(str(db)).iter_todos(archived=True))
+
+
+def test_archive_not_supported_by_record_stores(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.sqlite"))
+
+    with pytest.raises(ValueError, match=r"only supported by the json and oplog"):
+        app.archive()
+
+
+def test_cli_archive_and_list_all(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    _seed(tmp_path / "cli.json", count=3)
+    parser = build_parser()
+
+    def run(*argv: str) -> str:
+        assert run_command(parser.parse_args(["--db", db, *argv])) == 0
+        return capsys.readouterr().out
+
+    assert run("archive", "--older-than", "7", "--compress", "zlib") == "Archived 2 todos\n"
+    assert "task 1" not in run("list")
+    listed = run("list", "--all")
+    assert all(f"task {i}" in listed for i in (1, 2, 3))
+    assert run("list", "--pending").count("task") == 1
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["list", "--all", "--pending"])
@@ -0,0 +1,118 @@
+"""Tests for AsyncTodoApp: off-loop storage work and batched saves."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from flywheel.aio import AsyncTodoApp
+from flywheel.cli import TodoApp
+from flywheel.storage import TodoStorage
+
+
+def test_async_app_mirrors_todo_app(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+
+    async def scenario() -> None:
+        async with AsyncTodoApp(db) as app:
+            first = await app.add("  buy milk  ")
+            second = await app.add("walk dog")
+            assert (first.id, first.text) == (1, "buy milk")
+            assert (await app.mark_done(first.id)).done is True
+            assert [todo.id for todo in await app.list(show_all=False)] == [second.id]
+            assert (await app.mark_undone(first.id)).done is False
+            assert (await app.rename(second.id, "walk cat")).text == "walk cat"
+            assert await app.remove(first.id) is None
+            assert (await app.get(second.id)).text == "walk cat"
+
+    asyncio.run(scenario())
+    assert [todo.text for todo in TodoApp(db).list()] == ["walk cat"]
+
+
+def test_concurrent_mutations_are_coalesced(tmp_path, monkeypatch) -> None:
+    db = str(tmp_path / "todo.json")
+    saves = []
+    original_save = TodoStorage.save
+
+    def save(self, todos) -> None:
+        saves.append(threading.current_thread())
+        original_save(self, todos)
+
+    monkeypatch.setattr(TodoStorage, "save", save)
+
+    async def scenario() -> list:
+        async with AsyncTodoApp(db) as app:
+            return await asyncio.gather(*(app.add(f"task {i}") for i in range(20)))
+
+    added = asyncio.run(scenario())
+
+    # All 20 were queued before the first batch started
+    assert len(saves) == 1
+    assert threading.main_thread() not in saves
+    assert sorted(todo.id for todo in added) == list(range(1, 21))
+    assert len(TodoApp(db).list()) == 20
+
+
+def test_failed_operation_does_not_sink_its_batch(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+
+    async def scenario() -> list:
+        async with AsyncTodoApp(db) as app:
+            await app.add("first")
+            return await asyncio.gather(
+                app.add("second"), app.mark_done(99), app.mark_done(1), return_exceptions=True
+            )
+
+    second, missing, done = asyncio.run(scenario())
+
+    assert second.text == "second"
+    assert isinstance(missing, ValueError)
+    assert "Todo #99 not found" in str(missing)
+    assert done.done is True
+    assert [(todo.text, todo.done) for todo in TodoApp(db).list()] == [
+        ("first", True),
+        ("second", False),
+    ]
+
+
+def test_failed_save_fails_the_whole_batch(tmp_path, monkeypatch) -> None:
+    db = str(tmp_path / "todo.json")
+
+    def broken_save(self, todos) -> None:
+        raise OSError("disk full")
+
+    async def scenario() -> list:
+        async with AsyncTodoApp(db) as app:
+            monkeypatch.setattr(TodoStorage, "save", broken_save)
+            return await asyncio.gather(app.add("a"), app.add("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, OSError) for result in results)
+
+
+def test_record_store_backend(tmp_path) -> None:
+    db = str(tmp_path / "todo.sqlite")
+
+    async def scenario() -> list:
+        async with AsyncTodoApp(db, backend="sqlite") as app:
+            added = await asyncio.gather(*(app.add(f"task {i}") for i in range(5)))
+            await app.mark_done(added[0].id)
+            await app.remove(added[1].id)
+            with pytest.raises(ValueError, match=r"Todo #99 not found"):
+                await app.remove(99)
+            return await app.list(show_all=False)
+
+    pending = asyncio.run(scenario())
+    assert [todo.text for todo in pending] == ["task 2", "task 3", "task 4"]
+
+
+def test_closed_app_rejects_calls(tmp_path) -> None:
+    async def scenario() -> None:
+        app = AsyncTodoApp(str(tmp_path / "todo.json"))
+        await app.aclose()
+        with pytest.raises(RuntimeError, match="closed"):
+            await app.add("late")
+
+    asyncio.run(scenario())
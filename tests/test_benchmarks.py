@@ -0,0 +1,45 @@
+"""The benchmark suite runs end to end and fails on a regression against its baseline."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SUITE = Path(__file__).resolve().parent.parent / "benchmarks" / "suite.py"
+
+
+def _suite(baseline: Path, *argv: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(SUITE), "--scales", "50", "--baseline", str(baseline), *argv],
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_suite_records_a_baseline_and_flags_regressions(tmp_path) -> None:
+    baseline = tmp_path / "baseline.json"
+    cases = ("--cases", "storage.load,app.add")
+
+    recorded = _suite(baseline, *cases, "--update-baseline")
+    assert recorded.returncode == 0, recorded.stderr
+    results = json.loads(baseline.read_text())["results"]
+    assert set(results) == {"storage.load@50", "app.add@50"}
+    assert {"throughput", "p50_us", "p99_us", "peak_rss_mb"} <= set(results["app.add@50"])
+
+    # A baseline no real run can match
+    for result in results.values():
+        result["throughput"] *= 1000
+    baseline.write_text(json.dumps({"results": results}))
+
+    checked = _suite(baseline, *cases)
+    assert checked.returncode == 1
+    assert "REGRESSED" in checked.stdout
+
+
+def test_unknown_case_is_rejected(tmp_path) -> None:
+    result = _suite(tmp_path / "baseline.json", "--cases", "storage.nope")
+
+    assert result.returncode == 2
+    assert "unknown case 'storage.nope'" in result.stderr
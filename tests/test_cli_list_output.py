@@ -0,0 +1,60 @@
+"""Tests for paginated and streamed `todo list` output."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from flywheel.cli import build_parser, run_command
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+@pytest.fixture
+def db(tmp_path) -> str:
+    path = tmp_path / "todo.json"
+    TodoStorage(str(path)).save([Todo(id=i, text=f"task {i}") for i in range(1, 11)])
+    return str(path)
+
+
+def _list(db: str, capsys, *options: str) -> list[str]:
+    assert run_command(build_parser().parse_args(["--db", db, "list", *options])) == 0
+    return capsys.readouterr().out.splitlines()
+
+
+def test_offset_and_limit_select_a_page(db, capsys) -> None:
+    assert _list(db, capsys, "--offset", "3", "--limit", "2") == [
+        "[ ]   4 task 4",
+        "[ ]   5 task 5",
+    ]
+    assert len(_list(db, capsys, "--offset", "8")) == 2
+    assert _list(db, capsys, "--limit", "0") == ["No todos yet."]
+
+
+def test_stream_writes_the_same_rows(db, capsys) -> None:
+    assert _list(db, capsys, "--stream") == _list(db, capsys)
+
+
+def test_negative_counts_are_rejected() -> None:
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["list", "--limit", "-1"])
+
+
+def test_closed_pipe_ends_list_quietly(tmp_path) -> None:
+    db = tmp_path / "big.json"
+    TodoStorage(str(db)).save([Todo(id=i, text=f"task {i}") for i in range(1, 20001)])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "flywheel.cli", "--db", str(db), "list"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    assert proc.stdout.readline() == b"[ ]   1 task 1\n"
+    proc.stdout.close()
+
+    assert proc.wait(timeout=30) == 0
+    assert proc.stderr.read() == b""
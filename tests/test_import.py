@@ -0,0 +1,127 @@
+"""Tests for streaming bulk import."""
+
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.importer import detect_import_format, iter_records
+from flywheel.storage import TodoStorage
+
+
+def test_detect_import_format() -> None:
+    assert detect_import_format("backlog.ndjson") == "ndjson"
+    assert detect_import_format("backlog.JSONL") == "ndjson"
+    assert detect_import_format("backlog.csv") == "csv"
+    assert detect_import_format("-") == "lines"
+
+
+def test_import_ndjson_assigns_ids_after_existing(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    app.add("existing")
+    stream = io.StringIO(
+        '{"id": 77, "text": "a", "done": true}\n'
+        "\n"
+        '{"text": "b", "created_at": "2024-01-01T00:00:00+00:00"}\n'
+    )
+
+    assert app.import_records(iter_records(stream, "ndjson")) == 2
+
+    todos = app.list()
+    assert [(todo.id, todo.text, todo.done) for todo in todos] == [
+        (1, "existing", False),
+        (2, "a", True),
+        (3, "b", False),
+    ]
+    assert todos[2].created_at == "2024-01-01T00:00:00+00:00"
+
+
+def test_import_csv_and_lines(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    csv_input = io.StringIO('text,done\n"one, with comma",yes\ntwo,\n')
+    lines_input = io.StringIO("three\n\n  four  \n")
+
+    app.import_records(iter_records(csv_input, "csv"))
+    app.import_records(iter_records(lines_input, "lines"))
+
+    assert [(todo.text, todo.done) for todo in app.list()] == [
+        ("one, with comma", True),
+        ("two", False),
+        ("three", False),
+        ("four", False),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("format", "data", "message"),
+    [
+        (
+            "ndjson",
+            '{"text": "ok"}\n{"text": "x", "done": 2}\n',
+            r"line 2: Invalid value for 'done'",
+        ),
+        ("ndjson", '{"text": "ok"}\n[1]\n', r"line 2: expected a JSON object"),
+        ("ndjson", '{"text": "ok"}\n{broken\n', r"Invalid JSON on line 2"),
+        ("csv", "text,done\nok,maybe\n", r"Invalid value for 'done' on line 2"),
+        ("csv", "title\nok\n", r"'text' column"),
+        ("ndjson", '{"text": "   "}\n', r"line 1: Todo text cannot be empty"),
+    ],
+)
+def test_invalid_record_aborts_whole_import(tmp_path, format, data, message) -> None:
+    db = tmp_path / "todo.json"
+    app = TodoApp(str(db))
+    app.add("keep")
+    before = db.read_bytes()
+
+    with pytest.raises(ValueError, match=message):
+        app.import_records(iter_records(io.StringIO(data), format))
+    assert db.read_bytes() == before
+
+
+def test_import_saves_once_and_reports_progress(tmp_path, monkeypatch) -> None:
+    import flywheel.importer as importer_module
+
+    monkeypatch.setattr(importer_module, "_PROGRESS_EVERY", 100)
+    saves = []
+    original_save = TodoStorage.save
+    monkeypatch.setattr(
+        TodoStorage, "save", lambda self, todos: saves.append(1) or original_save(self, todos)
+    )
+    app = TodoApp(str(tmp_path / "todo.json"))
+    stream = io.StringIO("".join(json.dumps({"text": f"t{i}"}) + "\n" for i in range(250)))
+    reported = []
+
+    assert app.import_records(iter_records(stream, "ndjson"), reported.append) == 250
+    assert reported == [100, 200, 250]
+    assert len(saves) == 1
+    assert app.get(250).text == "t249"
+
+
+def test_import_rejects_overlong_lines(tmp_path, monkeypatch) -> None:
+    import flywheel.importer as importer_module
+
+    monkeypatch.setattr(importer_module, "_MAX_RECORD_CHARS", 10)
+    with pytest.raises(ValueError, match=r"Line 2 exceeds"):
+        list(iter_records(io.StringIO("short\n" + "x" * 50 + "\n"), "lines"))
+
+
+def test_cli_import_from_file_and_stdin(tmp_path, monkeypatch, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    source = tmp_path / "backlog.csv"
+    source.write_text("text,done\na,1\nb,0\n", encoding="utf-8")
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "import", str(source)])) == 0
+    monkeypatch.setattr("sys.stdin", io.StringIO("c\nd\n"))
+    assert run_command(parser.parse_args(["--db", db, "import"])) == 0
+
+    assert "Imported 2 todos" in capsys.readouterr().out
+    assert [(todo.id, todo.text, todo.done) for todo in TodoApp(db).list()] == [
+        (1, "a", True),
+        (2, "b", False),
+        (3, "c", False),
+        (4, "d", False),
+    ]
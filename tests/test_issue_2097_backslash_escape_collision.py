@@ -212,3 +212,21 @@ class TestBackslashEscapeComprehensive:
                 f"SECURITY: Control char {control_char!r} and literal {literal_input!r} "
                 f"produced identical output!"
             )
+
+    def test_every_character_escapes_like_the_reference_rules(self):
+        """The translate table must match the documented escaping rule by rule."""
+        named = {"\\": "\\\\", "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+        for code in range(0x200):
+            char = chr(code)
+            if char in named:
+                expected = named[char]
+            elif code <= 0x1F or 0x7F <= code <= 0x9F:
+                expected = f"\\x{code:02x}"
+            else:
+                expected = char
+            assert _sanitize_text(f"a{char}b") == f"a{expected}b", f"U+{code:04X}"
+
+    def test_clean_text_is_returned_unchanged(self):
+        """Text with nothing to escape skips the translation entirely."""
+        text = "Buy milk – déjà vu 🥛"
+        assert _sanitize_text(text) is text
@@ -0,0 +1,111 @@
+"""Tests for memory-mapped lazy record access."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.lazy import LazyTodoFile
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def _saved_db(tmp_path, count: int = 50):
+    db = tmp_path / "todo.json"
+    todos = [Todo(id=i, text=f"task {i}", done=i % 3 == 0) for i in range(1, count + 1)]
+    TodoStorage(str(db)).save(todos)
+    return db
+
+
+def test_lazy_file_indexes_saved_layout(tmp_path) -> None:
+    db = _saved_db(tmp_path)
+
+    with LazyTodoFile(db) as records:
+        assert len(records) == 50
+        assert 42 in records
+        assert 51 not in records
+        todo = records.get(42)
+        assert todo is not None
+        assert (todo.id, todo.text, todo.done) == (42, "task 42", True)
+        assert records.get(51) is None
+
+
+def test_lazy_get_decodes_only_requested_record(tmp_path) -> None:
+    db = _saved_db(tmp_path)
+
+    with (
+        LazyTodoFile(db) as records,
+        patch("flywheel.lazy.Todo.from_dict", wraps=Todo.from_dict) as from_dict,
+    ):
+        records.get(7)
+        assert 8 in records
+    assert from_dict.call_count == 1
+
+
+def test_lazy_file_handles_unsorted_ids_and_special_text(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    todos = [
+        Todo(id=5, text='line\nbreak and "quotes" {'),
+        Todo(id=2, text='\n  {\n    "id": 99,'),
+        Todo(id=9, text="你好"),
+    ]
+    TodoStorage(str(db)).save(todos)
+
+    with LazyTodoFile(db) as records:
+        assert len(records) == 3
+        assert 99 not in records
+        assert [records.get(i).text for i in (2, 5, 9)] == [todos[1].text, todos[0].text, "你好"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '[{"id": 1, "text": "compact"}, {"id": 2, "text": "b"}]',
+        '[\n  {\n    "text": "text first",\n    "id": 1\n  }\n]',
+        '[\n  {\n    "id": 1,\n    "text": "dup"\n  },\n  {\n    "id": 1,\n    "text": "x"\n  }\n]',
+    ],
+)
+def test_lazy_file_falls_back_for_other_layouts(tmp_path, content) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text(content, encoding="utf-8")
+
+    with LazyTodoFile(db) as records:
+        todo = records.get(1)
+        assert todo is not None
+        assert todo.text == json.loads(content)[0]["text"]
+
+
+def test_lazy_file_missing_and_empty_database(tmp_path) -> None:
+    with LazyTodoFile(tmp_path / "missing.json") as records:
+        assert len(records) == 0
+
+    db = tmp_path / "empty.json"
+    TodoStorage(str(db)).save([])
+    with LazyTodoFile(db) as records:
+        assert 1 not in records
+
+
+def test_app_done_on_unknown_id_leaves_file_untouched(tmp_path) -> None:
+    db = _saved_db(tmp_path)
+    before = db.read_bytes()
+    app = TodoApp(str(db))
+
+    with pytest.raises(ValueError, match=r"Todo #999 not found"):
+        app.mark_done(999)
+    with pytest.raises(ValueError, match=r"Todo #999 not found"):
+        app.remove(999)
+    assert db.read_bytes() == before
+
+
+def test_cli_show_prints_single_todo(tmp_path, capsys) -> None:
+    db = _saved_db(tmp_path)
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", str(db), "show", "3"])) == 0
+    assert capsys.readouterr().out.strip() == "[x]   3 task 3"
+
+    assert run_command(parser.parse_args(["--db", str(db), "show", "77"])) == 1
+    assert "not found" in capsys.readouterr().err
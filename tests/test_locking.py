@@ -0,0 +1,131 @@
+"""Tests for cross-process locking and optimistic concurrency."""
+
+from __future__ import annotations
+
+import multiprocessing
+import stat
+
+import pytest
+
+from flywheel.cli import TodoApp
+from flywheel.locking import (
+    ConflictError,
+    DatabaseLock,
+    bump_revision,
+    lock_path_for,
+    read_revision,
+)
+from flywheel.oplog import OpLogStorage
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def test_save_bumps_revision_in_owner_only_lock_file(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = TodoStorage(str(db))
+    storage.save([Todo(id=1, text="a")])
+    storage.save([Todo(id=1, text="b")])
+
+    lock = lock_path_for(db)
+    assert lock.read_text() == "2\n"
+    assert stat.S_IMODE(lock.stat().st_mode) == 0o600
+
+
+def test_database_lock_is_reentrant(tmp_path) -> None:
+    db = tmp_path / "sub" / "todo.json"
+    prepared = []
+    lock = DatabaseLock(db, lambda: prepared.append(1) or db.parent.mkdir())
+
+    with lock.hold() as fd:
+        assert fd is not None
+        with lock.hold(exclusive=False) as inner, lock.acquire(exclusive=False) as acquired:
+            assert inner == acquired == fd
+        bump_revision(fd)
+        assert read_revision(fd) == 1
+    assert lock.fd is None
+    assert prepared == [1]
+
+
+def test_stale_save_is_rejected(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+    first, second = TodoStorage(db), TodoStorage(db)
+    first.save([Todo(id=1, text="a")])
+    first.load()
+    second.load()
+
+    second.save([Todo(id=1, text="a"), Todo(id=2, text="from second")])
+    with pytest.raises(ConflictError, match=r"changed by another process"):
+        first.save([Todo(id=1, text="a"), Todo(id=2, text="from first")])
+
+    assert [todo.text for todo in TodoStorage(db).load()] == ["a", "from second"]
+
+
+def test_unlocked_external_write_is_detected(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = TodoStorage(str(db))
+    storage.save([Todo(id=1, text="a")])
+    storage.load()
+
+    db.write_text('[{"id": 1, "text": "hand edited"}]', encoding="utf-8")
+    with pytest.raises(ConflictError):
+        storage.save([Todo(id=1, text="b")])
+
+
+def test_app_reapplies_operation_after_conflict(tmp_path, monkeypatch) -> None:
+    db = str(tmp_path / "todo.json")
+    app = TodoApp(db)
+    app.add("first")
+
+    original_load = TodoStorage.load
+    interfered = []
+
+    def load_then_interfere(self):
+        todos = original_load(self)
+        if not interfered:
+            # Another process adds #2 between our load and our save
+            interfered.append(True)
+            TodoApp(db).add("other process")
+        return todos
+
+    monkeypatch.setattr(TodoStorage, "load", load_then_interfere)
+    todo = app.add("mine")
+
+    assert todo.id == 3
+    assert [t.text for t in TodoApp(db).list()] == ["first", "other process", "mine"]
+
+
+def test_oplog_save_detects_concurrent_append(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+    first, second = OpLogStorage(db), OpLogStorage(db)
+    first.load()
+    second.load()
+
+    second.save([Todo(id=1, text="second")])
+    with pytest.raises(ConflictError, match=r"Operation log"):
+        first.save([Todo(id=1, text="first")])
+
+
+def _add_many(db: str, worker: int, count: int) -> None:
+    app = TodoApp(db)
+    for i in range(count):
+        app.add(f"worker {worker} item {i}")
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork start method"
+)
+@pytest.mark.parametrize("backend", ["json", "oplog"])
+def test_concurrent_writers_lose_no_updates(tmp_path, backend) -> None:
+    db = str(tmp_path / "todo.json")
+    TodoApp(db, backend=backend).add("seed")
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_add_many, args=(db, w, 15)) for w in range(6)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+
+    todos = TodoApp(db).list()
+    assert len(todos) == 1 + 6 * 15
+    assert len({todo.id for todo in todos}) == len(todos)
@@ -77,8 +77,8 @@ def test_cli_run_command_returns_error_for_missing_todo(tmp_path, capsys) -> Non
     assert "not found" in captured.out or "not found" in captured.err
 
 
-def test_storage_load_rejects_oversized_json(tmp_path) -> None:
-    """Security: JSON files larger than 10MB should be rejected to prevent DoS."""
+def test_storage_load_accepts_json_over_former_size_limit(tmp_path) -> None:
+    """Files over the old 10MB ceiling load; DoS limits now apply per record and count."""
     db = tmp_path / "large.json"
     storage = TodoStorage(str(db))
 
@@ -93,12 +93,9 @@ def test_storage_load_rejects_oversized_json(tmp_path) -> None:
     # Verify the file is actually larger than 10MB
     assert db.stat().st_size > 10 * 1024 * 1024
 
-    # Should raise ValueError for oversized file
-    try:
-        storage.load()
-        raise AssertionError("Expected ValueError for oversized JSON file")
-    except ValueError as e:
-        assert "too large" in str(e).lower() or "size" in str(e).lower()
+    loaded = storage.load()
+    assert len(loaded) == 65000
+    assert loaded[-1].id == 64999
 
 
 def test_storage_load_accepts_normal_sized_json(tmp_path) -> None:
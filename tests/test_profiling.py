@@ -0,0 +1,78 @@
+"""Tests for `todo --profile` phase timing."""
+
+from __future__ import annotations
+
+import pstats
+import time
+
+import pytest
+
+from flywheel import profiling
+from flywheel.cli import main
+
+
+def _report(stderr: str) -> dict[str, str]:
+    """Map each phase of a profile report to its line."""
+    lines = stderr.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith("profile: "))
+    return {line.split()[0]: line for line in lines[start + 1 :]}
+
+
+def test_profile_flag_reports_every_phase_of_a_write(tmp_path, capsys) -> None:
+    db = str(tmp_path / "todo.json")
+    main(["--db", db, "add", "one", "two"])
+    capsys.readouterr()
+
+    assert main(["--db", db, "--profile", "done", "1-2"]) == 0
+
+    err = capsys.readouterr().err
+    assert err.startswith("profile: todo done: ")
+    report = _report(err)
+    assert list(report) == [*profiling.PHASES, "other"]
+    assert report["validate"].endswith("2 calls")
+    for name in ("parse", "read", "decode", "mutate", "encode", "write", "replace"):
+        assert report[name].endswith("calls"), name
+    assert profiling.active() is None
+
+
+def test_environment_variable_enables_profiling(tmp_path, capsys, monkeypatch) -> None:
+    db = str(tmp_path / "todo.json")
+    main(["--db", db, "add", "one"])
+    monkeypatch.setenv("FLYWHEEL_PROFILE", "1")
+
+    assert main(["--db", db, "list"]) == 0
+
+    captured = capsys.readouterr()
+    assert "one" in captured.out
+    assert _report(captured.err)["format"].endswith("1 calls")
+
+
+@pytest.mark.parametrize("value", ["", "0"])
+def test_profiling_is_off_by_default(tmp_path, capsys, monkeypatch, value) -> None:
+    monkeypatch.setenv("FLYWHEEL_PROFILE", value)
+
+    assert main(["--db", str(tmp_path / "todo.json"), "list"]) == 0
+    assert capsys.readouterr().err == ""
+
+
+def test_profile_dump_writes_pstats_file(tmp_path, capsys) -> None:
+    dump = tmp_path / "todo.prof"
+
+    assert main(["--db", str(tmp_path / "todo.json"), "--profile-dump", str(dump), "add", "x"]) == 0
+
+    assert "profile: todo add" in capsys.readouterr().err
+    stats = pstats.Stats(str(dump))
+    assert any(function == "run_command" for _, _, function in stats.stats)
+
+
+def test_nested_phases_are_counted_exclusively() -> None:
+    timer = profiling.PhaseTimer()
+    with timer.phase("mutate"):
+        with timer.phase("encode"):
+            pass
+        items = list(timer.timed_iter("decode", iter([1, 2])))
+
+    assert items == [1, 2]
+    assert timer.counts["decode"] == 3  # two items and the exhausted call
+    total = timer.totals["mutate"] + timer.totals["encode"] + timer.totals["decode"]
+    assert total <= time.perf_counter_ns() - timer.started
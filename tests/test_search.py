@@ -0,0 +1,117 @@
+"""Tests for the persistent search index behind `todo search`."""
+
+from __future__ import annotations
+
+import pytest
+
+from flywheel import search
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.search import SearchIndex, index_path_for, parse_query
+
+
+@pytest.fixture
+def app(tmp_path) -> TodoApp:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    for text in ("Buy milk", "Buy eggs and bread", "Email Bob", "Fix e-mail filter"):
+        app.add(text)
+    return app
+
+
+def _ids(app: TodoApp, *terms: str) -> list[int]:
+    return [todo.id for todo in app.search(list(terms))]
+
+
+@pytest.fixture
+def no_rebuild(monkeypatch):
+    """Fail any rebuild, to prove the index was kept current incrementally."""
+
+    def rebuild(self, todos):
+        raise AssertionError("index was rebuilt")
+
+    def arm() -> None:
+        monkeypatch.setattr(SearchIndex, "rebuild", rebuild)
+
+    return arm
+
+
+def test_terms_are_anded_or_alternatives_and_prefixes(app) -> None:
+    assert _ids(app, "buy") == [1, 2]
+    assert _ids(app, "BUY", "bread") == [2]
+    assert _ids(app, "milk", "OR", "bob") == [1, 3]
+    assert _ids(app, "e*") == [2, 3, 4]
+    assert _ids(app, "e-mail") == [4]
+    assert _ids(app, "nothing") == []
+
+
+def test_query_without_words_is_rejected() -> None:
+    with pytest.raises(ValueError, match=r"no words"):
+        parse_query(["OR", "!!"])
+
+
+def test_mutations_update_an_existing_index_incrementally(app, no_rebuild) -> None:
+    _ids(app, "buy")  # builds the index
+    no_rebuild()
+
+    app.add("Buy stamps")
+    app.rename(1, "Buy oat milk")
+    app.remove(2)
+    app.mark_done(3)
+    with app.transaction() as tx:
+        tx.add("Buy coffee")
+        tx.remove(4)
+
+    assert _ids(app, "buy") == [1, 5, 6]
+    assert _ids(app, "oat") == [1]
+    assert _ids(app, "e*") == [3]
+    assert len(index_path_for(app.storage.path).read_bytes().splitlines()) == 6
+
+
+def test_write_that_bypassed_the_index_forces_a_rebuild(app) -> None:
+    _ids(app, "buy")
+    other = TodoApp(str(app.storage.path))
+    other.search_index = None  # a writer that does not maintain the index
+    other.add("Buy apples")
+
+    assert _ids(app, "apples") == [5]
+
+
+def test_damaged_index_is_rebuilt(app) -> None:
+    _ids(app, "buy")
+    index_path_for(app.storage.path).write_bytes(b'{"format": "flywheel-search"')
+
+    assert _ids(app, "buy") == [1, 2]
+
+
+def test_change_records_are_compacted(app, monkeypatch) -> None:
+    monkeypatch.setattr(search, "_COMPACT_CHANGES", 2)
+    _ids(app, "buy")
+    app.add("one")
+    app.add("two")
+
+    assert _ids(app, "two") == [6]
+    assert len(index_path_for(app.storage.path).read_bytes().splitlines()) == 1
+
+
+def test_oplog_backend_is_searchable(tmp_path, no_rebuild) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"), backend="oplog")
+    app.add("Water plants")
+    assert _ids(app, "plants") == [1]
+    no_rebuild()
+
+    app.add("Plant tomatoes")
+    assert _ids(app, "plant*") == [1, 2]
+
+
+def test_search_not_supported_by_record_stores(tmp_path) -> None:
+    with pytest.raises(ValueError, match=r"only supported by the json and oplog"):
+        TodoApp(str(tmp_path / "todo.sqlite")).search(["x"])
+
+
+def test_cli_search(app, capsys) -> None:
+    parser = build_parser()
+    db = str(app.storage.path)
+
+    assert run_command(parser.parse_args(["--db", db, "search", "buy", "milk"])) == 0
+    assert capsys.readouterr().out == "[ ]   1 Buy milk\n"
+    assert run_command(parser.parse_args(["--db", db, "search", "zebra"])) == 0
+    assert capsys.readouterr().out == "No matching todos.\n"
@@ -0,0 +1,168 @@
+"""Tests for the resident todo server and CLI forwarding."""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+from flywheel import client
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.server import ResidentStorage, TodoServer, socket_path_for
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = TodoServer(str(tmp_path / "todo.json"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_socket_is_owner_only(server) -> None:
+    mode = server.socket_path.stat().st_mode
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) == 0o600
+
+
+def test_cli_commands_are_forwarded(server, monkeypatch, capsys) -> None:
+    db = str(server.storage.path)
+    parser = build_parser()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("forwarded commands must not load the file locally")
+
+    assert run_command(parser.parse_args(["--db", db, "add", "a", "b"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "done", "1"])) == 0
+    monkeypatch.setattr(TodoStorage, "_decode", fail)
+    assert run_command(parser.parse_args(["--db", db, "list"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "done", "9"])) == 1
+
+    captured = capsys.readouterr()
+    assert "Added #2: b" in captured.out
+    assert "[x]" in captured.out and "a" in captured.out
+    assert "Todo #9 not found" in captured.err
+    monkeypatch.undo()
+
+    # Every acknowledged write is already on disk
+    assert [(todo.text, todo.done) for todo in TodoStorage(db).load()] == [
+        ("a", True),
+        ("b", False),
+    ]
+
+
+def test_second_server_is_refused(server) -> None:
+    with pytest.raises(ValueError, match=r"already running"):
+        TodoServer(str(server.storage.path))
+
+
+def test_stale_socket_falls_back_to_local_run(tmp_path, capsys) -> None:
+    db = tmp_path / "todo.json"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path_for(db)))
+    stale.close()
+
+    assert run_command(build_parser().parse_args(["--db", str(db), "add", "x"])) == 0
+    assert [todo.text for todo in TodoApp(str(db)).list()] == ["x"]
+
+
+def test_socket_of_another_user_is_not_used(server, monkeypatch) -> None:
+    args = build_parser().parse_args(["--db", str(server.storage.path), "list"])
+    real_uid = os.getuid()
+    monkeypatch.setattr(client.os, "getuid", lambda: real_uid + 1)
+
+    assert client.forward(args) is None
+
+
+def test_writable_socket_is_not_used(server) -> None:
+    args = build_parser().parse_args(["--db", str(server.storage.path), "list"])
+    server.socket_path.chmod(0o622)
+
+    assert client.forward(args) is None
+
+
+def test_server_removes_socket_on_close(tmp_path) -> None:
+    server = TodoServer(str(tmp_path / "todo.json"))
+    server.server_close()
+
+    assert not socket_path_for(tmp_path / "todo.json").exists()
+
+
+def test_concurrent_writes_share_commits(tmp_path, monkeypatch) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+    saves = []
+    original_save = TodoStorage.save
+    monkeypatch.setattr(
+        TodoStorage, "save", lambda self, todos: saves.append(1) or original_save(self, todos)
+    )
+    resident = ResidentStorage(storage, window=0.05)
+
+    for i in range(1, 21):
+        resident.save([Todo(id=n, text=f"t{n}") for n in range(1, i + 1)])
+    resident.wait_committed(resident.seq)
+    resident.close()
+
+    assert len(saves) < 20
+    assert len(TodoStorage(str(tmp_path / "todo.json")).load()) == 20
+
+
+def test_failed_commit_is_reported_and_dropped(tmp_path, monkeypatch) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+    resident = ResidentStorage(storage, window=0)
+
+    def broken_save(todos):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "save", broken_save)
+    resident.save([Todo(id=1, text="lost")])
+    with pytest.raises(OSError, match=r"disk full"):
+        resident.wait_committed(resident.seq)
+    assert resident.load() == []
+    resident.close()
+
+
+def test_conflicting_local_write_is_reapplied(server, monkeypatch, capsys) -> None:
+    db = str(server.storage.path)
+    parser = build_parser()
+    assert run_command(parser.parse_args(["--db", db, "add", "first"])) == 0
+
+    original_save = TodoStorage.save
+    interfered = []
+
+    def save_after_local_writer(self, todos):
+        if not interfered:
+            # A non-forwarded local command writes the file just before the commit
+            interfered.append(True)
+            TodoStorage(db).save([*TodoStorage(db).load(), Todo(id=2, text="local")])
+        return original_save(self, todos)
+
+    monkeypatch.setattr(TodoStorage, "save", save_after_local_writer)
+    assert run_command(parser.parse_args(["--db", db, "add", "served"])) == 0
+    monkeypatch.undo()
+
+    assert "Added #3: served" in capsys.readouterr().out
+    assert [todo.text for todo in TodoStorage(db).load()] == ["first", "local", "served"]
+
+
+def test_stats_report_the_server_lifetime(server, capsys) -> None:
+    db = str(server.storage.path)
+    parser = build_parser()
+    run_command(parser.parse_args(["--db", db, "add", "a", "b"]))
+    capsys.readouterr()
+
+    assert run_command(parser.parse_args(["--db", db, "stats", "--json"])) == 0
+
+    stats = json.loads(capsys.readouterr().out)
+    assert (stats["total"], stats["pending"], stats["done"]) == (2, 2, 0)
+    assert stats["storage"]["saves"] == 1
@@ -0,0 +1,64 @@
+"""Startup cost of the CLI: read-only commands must not import write-path modules."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Kept in sync with READ_ONLY_FORBIDDEN in benchmarks/startup.py
+_FORBIDDEN = {
+    "concurrent.futures",
+    "csv",
+    "dataclasses",
+    "datetime",
+    "inspect",
+    "mmap",
+    "random",
+    "socket",
+    "socketserver",
+    "sqlite3",
+    "tempfile",
+    "threading",
+}
+
+_RUNNER = """
+import json, sys
+from flywheel.cli import main
+status = main(sys.argv[1:])
+print(json.dumps(sorted(sys.modules)))
+raise SystemExit(status)
+"""
+
+
+def _modules_after(tmp_path, *argv: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", _RUNNER, "--db", str(tmp_path / "todo.json"), *argv],
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": str(SRC)},
+        check=True,
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize("argv", [("list", "--pending"), ("list",)])
+def test_read_only_commands_skip_write_path_imports(tmp_path, argv) -> None:
+    (tmp_path / "todo.json").write_text(
+        '[{"id": 1, "text": "a", "done": false, '
+        '"created_at": "2024-01-01T00:00:00+00:00", "updated_at": "2024-01-01T00:00:00+00:00"}]'
+    )
+
+    assert _modules_after(tmp_path, *argv) & _FORBIDDEN == set()
+
+
+def test_server_is_imported_only_when_serving(tmp_path) -> None:
+    modules = _modules_after(tmp_path, "add", "task")
+
+    assert "flywheel.server" not in modules
+    assert "tempfile" in modules  # writes still go through the atomic temp file
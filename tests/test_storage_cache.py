@@ -0,0 +1,84 @@
+"""Tests for the stat-validated parse cache in TodoStorage."""
+
+from __future__ import annotations
+
+import os
+
+from flywheel.cli import TodoApp
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def test_cache_is_off_by_default(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+    storage.save([Todo(id=1, text="x")])
+
+    storage.load()
+    storage.load()
+    assert (storage.cache_hits, storage.cache_misses) == (0, 0)
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path, monkeypatch) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db)).save([Todo(id=1, text="x")])
+    storage = TodoStorage(str(db), cache=True)
+
+    assert [todo.text for todo in storage.load()] == ["x"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache hit must not decode the file")
+
+    monkeypatch.setattr(storage, "_decode", fail)
+    assert [todo.text for todo in storage.load()] == ["x"]
+    assert [todo.text for todo in storage.iter_load()] == ["x"]
+    assert (storage.cache_hits, storage.cache_misses) == (2, 1)
+
+
+def test_cached_todos_are_returned_as_copies(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), cache=True)
+    storage.save([Todo(id=1, text="x")])
+
+    storage.load()[0].mark_done()
+    assert storage.load()[0].done is False
+
+
+def test_own_save_refreshes_cache(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), cache=True)
+    todos = [Todo(id=1, text="x")]
+    storage.save(todos)
+    todos[0].text = "changed after save"
+
+    assert [todo.text for todo in storage.load()] == ["x"]
+    assert (storage.cache_hits, storage.cache_misses) == (1, 0)
+
+
+def test_external_change_invalidates_cache(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = TodoStorage(str(db), cache=True)
+    storage.save([Todo(id=1, text="x")])
+
+    TodoStorage(str(db)).save([Todo(id=1, text="x"), Todo(id=2, text="y")])
+    assert [todo.id for todo in storage.load()] == [1, 2]
+    assert storage.cache_misses == 1
+
+    # Same size, rewritten in place: mtime alone must invalidate
+    st = db.stat()
+    db.write_bytes(db.read_bytes().replace(b'"y"', b'"z"'))
+    os.utime(db, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert [todo.text for todo in storage.load()] == ["x", "z"]
+    assert storage.cache_misses == 2
+
+    db.unlink()
+    assert storage.load() == []
+
+
+def test_app_with_cache_reads_file_once(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"), cache=True)
+    app.add("a")
+    app.add("b")
+    app.mark_done(1)
+
+    for _ in range(5):
+        assert [todo.text for todo in app.list(show_all=False)] == ["b"]
+    assert app.get(1).done is True
+    assert app.storage.cache_misses == 0
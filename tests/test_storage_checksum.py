@@ -0,0 +1,119 @@
+"""Tests for checksummed files and the trusted (validation-free) load path."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from flywheel.formats import read_trusted
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def _todos() -> list[Todo]:
+    return [Todo(id=1, text="one"), Todo(id=2, text="two 你好", done=True)]
+
+
+@pytest.fixture
+def validations(monkeypatch) -> list[int]:
+    """Count calls of Todo.from_dict, the per-record validation."""
+    calls: list[int] = []
+    original = Todo.from_dict.__func__
+
+    def from_dict(cls, data, now=None, micros=False):
+        calls.append(1)
+        return original(cls, data, now, micros)
+
+    monkeypatch.setattr(Todo, "from_dict", classmethod(from_dict))
+    return calls
+
+
+@pytest.mark.parametrize("format", ["compact", "binary"])
+def test_unmodified_file_loads_without_validation(tmp_path, validations, format) -> None:
+    db = tmp_path / "todo.db"
+    todos = _todos()
+    TodoStorage(str(db), format=format).save(todos)
+
+    loaded = TodoStorage(str(db)).load()
+
+    assert [todo.to_dict() for todo in loaded] == [todo.to_dict() for todo in todos]
+    assert validations == []
+
+
+@pytest.mark.parametrize("format", ["compact", "binary"])
+def test_unmodified_file_streams_without_validation(tmp_path, validations, format) -> None:
+    db = tmp_path / "todo.db"
+    todos = _todos()
+    TodoStorage(str(db), format=format).save(todos)
+
+    loaded = list(TodoStorage(str(db)).iter_load())
+
+    assert [todo.to_dict() for todo in loaded] == [todo.to_dict() for todo in todos]
+    assert validations == []
+
+
+def test_edited_file_streams_with_validation(tmp_path, validations) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="compact").save(_todos())
+    db.write_bytes(db.read_bytes().replace(b'"one"', b'"uno"'))
+
+    assert [todo.text for todo in TodoStorage(str(db)).iter_load()] == ["uno", "two 你好"]
+    assert len(validations) == 2
+
+
+def test_edited_compact_file_is_validated(tmp_path, validations) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="compact").save(_todos())
+    db.write_bytes(db.read_bytes().replace(b'"one"', b'"uno"'))
+
+    loaded = TodoStorage(str(db)).load()
+
+    assert loaded[0].text == "uno"
+    assert len(validations) == 2
+
+
+def test_edited_file_with_bad_record_is_rejected(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="compact").save(_todos())
+    db.write_bytes(db.read_bytes().replace(b'"id":2', b'"id":"two"'))
+
+    with pytest.raises(ValueError, match=r"'id' must be an integer"):
+        TodoStorage(str(db)).load()
+
+
+def test_corrupted_binary_record_falls_back_to_validation(tmp_path, validations) -> None:
+    db = tmp_path / "todo.bin"
+    TodoStorage(str(db), format="binary").save(_todos())
+    data = bytearray(db.read_bytes())
+    data[data.index(b"one")] = ord("O")
+    db.write_bytes(bytes(data))
+
+    assert TodoStorage(str(db)).load()[0].text == "One"
+    assert len(validations) == 2
+
+
+def test_pretty_and_version_1_files_are_always_validated(tmp_path, validations) -> None:
+    pretty = tmp_path / "pretty.json"
+    TodoStorage(str(pretty)).save(_todos())
+    legacy = tmp_path / "legacy.json"
+    envelope = {"format": "flywheel-todo", "version": 1, "todos": [t.to_dict() for t in _todos()]}
+    legacy.write_text(json.dumps(envelope), encoding="utf-8")
+
+    assert len(TodoStorage(str(pretty)).load()) == 2
+    assert len(TodoStorage(str(legacy)).load()) == 2
+    assert len(validations) == 4
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership check")
+def test_file_writable_by_others_is_not_trusted(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="compact").save(_todos())
+    data = db.read_bytes()
+
+    with db.open("rb") as f:
+        assert read_trusted(data, f.fileno()) is not None
+    db.chmod(0o666)
+    with db.open("rb") as f:
+        assert read_trusted(data, f.fileno()) is None
@@ -0,0 +1,94 @@
+"""Tests for the fast/durable/group durability modes of storage writes."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+import flywheel.storage as storage_module
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.oplog import OpLogStorage
+from flywheel.sqlite_storage import SqliteStorage
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+@pytest.fixture
+def events(monkeypatch) -> list[str]:
+    """Record fsync calls (as 'file' or 'dir') and os.replace calls in order."""
+    log: list[str] = []
+    real_fsync, real_replace = os.fsync, os.replace
+
+    def fsync(fd: int) -> None:
+        log.append("dir" if os.path.isdir(f"/proc/self/fd/{fd}") else "file")
+        real_fsync(fd)
+
+    def replace(src, dst) -> None:
+        log.append("replace")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(storage_module.os, "fsync", fsync)
+    monkeypatch.setattr(storage_module.os, "replace", replace)
+    return log
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell fds apart")
+def test_durable_fsyncs_file_before_and_directory_after_replace(tmp_path, events) -> None:
+    TodoStorage(str(tmp_path / "todo.json")).save([Todo(id=1, text="a")])
+
+    assert events == ["file", "replace", "dir"]
+
+
+def test_fast_never_fsyncs(tmp_path, events) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), durability="fast")
+    storage.save([Todo(id=1, text="a")])
+    storage.flush()
+
+    assert events == ["replace"]
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to tell fds apart")
+def test_group_flushes_many_saves_once(tmp_path, events) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), durability="group")
+    for i in range(1, 6):
+        storage.save([Todo(id=n, text="a") for n in range(1, i + 1)])
+    assert events == ["replace"] * 5
+
+    storage.flush()
+
+    assert events[5:] == ["file", "dir"]
+    assert len(TodoStorage(str(tmp_path / "todo.json")).load()) == 5
+
+
+def test_oplog_durable_append_fsyncs_log(tmp_path, events) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+    storage.save([Todo(id=1, text="a")])
+    del events[:]
+
+    storage.save([Todo(id=1, text="a"), Todo(id=2, text="b")])
+
+    assert events == ["file"]
+
+
+@pytest.mark.parametrize(("durability", "level"), [("fast", 0), ("group", 1), ("durable", 2)])
+def test_sqlite_durability_sets_synchronous(tmp_path, durability, level) -> None:
+    storage = SqliteStorage(str(tmp_path / "todo.sqlite"), durability=durability)
+
+    assert storage._connection().execute("PRAGMA synchronous").fetchone() == (level,)
+    storage.close()
+
+
+def test_unknown_durability_is_rejected(tmp_path) -> None:
+    with pytest.raises(ValueError, match=r"Unknown durability mode: 'sometimes'"):
+        TodoApp(str(tmp_path / "todo.json"), durability="sometimes")
+
+
+def test_cli_durability_flag(tmp_path, events, capsys) -> None:
+    args = build_parser().parse_args(
+        ["--db", str(tmp_path / "todo.json"), "--durability", "fast", "add", "a"]
+    )
+
+    assert run_command(args) == 0
+    assert events == ["replace"]
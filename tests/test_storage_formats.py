@@ -0,0 +1,120 @@
+"""Tests for the pretty, compact and binary on-disk formats."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from flywheel.cli import build_parser, run_command
+from flywheel.formats import FORMAT_VERSION, FORMATS, detect_format
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def _todos() -> list[Todo]:
+    return [
+        Todo(id=1, text="plain"),
+        Todo(id=2, text='quotes "and" \\ backslash', done=True),
+        Todo(id=3, text="unicode 你好 and newline\n"),
+    ]
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_roundtrip_and_auto_detection(tmp_path, format) -> None:
+    db = tmp_path / "todo.db"
+    todos = _todos()
+    TodoStorage(str(db), format=format).save(todos)
+
+    assert detect_format(db.read_bytes()[:16]) == format
+    loaded = TodoStorage(str(db)).load()
+    assert [todo.to_dict() for todo in loaded] == [todo.to_dict() for todo in todos]
+
+
+def test_pretty_format_is_default_bare_list(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db)).save(_todos())
+
+    assert isinstance(json.loads(db.read_text(encoding="utf-8")), list)
+
+
+def test_compact_format_has_versioned_header(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="compact").save(_todos())
+
+    raw = db.read_text(encoding="utf-8")
+    assert "\n  " not in raw
+    envelope = json.loads(raw)
+    assert envelope["format"] == "flywheel-todo"
+    assert envelope["version"] == FORMAT_VERSION
+    assert isinstance(envelope["checksum"], int)
+    assert len(envelope["todos"]) == 3
+
+
+def test_compact_and_binary_are_smaller_than_pretty(tmp_path) -> None:
+    todos = [Todo(id=i, text=f"task number {i}") for i in range(1, 200)]
+    sizes = {}
+    for format in FORMATS:
+        db = tmp_path / f"todo.{format}"
+        TodoStorage(str(db), format=format).save(todos)
+        sizes[format] = db.stat().st_size
+
+    assert sizes["binary"] < sizes["compact"] < sizes["pretty"]
+
+
+def test_save_keeps_detected_format(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    TodoStorage(str(db), format="binary").save(_todos())
+
+    storage = TodoStorage(str(db))
+    todos = storage.load()
+    todos[0].mark_done()
+    storage.save(todos)
+    assert detect_format(db.read_bytes()[:16]) == "binary"
+
+    # Even without a prior load the existing file's format is preserved
+    TodoStorage(str(db)).save(todos)
+    assert detect_format(db.read_bytes()[:16]) == "binary"
+
+
+def test_rejects_unknown_and_future_formats(tmp_path) -> None:
+    with pytest.raises(ValueError, match=r"Unknown storage format"):
+        TodoStorage(str(tmp_path / "x"), format="xml")
+
+    db = tmp_path / "future.json"
+    db.write_text('{"format": "flywheel-todo", "version": 99, "todos": []}', encoding="utf-8")
+    with pytest.raises(ValueError, match=r"Unsupported todo file version 99"):
+        TodoStorage(str(db)).load()
+
+
+def test_non_envelope_object_is_still_rejected(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text('{"todos": [{"id": 1, "text": "x"}]}', encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"must be a JSON list"):
+        TodoStorage(str(db)).load()
+
+
+def test_truncated_binary_file_is_rejected(tmp_path) -> None:
+    db = tmp_path / "todo.bin"
+    TodoStorage(str(db), format="binary").save(_todos())
+    db.write_bytes(db.read_bytes()[:-5])
+
+    with pytest.raises(ValueError, match=r"Truncated binary todo file"):
+        TodoStorage(str(db)).load()
+
+
+def test_cli_migrate_converts_between_formats(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    parser = build_parser()
+    run_command(parser.parse_args(["--db", db, "add", "task"]))
+
+    for format in ("binary", "compact", "pretty"):
+        assert run_command(parser.parse_args(["--db", db, "migrate", "--format", format])) == 0
+        with open(db, "rb") as f:
+            assert detect_format(f.read(16)) == format
+
+    assert run_command(parser.parse_args(["--db", db, "list"])) == 0
+    out = capsys.readouterr().out
+    assert "Migrated 1 todos to binary format" in out
+    assert "task" in out
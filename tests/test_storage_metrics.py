@@ -0,0 +1,143 @@
+"""Tests for TodoStorage I/O metrics, header counts and `todo stats`."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def _todos() -> list[Todo]:
+    return [Todo(id=1, text="a", done=True), Todo(id=2, text="b"), Todo(id=3, text="c")]
+
+
+@pytest.mark.parametrize("format", ["pretty", "compact", "binary"])
+def test_metrics_count_loads_and_saves(tmp_path, format) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), format=format)
+    storage.save(_todos())
+    size = storage.path.stat().st_size
+
+    assert len(storage.load()) == 3
+    metrics = storage.metrics.as_dict()
+    assert metrics["saves"] == 1
+    assert metrics["bytes_written"] == size
+    assert metrics["records_written"] == 3
+    assert metrics["encode_ns"] > 0
+    assert metrics["loads"] == 1
+    assert metrics["bytes_read"] == size
+    assert metrics["records_read"] == 3
+    assert metrics["parse_ns"] > 0
+
+
+def test_iter_load_stopped_early_counts_what_it_read(tmp_path) -> None:
+    TodoStorage(str(tmp_path / "todo.json")).save(_todos())
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+
+    todos = storage.iter_load()
+    next(todos)
+    todos.close()
+
+    assert storage.metrics.loads == 1
+    assert storage.metrics.records_read == 1
+    assert 0 < storage.metrics.bytes_read <= storage.path.stat().st_size
+
+
+@pytest.mark.parametrize("format", ["compact", "binary"])
+def test_counts_come_from_the_header(tmp_path, monkeypatch, format) -> None:
+    TodoStorage(str(tmp_path / "todo.json"), format=format).save(_todos())
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("counts must not decode the records")
+
+    monkeypatch.setattr(storage, "_decode", fail)
+    assert storage.counts() == (3, 1)
+    assert storage.metrics.bytes_read == storage.path.stat().st_size
+    assert storage.metrics.loads == 0
+
+
+def test_header_counts_of_an_edited_file_are_not_trusted(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), format="compact")
+    storage.save(_todos())
+    envelope = json.loads(storage.path.read_bytes())
+    del envelope["todos"][1]
+    storage.path.write_text(json.dumps(envelope, separators=(",", ":")))
+
+    assert storage.counts() == (2, 1)
+    assert len(storage.load()) == 2
+
+
+@pytest.mark.parametrize("format", ["compact", "binary"])
+def test_edited_header_counts_are_not_trusted(tmp_path, format) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), format=format)
+    storage.save(_todos())
+    data = storage.path.read_bytes()
+    if format == "compact":
+        data = data.replace(b'"count":3,"done":1,', b'"count":99,"done":50,', 1)
+    else:
+        # The record count also frames the records; the done count does not
+        data = data[:20] + (50).to_bytes(8, "little") + data[28:]
+    storage.path.write_bytes(data)
+
+    assert storage.counts() == (3, 1)
+    assert storage.metrics.loads == 1
+
+
+def test_counting_records_is_measured_as_a_load(tmp_path) -> None:
+    TodoStorage(str(tmp_path / "todo.json")).save(_todos())
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+
+    assert storage.counts() == (3, 1)
+    metrics = storage.metrics.as_dict()
+    assert metrics["loads"] == 1
+    assert metrics["bytes_read"] == storage.path.stat().st_size
+    assert metrics["records_read"] == 3
+    assert metrics["parse_ns"] > 0
+
+
+def test_counts_of_pretty_files_decode_the_records(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"))
+    assert storage.counts() == (0, 0)
+
+    storage.save(_todos())
+    assert storage.counts() == (3, 1)
+    assert storage.metrics.records_read == 3
+
+
+def test_header_counts_of_a_shared_file_are_not_trusted(tmp_path) -> None:
+    storage = TodoStorage(str(tmp_path / "todo.json"), format="compact")
+    storage.save(_todos())
+    data = storage.path.read_bytes().replace(b'"done":1,', b'"done":2,', 1)
+    storage.path.write_bytes(data)
+
+    storage.path.chmod(0o666)
+    assert storage.counts() == (3, 1)
+
+
+def test_cli_stats(tmp_path, capsys) -> None:
+    db = str(tmp_path / "todo.json")
+    TodoStorage(db).save(_todos())
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "stats"])) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "Todos: 3 (2 pending, 1 done)"
+    assert lines[1].startswith("Read: ")
+    assert lines[2] == "Written: 0 bytes, 0 records (0 saves, encode 0.0 ms)"
+
+    assert run_command(parser.parse_args(["--db", db, "stats", "--json"])) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert (stats["total"], stats["pending"], stats["done"]) == (3, 2, 1)
+    assert stats["storage"]["records_read"] == 3
+
+
+def test_stats_of_backends_without_metrics(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.sqlite"))
+    app.add("x")
+    app.mark_done(app.add("y").id)
+
+    assert app.stats() == {"total": 2, "pending": 1, "done": 1, "storage": None}
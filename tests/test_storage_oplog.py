@@ -0,0 +1,145 @@
+"""Tests for the append-only operation log storage backend."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.oplog import OpLogStorage, log_path_for
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def test_oplog_roundtrip_replays_log(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+
+    storage.save([Todo(id=1, text="a"), Todo(id=2, text="b")])
+
+    loaded = OpLogStorage(str(db)).load()
+    assert [todo.text for todo in loaded] == ["a", "b"]
+    # Nothing was compacted yet, so all data lives in the log
+    assert not db.exists()
+    assert (tmp_path / "todo.json.log").exists()
+
+
+def test_oplog_save_appends_only_changed_records(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+    todos = [Todo(id=i, text=f"task {i}") for i in range(1, 101)]
+    storage.save(todos)
+    size_before = storage.log_size()
+
+    todos = storage.load()
+    todos[41].mark_done()
+    storage.save(todos)
+
+    appended = storage.log_path.read_bytes()[size_before:].decode("utf-8").splitlines()
+    assert len(appended) == 1
+    record = json.loads(appended[0])
+    assert record["op"] == "put"
+    assert record["todo"]["id"] == 42
+    assert record["todo"]["done"] is True
+
+
+def test_oplog_records_removals(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+    storage.save([Todo(id=1, text="keep"), Todo(id=2, text="drop")])
+
+    todos = storage.load()
+    storage.save([todo for todo in todos if todo.id != 2])
+
+    loaded = OpLogStorage(str(db)).load()
+    assert [todo.id for todo in loaded] == [1]
+
+
+def test_oplog_compacts_past_threshold(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db), compact_threshold=200)
+
+    todos = [Todo(id=i, text=f"task {i}") for i in range(1, 11)]
+    storage.save(todos)
+
+    # Threshold exceeded: snapshot written and log truncated
+    assert storage.log_size() == 0
+    assert [todo.id for todo in TodoStorage(str(db)).load()] == list(range(1, 11))
+    assert [todo.id for todo in OpLogStorage(str(db)).load()] == list(range(1, 11))
+
+
+def test_oplog_replay_over_compacted_snapshot_is_idempotent(tmp_path) -> None:
+    """A crash between snapshot replace and log truncate must not corrupt state."""
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+    storage.save([Todo(id=1, text="a"), Todo(id=2, text="b")])
+    todos = storage.load()
+    storage.save(todos[:1])
+    log_content = storage.log_path.read_bytes()
+
+    storage.compact()
+    # Simulate the crash: the log still holds records already in the snapshot
+    storage.log_path.write_bytes(log_content)
+
+    loaded = OpLogStorage(str(db)).load()
+    assert [(todo.id, todo.text) for todo in loaded] == [(1, "a")]
+
+
+def test_oplog_ignores_torn_trailing_record(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    storage = OpLogStorage(str(db))
+    storage.save([Todo(id=1, text="a")])
+
+    with storage.log_path.open("ab") as f:
+        f.write(b'{"op":"put","todo":{"id":2,"te')
+
+    loaded = OpLogStorage(str(db)).load()
+    assert [todo.id for todo in loaded] == [1]
+
+
+def test_oplog_rejects_corrupt_record(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    (tmp_path / "todo.json.log").write_text('{"op":"bogus"}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"Invalid record in operation log"):
+        OpLogStorage(str(db)).load()
+
+
+def test_app_detects_existing_oplog(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+    TodoApp(db, backend="oplog").add("logged")
+
+    # Without --backend the log beside the database is picked up automatically
+    app = TodoApp(db)
+    assert isinstance(app.storage, OpLogStorage)
+    assert [todo.text for todo in app.list()] == ["logged"]
+
+
+def test_cli_backend_flag_selects_oplog(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "--backend", "oplog", "add", "x"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "done", "1"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "list"])) == 0
+
+    out = capsys.readouterr().out
+    assert "[x]   1 x" in out
+    assert (tmp_path / "cli.json.log").exists()
+
+
+def test_append_after_torn_tail_keeps_log_readable(tmp_path) -> None:
+    db = str(tmp_path / "todo.json")
+    app = TodoApp(db, backend="oplog")
+    app.add("a")
+    app.add("b")
+    log = log_path_for(tmp_path / "todo.json")
+    # Simulate a crash in the middle of appending the second record
+    log.write_bytes(log.read_bytes()[:-10])
+
+    app = TodoApp(db)
+    app.add("c")
+
+    assert [todo.text for todo in TodoApp(db).list()] == ["a", "c"]
+    assert log.read_bytes().endswith(b"\n")
@@ -0,0 +1,127 @@
+"""Tests for the sharded storage backend."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from flywheel.backends import RecordStore, open_storage
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.locking import ConflictError
+from flywheel.sharded import ShardedStorage
+from flywheel.todo import Todo
+
+
+def _shard_mtimes(path) -> dict[str, int]:
+    return {p.name: p.stat().st_mtime_ns for p in path.glob("shard-*.json")}
+
+
+def test_sharded_roundtrip_and_manifest(tmp_path) -> None:
+    db = tmp_path / "todos"
+    storage = ShardedStorage(str(db), shard_size=10)
+    storage.save([Todo(id=i, text=f"t{i}") for i in range(1, 26)])
+
+    assert sorted(p.name for p in db.glob("shard-*.json")) == [
+        "shard-000000.json",
+        "shard-000001.json",
+        "shard-000002.json",
+    ]
+    manifest = json.loads((db / "manifest.json").read_text())
+    assert manifest["shard_size"] == 10
+    assert manifest["high_water"] == 25
+    assert manifest["shards"] == [0, 1, 2]
+
+    # An existing database keeps the shard size recorded in its manifest
+    loaded = ShardedStorage(str(db), shard_size=500).load()
+    assert [todo.id for todo in loaded] == list(range(1, 26))
+
+
+def test_save_rewrites_only_dirty_shards(tmp_path) -> None:
+    db = tmp_path / "todos"
+    ShardedStorage(str(db), shard_size=10).save([Todo(id=i, text=f"t{i}") for i in range(1, 31)])
+    before = _shard_mtimes(db)
+
+    storage = ShardedStorage(str(db))
+    todos = storage.load()
+    todos[14].mark_done()
+    storage.save(todos)
+
+    after = _shard_mtimes(db)
+    changed = {name for name in after if after[name] != before[name]}
+    assert changed == {"shard-000001.json"}
+
+
+def test_record_operations_touch_one_shard(tmp_path) -> None:
+    db = tmp_path / "todos"
+    storage = ShardedStorage(str(db), shard_size=10)
+    assert isinstance(storage, RecordStore)
+    for i in range(25):
+        storage.insert(f"t{i + 1}")
+    before = _shard_mtimes(db)
+
+    assert storage.set_done(3, True).done is True
+    after = _shard_mtimes(db)
+    assert {name for name in after if after[name] != before[name]} == {"shard-000000.json"}
+
+    assert storage.get(3).done is True
+    assert storage.set_done(99, True) is None
+    assert [todo.id for todo in storage.pending()][:3] == [1, 2, 4]
+
+
+def test_ids_are_not_reused_and_empty_shards_are_removed(tmp_path) -> None:
+    db = tmp_path / "todos"
+    storage = ShardedStorage(str(db), shard_size=2)
+    for text in ("a", "b", "c"):
+        storage.insert(text)
+
+    assert storage.delete(3) is True
+    assert storage.delete(3) is False
+    assert not (db / "shard-000001.json").exists()
+    assert json.loads((db / "manifest.json").read_text())["shards"] == [0]
+    assert storage.insert("d").id == 4
+
+
+def test_stale_save_conflicts(tmp_path) -> None:
+    db = str(tmp_path / "todos")
+    first, second = ShardedStorage(db), ShardedStorage(db)
+    first.save([Todo(id=1, text="a")])
+    todos = first.load()
+    second.load()
+    second.save([Todo(id=1, text="a"), Todo(id=2, text="b")])
+
+    with pytest.raises(ConflictError):
+        first.save(todos)
+
+
+def test_rejects_todo_in_wrong_shard(tmp_path) -> None:
+    db = tmp_path / "todos"
+    ShardedStorage(str(db), shard_size=10).save([Todo(id=1, text="a")])
+    (db / "shard-000000.json").write_text(json.dumps([{"id": 50, "text": "x"}]))
+
+    with pytest.raises(ValueError, match=r"wrong shard"):
+        ShardedStorage(str(db)).load()
+
+
+def test_directory_db_is_detected_and_used_by_cli(tmp_path, capsys) -> None:
+    db = str(tmp_path / "todos")
+    parser = build_parser()
+
+    assert (
+        run_command(parser.parse_args(["--db", db, "--backend", "sharded", "add", "a", "b"])) == 0
+    )
+    assert isinstance(open_storage(db), ShardedStorage)
+    assert run_command(parser.parse_args(["--db", db, "done", "2"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "rename", "1", "z"])) == 0
+
+    assert "Done #2: b" in capsys.readouterr().out
+    assert [(t.id, t.text, t.done) for t in TodoApp(db).list()] == [(1, "z", False), (2, "b", True)]
+
+
+def test_plain_directory_is_not_taken_for_a_sharded_db(tmp_path) -> None:
+    folder = tmp_path / "somewhere"
+    folder.mkdir()
+
+    assert not isinstance(open_storage(str(folder)), ShardedStorage)
+    assert run_command(build_parser().parse_args(["--db", str(folder), "add", "x"])) == 1
+    assert list(folder.iterdir()) == []
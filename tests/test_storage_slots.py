@@ -0,0 +1,126 @@
+"""Tests for the slot-file storage backend."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from flywheel import slots
+from flywheel.backends import RecordStore, open_storage
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.locking import ConflictError
+from flywheel.slots import SlotStorage, heap_path_for
+from flywheel.todo import Todo
+
+
+@pytest.fixture
+def storage(tmp_path) -> SlotStorage:
+    storage = SlotStorage(str(tmp_path / "todo.slots"))
+    for text in ("one", "two", "three"):
+        storage.insert(text)
+    return storage
+
+
+def test_roundtrip_keeps_every_field(tmp_path) -> None:
+    storage = SlotStorage(str(tmp_path / "todo.slots"))
+    todos = [
+        Todo(id=2, text="zwei ü", done=True, created_at=1_700_000_000_000_000),
+        Todo(id=1, text="odd", created_at="yesterday", updated_at="today"),
+    ]
+    storage.save(todos)
+
+    loaded = SlotStorage(str(storage.path)).load()
+    assert loaded == sorted(todos, key=lambda todo: todo.id)
+    assert isinstance(storage, RecordStore)
+
+
+def test_status_toggle_is_one_small_write_in_place(storage, monkeypatch) -> None:
+    path, heap = storage.path, heap_path_for(storage.path, 0)
+    inode, heap_before = path.stat().st_ino, heap.read_bytes()
+    writes = []
+    real_pwrite = os.pwrite
+
+    def pwrite(fd: int, data: bytes, offset: int) -> int:
+        writes.append(data)
+        return real_pwrite(fd, data, offset)
+
+    monkeypatch.setattr(os, "pwrite", pwrite)
+
+    todo = storage.set_done(2, True)
+
+    assert (todo.id, todo.text, todo.done) == (2, "two", True)
+    assert [len(data) for data in writes] == [9]
+    assert path.stat().st_ino == inode  # not replaced
+    assert heap.read_bytes() == heap_before
+    assert storage.get(2).done
+    assert not storage.set_done(2, False).done
+    assert storage.set_done(9, True) is None
+
+
+def test_delete_frees_the_slot_until_vacuum(storage) -> None:
+    size = storage.path.stat().st_size
+
+    assert storage.delete(1)
+    assert storage.delete(3)
+    assert not storage.delete(3)
+
+    assert storage.get(1) is None
+    assert [todo.id for todo in storage.load()] == [2]
+    assert storage.free_slots() == [2, 0]
+    assert storage.path.stat().st_size == size
+
+    assert storage.vacuum() == 2
+    assert storage.free_slots() == []
+    assert storage.path.stat().st_size < size
+    assert not heap_path_for(storage.path, 0).exists()
+    assert [todo.text for todo in storage.load()] == ["two"]
+    # Ids are never handed out again
+    assert storage.insert("four").id == 4
+
+
+def test_vacuum_runs_once_half_the_slots_are_free(storage, monkeypatch) -> None:
+    monkeypatch.setattr(slots, "_AUTO_VACUUM_MIN_FREE", 2)
+
+    storage.delete(1)
+    assert storage.free_slots() == [0]
+    storage.delete(2)
+    assert storage.free_slots() == []
+    assert [todo.id for todo in storage.load()] == [3]
+
+
+def test_stale_save_conflicts_with_in_place_writes(storage) -> None:
+    todos = storage.load()
+    SlotStorage(str(storage.path)).set_done(1, True)
+
+    with pytest.raises(ConflictError):
+        storage.save(todos)
+
+
+def test_corrupt_files_are_rejected(tmp_path, storage) -> None:
+    data = storage.path.read_bytes()
+    storage.path.write_bytes(data[:-5])
+    with pytest.raises(ValueError, match=r"Truncated slot file"):
+        storage.load()
+
+    storage.path.write_bytes(b"not a slot file at all, nope")
+    with pytest.raises(ValueError, match=r"not a flywheel slot file"):
+        storage.get(1)
+
+
+def test_backend_is_detected_by_suffix_and_magic(tmp_path, storage) -> None:
+    assert isinstance(open_storage(str(tmp_path / "new.slots")), SlotStorage)
+    renamed = tmp_path / "todos.db"
+    os.rename(storage.path, renamed)
+    os.rename(heap_path_for(storage.path, 0), heap_path_for(renamed, 0))
+    assert isinstance(open_storage(str(renamed)), SlotStorage)
+
+
+def test_cli_on_slot_backend(tmp_path, capsys) -> None:
+    db = str(tmp_path / "todo.slots")
+    parser = build_parser()
+    for argv in (["add", "a"], ["add", "b", "c"], ["done", "2"], ["rm", "1"], ["list"]):
+        assert run_command(parser.parse_args(["--db", db, *argv])) == 0
+
+    assert capsys.readouterr().out.splitlines()[-2:] == ["[x]   2 b", "[ ]   3 c"]
+    assert TodoApp(db).rename(3, "see").text == "see"
@@ -0,0 +1,173 @@
+"""Tests for the SQLite storage backend."""
+
+from __future__ import annotations
+
+import sqlite3
+import stat
+import threading
+
+import pytest
+
+from flywheel.backends import RecordStore, open_storage
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.locking import ConflictError
+from flywheel.sqlite_storage import SqliteStorage
+from flywheel.todo import Todo
+
+
+def test_sqlite_roundtrip(tmp_path) -> None:
+    storage = SqliteStorage(str(tmp_path / "todo.sqlite"))
+
+    storage.save([Todo(id=1, text="x"), Todo(id=2, text="y", done=True)])
+
+    loaded = SqliteStorage(str(tmp_path / "todo.sqlite")).load()
+    assert [(todo.id, todo.text, todo.done) for todo in loaded] == [(1, "x", False), (2, "y", True)]
+
+
+def test_sqlite_database_created_owner_only(tmp_path) -> None:
+    db = tmp_path / "todo.sqlite"
+    SqliteStorage(str(db)).load()
+
+    assert stat.S_IMODE(db.stat().st_mode) == 0o600
+
+
+def test_sqlite_indexes_id_and_done(tmp_path) -> None:
+    db = tmp_path / "todo.sqlite"
+    SqliteStorage(str(db)).load()
+
+    conn = sqlite3.connect(db)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM todos WHERE done = 0 ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert any("todos_done_id" in row[-1] for row in plan)
+
+
+def test_sqlite_record_operations(tmp_path) -> None:
+    storage = SqliteStorage(str(tmp_path / "todo.sqlite"))
+    assert isinstance(storage, RecordStore)
+
+    first = storage.insert("first")
+    second = storage.insert("second")
+    assert (first.id, second.id) == (1, 2)
+
+    done = storage.set_done(first.id, True)
+    assert done is not None
+    assert done.done is True
+    assert [todo.id for todo in storage.pending()] == [2]
+
+    assert storage.delete(second.id) is True
+    assert storage.delete(second.id) is False
+    assert storage.set_done(99, True) is None
+    assert storage.get(first.id) == done
+
+
+def test_app_uses_sqlite_for_single_item_operations(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.sqlite"))
+    assert isinstance(app.storage, SqliteStorage)
+
+    app.add("a")
+    app.add("b")
+    app.mark_done(1)
+    assert [todo.text for todo in app.list(show_all=False)] == ["b"]
+
+    app.mark_undone(1)
+    app.remove(2)
+    assert [(todo.id, todo.done) for todo in app.list()] == [(1, False)]
+
+    with pytest.raises(ValueError, match=r"Todo #7 not found"):
+        app.mark_done(7)
+    with pytest.raises(ValueError, match=r"Todo #7 not found"):
+        app.remove(7)
+
+
+def test_sqlite_transaction_blocks_concurrent_writers(tmp_path) -> None:
+    db = str(tmp_path / "todo.sqlite")
+    first = TodoApp(db)
+    first.add("before")
+    in_transaction = threading.Event()
+    added = threading.Event()
+
+    def concurrent_add() -> None:
+        # SQLite connections stay on the thread that opened them
+        second = TodoApp(db)
+        in_transaction.wait()
+        second.add("concurrent")
+        added.set()
+
+    writer = threading.Thread(target=concurrent_add)
+    writer.start()
+    with first.transaction() as tx:
+        tx.add("batched")
+        in_transaction.set()
+        # The other writer waits for this transaction to commit
+        assert not added.wait(0.2)
+    writer.join()
+
+    assert sorted(todo.text for todo in first.list()) == ["batched", "before", "concurrent"]
+
+
+def test_sqlite_save_conflicts_with_change_since_load(tmp_path) -> None:
+    db = str(tmp_path / "todo.sqlite")
+    mine, other = SqliteStorage(db), SqliteStorage(db)
+    other.insert("a")
+
+    todos = mine.load()
+    other.insert("b")
+    with pytest.raises(ConflictError):
+        mine.save([*todos, Todo(id=2, text="mine")])
+
+    assert [todo.text for todo in mine.load()] == ["a", "b"]
+
+
+def test_sqlite_save_writes_only_changed_rows(tmp_path) -> None:
+    db = tmp_path / "todo.sqlite"
+    storage = SqliteStorage(str(db))
+    storage.save([Todo(id=i, text=f"t{i}") for i in range(1, 6)])
+    statements: list[str] = []
+    storage._connection().set_trace_callback(statements.append)
+
+    todos = storage.load()
+    todos[1].mark_done()
+    storage.save([todo for todo in todos if todo.id != 4])
+
+    deletes, upserts = (
+        [s for s in statements if s.startswith(verb)] for verb in ("DELETE", "INSERT")
+    )
+    assert deletes == ["DELETE FROM todos WHERE id = 4"]
+    assert len(upserts) == 1
+    assert "VALUES (2," in upserts[0]
+    assert [(todo.id, todo.done) for todo in storage.load()] == [
+        (1, False),
+        (2, True),
+        (3, False),
+        (5, False),
+    ]
+
+
+def test_open_storage_detects_sqlite_by_header(tmp_path) -> None:
+    db = tmp_path / "todo.data"
+    SqliteStorage(str(db)).save([Todo(id=1, text="x")])
+
+    assert isinstance(open_storage(str(db)), SqliteStorage)
+
+
+def test_cli_backend_flag_selects_sqlite(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.store")
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "--backend", "sqlite", "add", "x"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "list", "--pending"])) == 0
+
+    assert "x" in capsys.readouterr().out
+    assert isinstance(open_storage(db), SqliteStorage)
+
+
+def test_existing_json_file_with_db_suffix_stays_json(tmp_path, capsys) -> None:
+    db = str(tmp_path / "todos.db")
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "--backend", "json", "add", "x"])) == 0
+    assert not isinstance(open_storage(db), SqliteStorage)
+    assert run_command(parser.parse_args(["--db", db, "list"])) == 0
+    assert "x" in capsys.readouterr().out
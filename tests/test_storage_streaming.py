@@ -0,0 +1,124 @@
+"""Tests for the streaming JSON loader in TodoStorage."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import flywheel.formats as formats_module
+import flywheel.storage as storage_module
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.storage import TodoStorage
+
+
+def _write(db, items) -> None:
+    db.write_text(json.dumps(items, indent=2), encoding="utf-8")
+
+
+def test_iter_load_decodes_across_chunk_boundaries(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(formats_module, "_READ_CHUNK_CHARS", 7)
+    db = tmp_path / "todo.json"
+    items = [
+        {"id": i, "text": f"task {i} " + "é" * (i % 5), "done": i % 2 == 0} for i in range(500)
+    ]
+    _write(db, items)
+
+    loaded = list(TodoStorage(str(db)).iter_load())
+    assert [todo.to_dict()["text"] for todo in loaded] == [item["text"] for item in items]
+    assert [todo.done for todo in loaded] == [item["done"] for item in items]
+
+
+def test_iter_load_yields_records_before_reaching_bad_tail(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text('[{"id": 1, "text": "ok"}, {"id": 2, "text": 3}]', encoding="utf-8")
+
+    todos = TodoStorage(str(db)).iter_load()
+    assert next(todos).text == "ok"
+    with pytest.raises(ValueError, match=r"'text' must be a string"):
+        next(todos)
+
+
+def test_load_reports_error_position_like_json(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(formats_module, "_READ_CHUNK_CHARS", 16)
+    db = tmp_path / "todo.json"
+    content = json.dumps([{"id": i, "text": "t"} for i in range(50)], indent=2)[:-40] + "?"
+    db.write_text(content, encoding="utf-8")
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(content)
+    with pytest.raises(ValueError, match=r"Invalid JSON") as exc_info:
+        TodoStorage(str(db)).load()
+    assert f"line {expected.value.lineno}, column {expected.value.colno}" in str(exc_info.value)
+
+
+def test_syntax_error_in_a_large_file_is_reported_at_once(tmp_path, monkeypatch) -> None:
+    db = tmp_path / "todo.json"
+    content = json.dumps([{"id": i, "text": f"t{i}"} for i in range(30_000)], indent=2)
+    content = content.replace('"text": "t1"', '"text": t1', 1)
+    assert len(content) > formats_module._MAX_RECORD_CHARS
+    db.write_text(content, encoding="utf-8")
+    fills = []
+    fill = formats_module._JsonArrayReader._fill
+
+    def counting_fill(self) -> bool:
+        fills.append(1)
+        return fill(self)
+
+    monkeypatch.setattr(formats_module._JsonArrayReader, "_fill", counting_fill)
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(content)
+    with pytest.raises(ValueError, match=r"Invalid JSON") as exc_info:
+        TodoStorage(str(db)).load()
+    assert f"line {expected.value.lineno}, column {expected.value.colno}" in str(exc_info.value)
+    assert len(fills) == 1
+
+
+def test_load_rejects_oversized_record(tmp_path, monkeypatch) -> None:
+    """Security: a single huge record is rejected without reading the rest of the file."""
+    monkeypatch.setattr(formats_module, "_MAX_RECORD_CHARS", 1000)
+    db = tmp_path / "todo.json"
+    _write(db, [{"id": 1, "text": "ok"}, {"id": 2, "text": "x" * 5000}])
+
+    with pytest.raises(ValueError, match=r"exceeds 1,000 characters"):
+        TodoStorage(str(db)).load()
+
+
+def test_load_rejects_too_many_records(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(storage_module, "_MAX_TODO_COUNT", 3)
+    db = tmp_path / "todo.json"
+    _write(db, [{"id": i, "text": "t"} for i in range(4)])
+
+    with pytest.raises(ValueError, match=r"Too many todos"):
+        TodoStorage(str(db)).load()
+
+
+def test_load_rejects_non_object_records(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text("[1]", encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"expected a JSON object"):
+        TodoStorage(str(db)).load()
+
+
+def test_app_iter_todos_filters_pending(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    app.add("a")
+    app.add("b")
+    app.mark_done(1)
+
+    assert [todo.text for todo in app.iter_todos(show_all=False)] == ["b"]
+    assert [todo.text for todo in app.iter_todos()] == ["a", "b"]
+
+
+def test_cli_list_pending_prints_rows_before_error(tmp_path, capsys) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text('[{"id": 1, "text": "first"}, {"id": 2}]', encoding="utf-8")
+
+    args = build_parser().parse_args(["--db", str(db), "list", "--pending"])
+    assert run_command(args) == 1
+
+    captured = capsys.readouterr()
+    assert "first" in captured.out
+    assert "'text'" in captured.err
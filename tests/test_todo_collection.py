@@ -0,0 +1,86 @@
+"""Tests for the id-indexed TodoCollection used by TodoApp."""
+
+from __future__ import annotations
+
+import pytest
+
+from flywheel.cli import TodoApp
+from flywheel.collection import TodoCollection
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+
+def test_collection_preserves_insertion_order() -> None:
+    todos = TodoCollection([Todo(id=3, text="c"), Todo(id=1, text="a"), Todo(id=2, text="b")])
+
+    assert [todo.id for todo in todos] == [3, 1, 2]
+    assert len(todos) == 3
+    assert todos.to_list()[0].text == "c"
+
+
+def test_collection_lookup_and_pop_by_id() -> None:
+    todos = TodoCollection([Todo(id=1, text="a"), Todo(id=2, text="b")])
+
+    assert todos.get(2) is not None
+    assert todos.get(99) is None
+
+    popped = todos.pop(1)
+    assert popped is not None
+    assert popped.text == "a"
+    assert todos.pop(1) is None
+    assert [todo.id for todo in todos] == [2]
+
+
+def test_collection_next_id_matches_max_plus_one() -> None:
+    todos = TodoCollection()
+    assert todos.next_id() == 1
+
+    todos.append(Todo(id=5, text="a"))
+    todos.append(Todo(id=2, text="b"))
+    assert todos.next_id() == 6
+
+    todos.append(Todo(id=7, text="c"))
+    assert todos.next_id() == 8
+
+    # Removing the maximum falls back to the next highest id, like max() did
+    todos.pop(7)
+    assert todos.next_id() == 6
+
+
+def test_collection_keeps_the_first_of_duplicate_ids() -> None:
+    todos = TodoCollection([Todo(id=1, text="a"), Todo(id=2, text="b"), Todo(id=1, text="c")])
+
+    assert [todo.text for todo in todos] == ["a", "b"]
+    with pytest.raises(ValueError, match=r"Duplicate todo id #1"):
+        todos.append(Todo(id=1, text="d"))
+
+
+def test_app_can_repair_a_database_with_duplicate_ids(tmp_path) -> None:
+    db = tmp_path / "db.json"
+    TodoStorage(str(db)).save([Todo(id=1, text="a"), Todo(id=1, text="b"), Todo(id=2, text="c")])
+    app = TodoApp(str(db))
+
+    assert app.mark_done(1).text == "a"
+    app.remove(1)
+
+    assert [todo.text for todo in app.list()] == ["c"]
+
+
+def test_storage_next_id_accepts_collection() -> None:
+    storage = TodoStorage()
+    todos = TodoCollection([Todo(id=4, text="a")])
+
+    assert storage.next_id(todos) == 5
+    assert storage.next_id([Todo(id=4, text="a")]) == 5
+
+
+def test_app_list_still_returns_list(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "db.json"))
+    app.add("a")
+    app.add("b")
+    app.remove(1)
+
+    todos = app.list()
+    assert isinstance(todos, list)
+    assert [todo.text for todo in todos] == ["b"]
+    assert app.add("c").id == 3
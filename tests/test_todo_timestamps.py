@@ -0,0 +1,156 @@
+"""Tests for epoch-microsecond timestamps and their lazy ISO rendering."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from flywheel.cli import TodoApp
+from flywheel.formats import (
+    _BINARY_HEADER,
+    _BINARY_MAGIC,
+    _BINARY_RECORD_V2,
+    FORMAT_VERSION,
+    encode,
+)
+from flywheel.lazy import LazyTodoFile
+from flywheel.storage import TodoStorage
+from flywheel.todo import Todo
+
+_ISO = "2024-05-06T07:08:09.123456+00:00"
+_US = 1714979289123456
+
+
+def test_new_todo_renders_utc_iso_and_microseconds() -> None:
+    todo = Todo(id=1, text="x")
+
+    assert todo.created_at.endswith("+00:00")
+    assert isinstance(todo.created_us, int)
+    assert todo.updated_us == todo.created_us
+
+
+def test_canonical_iso_string_converts_both_ways() -> None:
+    todo = Todo(id=1, text="x", created_at=_ISO, updated_at=_US)
+
+    assert todo.created_us == _US
+    assert todo.updated_at == _ISO
+    assert todo.to_dict()["created_at"] == _ISO
+    assert todo.to_record()["created_at"] == _US
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T00:00:00",
+        "yesterday",
+        "2024-01-01T00:00:00.000000+00:00",
+    ],
+)
+def test_non_canonical_strings_are_kept_verbatim(value) -> None:
+    todo = Todo(id=1, text="x", created_at=value, updated_at=value)
+
+    assert todo.created_us is None
+    assert todo.to_record()["created_at"] == value
+    assert todo.created_at == value
+
+
+def test_from_dict_stamps_missing_timestamps_with_now() -> None:
+    todo = Todo.from_dict({"id": 1, "text": "legacy"}, now=_US)
+
+    assert todo.created_at == todo.updated_at == _ISO
+
+
+@pytest.mark.parametrize("format", ["compact", "binary"])
+def test_compact_formats_store_integers_and_keep_odd_strings(tmp_path, format) -> None:
+    db = tmp_path / "todo.db"
+    todos = [
+        Todo(id=1, text="a", created_at=_ISO, updated_at=_ISO),
+        Todo(id=2, text="b", done=True, created_at="2024-01-01", updated_at=_ISO),
+    ]
+    TodoStorage(str(db), format=format).save(todos)
+
+    if format == "compact":
+        records = json.loads(db.read_bytes())["todos"]
+        assert [r["created_at"] for r in records] == [_US, "2024-01-01"]
+    loaded = TodoStorage(str(db)).load()
+    assert loaded == todos
+    assert list(TodoStorage(str(db)).iter_load()) == todos
+
+
+@pytest.mark.parametrize("value", [10**23, -(10**23)])
+def test_unrenderable_integer_timestamps_stay_writable(tmp_path, value) -> None:
+    db = tmp_path / "todo.json"
+    records = [{"id": 1, "text": "a", "created_at": value}]
+    db.write_text(json.dumps({"format": "flywheel-todo", "version": 4, "todos": records}))
+    app = TodoApp(str(db))
+
+    app.add("b")
+    app.mark_done(1)
+
+    todo = app.get(1)
+    assert todo.created_at == str(value)
+    assert todo.done is True
+
+
+def test_pretty_file_keeps_integer_timestamps_verbatim(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    db.write_text(json.dumps([{"id": 1, "text": "a", "created_at": 5}]))
+
+    (todo,) = TodoStorage(str(db)).load()
+
+    assert todo.created_at == "5"
+    assert todo.created_us is None
+
+
+def test_pretty_round_trip_is_byte_identical(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    records = [
+        {"id": 1, "text": "a", "done": False, "created_at": _ISO, "updated_at": _ISO},
+        {
+            "id": 2,
+            "text": "b",
+            "done": True,
+            "created_at": "2024-01-01",
+            "updated_at": "2024-01-01",
+        },
+    ]
+    db.write_text(json.dumps(records, ensure_ascii=False, indent=2))
+    original = db.read_bytes()
+
+    storage = TodoStorage(str(db))
+    storage.save(storage.load())
+
+    assert db.read_bytes() == original
+
+
+def test_version_2_binary_file_is_still_read(tmp_path) -> None:
+    db = tmp_path / "old.db"
+    text, created = b"legacy", _ISO.encode()
+    record = _BINARY_RECORD_V2.pack(7, 1, len(text), len(created), len(created))
+    db.write_bytes(_BINARY_HEADER.pack(_BINARY_MAGIC, 2, 0, 1) + record + text + created + created)
+
+    expected = [Todo(id=7, text="legacy", done=True, created_at=_ISO, updated_at=_ISO)]
+    assert TodoStorage(str(db)).load() == expected
+    with LazyTodoFile(db) as lazy:
+        assert lazy.get(7) == expected[0]
+
+
+def test_lazy_file_reads_current_binary_layout(tmp_path) -> None:
+    db = tmp_path / "todo.db"
+    todos = [Todo(id=i, text=f"t{i}", created_at=_US, updated_at="odd") for i in (1, 2)]
+    db.write_bytes(encode(todos, "binary"))
+
+    assert db.read_bytes()[8:10] == FORMAT_VERSION.to_bytes(2, "little")
+    with LazyTodoFile(db) as lazy:
+        assert lazy.get(2) == todos[1]
+
+
+def test_transaction_reads_the_clock_once(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    with app.transaction() as tx:
+        first, second = tx.add("one"), tx.add("two")
+        tx.mark_done(first.id)
+
+    assert first.created_us == second.created_us == first.updated_us == tx.now
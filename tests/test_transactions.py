@@ -0,0 +1,93 @@
+"""Tests for TodoApp.transaction() and the multi-target CLI commands."""
+
+from __future__ import annotations
+
+import pytest
+
+from flywheel.cli import TodoApp, build_parser, run_command
+from flywheel.storage import TodoStorage
+
+
+def test_transaction_saves_once(tmp_path, monkeypatch) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    saves = []
+    original_save = TodoStorage.save
+    monkeypatch.setattr(
+        TodoStorage, "save", lambda self, todos: saves.append(1) or original_save(self, todos)
+    )
+
+    with app.transaction() as tx:
+        for i in range(10):
+            tx.add(f"task {i}")
+        tx.mark_done(3)
+        tx.rename(4, "renamed")
+        tx.remove(5)
+
+    assert len(saves) == 1
+    todos = {todo.id: todo for todo in app.list()}
+    assert len(todos) == 9
+    assert todos[3].done is True
+    assert todos[4].text == "renamed"
+    assert 5 not in todos
+
+
+def test_transaction_rolls_back_on_error(tmp_path) -> None:
+    db = tmp_path / "todo.json"
+    app = TodoApp(str(db))
+    app.add("keep")
+    before = db.read_bytes()
+
+    with pytest.raises(ValueError, match=r"Todo #99 not found"), app.transaction() as tx:
+        tx.add("new")
+        tx.mark_done(1)
+        tx.mark_done(99)
+
+    assert db.read_bytes() == before
+
+
+def test_rename(tmp_path) -> None:
+    app = TodoApp(str(tmp_path / "todo.json"))
+    app.add("old")
+
+    assert app.rename(1, "  new  ").text == "new"
+    with pytest.raises(ValueError, match=r"cannot be empty"):
+        app.rename(1, " ")
+    assert app.get(1).text == "new"
+
+
+def test_cli_multi_target_commands(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    parser = build_parser()
+
+    assert run_command(parser.parse_args(["--db", db, "add", "a", "b", "c", "d"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "done", "1", "3"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "rm", "2-3"])) == 0
+    assert run_command(parser.parse_args(["--db", db, "rename", "4", "z"])) == 0
+
+    out = capsys.readouterr().out
+    assert "Added #4: d" in out
+    assert "Done #1: a" in out and "Done #3: c" in out
+    assert "Removed #2" in out and "Removed #3" in out
+    todos = TodoApp(db).list()
+    assert [(todo.id, todo.text, todo.done) for todo in todos] == [(1, "a", True), (4, "z", False)]
+
+
+def test_cli_batch_is_all_or_nothing(tmp_path, capsys) -> None:
+    db = str(tmp_path / "cli.json")
+    parser = build_parser()
+    run_command(parser.parse_args(["--db", db, "add", "a", "b"]))
+
+    assert run_command(parser.parse_args(["--db", db, "done", "1", "7"])) == 1
+    assert run_command(parser.parse_args(["--db", db, "rm", "5-9"])) == 1
+
+    err = capsys.readouterr().err
+    assert "Todo #7 not found" in err
+    assert "No todos in range #5-9" in err
+    assert [todo.done for todo in TodoApp(db).list()] == [False, False]
+
+
+def test_cli_rejects_malformed_ranges() -> None:
+    parser = build_parser()
+    for bad in ("3-1", "x", "1-y"):
+        with pytest.raises(SystemExit):
+            parser.parse_args(["rm", bad])